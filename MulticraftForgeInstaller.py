@@ -1,8 +1,5 @@
-# Usato per fare richieste HTTP per scaricare file e recuperare dati dalle pagine web
-import requests
-
-# Utilizzato per l'analisi del contenuto HTML
-from bs4 import BeautifulSoup
+# Utilizzato per importare i moduli pesanti solo quando vengono usati
+import importlib
 
 # Permette di registrare messaggi di debug, informazioni, avvertimenti ed errori
 import logging
@@ -10,10 +7,16 @@ import logging
 # Fornisce funzioni per interagire con il sistema operativo
 import os
 
+# Utilizzato per riconoscere i file regolari durante il cambio di proprietario
+import stat
+
 # Utilizzati per ottenere informazioni sugli utenti e sui gruppi del sistema operativo, necessari per cambiare il proprietario dei file e delle directory.
 import pwd
 import grp
 
+# Utilizzato per impedire che più processi scarichino contemporaneamente lo stesso file
+import fcntl
+
 # Usato per creare directory temporanee
 import tempfile
 
@@ -23,24 +26,359 @@ import subprocess
 # Fornisce funzioni di alto livello per operazioni su file e collezioni di file
 import shutil
 
-# Utilizzato per trovare tutti i percorsi che corrispondono a un pattern specifico
-import glob
-
 # Per calcolare hash MD5 e SHA1 dei file scaricati, utili per verificare l'integrità dei file
 import hashlib
 
-# Utilizzato per confrontare le versioni
-from packaging import version
+# Utilizzato per salvare l'indice della cache degli artefatti
+import json
+
+# Utilizzato per registrare l'ultimo utilizzo degli artefatti in cache
+import time
+
+# Utilizzato per misurare la durata delle fasi dell'installazione
+import contextlib
+import functools
+
+# Utilizzato per eseguire più installazioni in parallelo e proteggere le strutture condivise
+import threading
+
+# Utilizzato per confrontare le versioni che non seguono lo schema standard
+import re
+
+# Utilizzati per la cache LRU in memoria delle risposte HTTP e per leggere i contenuti in cache come stream
+from collections import OrderedDict
+import io
+
+# Utilizzato per raggruppare per host le richieste del resolver concorrente
+from urllib.parse import urlsplit
+
+# Utilizzato per aggiungere una variazione casuale all'attesa tra i tentativi delle richieste HTTP
+import random
+
+# Utilizzato per leggere gli argomenti della riga di comando
+import argparse
+
+# Utilizzato per terminare il programma con un codice di uscita
+import sys
+
+# Utilizzati per copiare le voci degli archivi ZIP senza ricompressione
+import struct
+import copy
+
+# Utilizzato per salvare e rileggere rapidamente lo snapshot binario del catalogo delle versioni
+import marshal
+
+# Utilizzato per dare un nome univoco alle directory di staging delle installazioni
+import itertools
+
+# Modulo importato al primo accesso a un suo attributo
+class LazyModule:
+    """
+    Rimanda l'importazione di un modulo al primo utilizzo, così i comandi che non ne hanno
+    bisogno (es. 'list' o 'versions' con l'indice già su disco) non pagano il costo di
+    importare lo stack HTTP o il parser HTML all'avvio. L'importazione è protetta da un lock
+    perché il primo utilizzo può avvenire da più thread contemporaneamente.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+# Usato per fare richieste HTTP per scaricare file e recuperare dati dalle pagine web
+requests = LazyModule("requests")
+
+# Utilizzati per configurare i pool di connessioni e i tentativi automatici delle richieste HTTP
+requests_adapters = LazyModule("requests.adapters")
+urllib3_retry = LazyModule("urllib3.util.retry")
+
+# Utilizzato per l'analisi in streaming delle pagine HTML di Forge
+html_parser = LazyModule("html.parser")
 
 # Permette di lavorare con archivi ZIP
-import zipfile
+zipfile = LazyModule("zipfile")
+
+# Utilizzato per scegliere una porta libera per l'avvio di prova del server
+socket = LazyModule("socket")
+
+# Utilizzato per leggere in streaming il file maven-metadata.xml di Forge
+ElementTree = LazyModule("xml.etree.ElementTree")
+
+# Utilizzato per calcolare la mediana dei tempi degli avvii di prova
+statistics = LazyModule("statistics")
 
-# Inizializza il logger
-logging.basicConfig(level=logging.DEBUG)
+# Utilizzati per risolvere in modo concorrente pagine e link ed eseguire più installazioni in parallelo
+asyncio = LazyModule("asyncio")
+futures = LazyModule("concurrent.futures")
+
+# Inizializza il logger (la configurazione dell'output avviene in main, in base a --verbose)
 logger = logging.getLogger(__name__)
 
-# Cache locale per memorizzare le pagine HTML già scaricate
-html_cache = {}
+# Cache in memoria (LRU) delle risposte HTTP già scaricate, indicizzate per metodo e URL
+html_cache = OrderedDict()
+
+# Cache in memoria (LRU) dei dati estratti dalle pagine di Forge, indicizzati per SHA1 del contenuto
+forge_page_cache = OrderedDict()
+forge_page_cache_lock = threading.Lock()
+FORGE_PAGE_CACHE_MAX_ENTRIES = 64
+
+# Dimensione dei blocchi usati per scrivere su disco i file scaricati
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Lock per percorso di destinazione: due installazioni non scrivono mai lo stesso file '.part'
+download_locks = {}
+download_locks_lock = threading.Lock()
+
+# Nome della directory temporanea usata per i download
+TEMP_DIR_NAME = "multicraft-forge-installer"
+
+# Numero massimo di tentativi per un download interrotto e intervallo in byte tra i punti di ripresa registrati
+DOWNLOAD_MAX_ATTEMPTS = 5
+DOWNLOAD_JOURNAL_INTERVAL = 8 * 1024 * 1024
+
+# Hash attesi degli artefatti Maven letti dai file .md5 e .sha1, indicizzati per URL
+expected_hashes_cache = {}
+
+# Hash MD5 e SHA1 calcolati durante il download, indicizzati per percorso del file
+downloaded_hashes = {}
+
+# Directory della cache persistente dell'installer
+CACHE_DIRECTORY = "/var/cache/multicraft-forge-installer"
+
+# Directory della cache persistente degli artefatti scaricati (installer, universal, jar vanilla, template)
+ARTIFACT_CACHE_DIRECTORY = os.path.join(CACHE_DIRECTORY, "artifacts")
+
+# Dimensione massima della cache degli artefatti, oltre la quale vengono rimossi quelli usati meno di recente
+ARTIFACT_CACHE_MAX_BYTES = 4 * 1024 * 1024 * 1024
+
+# Serializza l'accesso all'indice della cache degli artefatti tra installazioni parallele
+artifact_cache_lock = threading.RLock()
+
+# Repository Maven di Forge e file con l'elenco di tutte le versioni pubblicate
+FORGE_MAVEN_URL = "https://maven.minecraftforge.net/net/minecraftforge/forge/"
+FORGE_MAVEN_METADATA_URL = f"{FORGE_MAVEN_URL}maven-metadata.xml"
+
+# Versioni di Forge promosse come "latest" e "recommended" per ogni versione di Minecraft
+FORGE_PROMOTIONS_URL = "https://files.minecraftforge.net/net/minecraftforge/forge/promotions_slim.json"
+
+# Timeout di connessione e di lettura delle richieste HTTP, in secondi
+HTTP_CONNECT_TIMEOUT = 5
+HTTP_READ_TIMEOUT = 30
+
+# Numero massimo di nuovi tentativi per errori 5xx e connessioni interrotte, e base dell'attesa esponenziale
+HTTP_MAX_RETRIES = 4
+HTTP_BACKOFF_FACTOR = 0.5
+
+# Numero di host e di connessioni per host mantenuti aperti nel pool della sessione HTTP
+HTTP_POOL_HOSTS = 8
+HTTP_POOL_MAXSIZE = 16
+
+# Sessione HTTP condivisa da tutte le richieste, creata al primo utilizzo
+http_session = None
+http_session_lock = threading.Lock()
+
+# Directory della cache persistente delle risposte HTTP (pagine HTML, metadati, template, verifiche dei link)
+HTTP_CACHE_DIRECTORY = os.path.join(CACHE_DIRECTORY, "http")
+
+# Durata in secondi in cui una risposta in cache è considerata valida senza contattare il server
+HTTP_CACHE_TTL = 15 * 60
+
+# Durata in secondi in cui una risposta scaduta può essere usata mentre viene riconvalidata in background
+HTTP_CACHE_STALE_WHILE_REVALIDATE = 24 * 60 * 60
+
+# Dimensione massima dei contenuti mantenuti nella cache in memoria
+HTTP_CACHE_MEMORY_MAX_BYTES = 32 * 1024 * 1024
+
+# Validità dei file di checksum degli artefatti Maven, che non cambiano una volta pubblicati
+CHECKSUM_TTL = 30 * 24 * 60 * 60
+
+# Validità delle verifiche dei link degli artefatti, che su Maven non cambiano una volta pubblicati
+LINK_CHECK_TTL = 24 * 60 * 60
+
+# Serializza l'accesso alla cache HTTP e tiene traccia delle riconvalide in corso
+http_cache_lock = threading.RLock()
+http_cache_revalidating = set()
+
+# URL del template di configurazione e dei jar vanilla di Multicraft
+MULTICRAFT_CONFIG_URL = "http://www.multicraft.org/download/conf/?file=craftbukkit.jar.conf"
+MULTICRAFT_VANILLA_URL = "http://www.multicraft.org/download/jar/?file=minecraft&version={game_version}&client=multicraft"
+
+# Copia locale del template di configurazione di Multicraft (aggiornata con 'configs --refresh-template')
+CONFIG_TEMPLATE_PATH = os.path.join(CACHE_DIRECTORY, "craftbukkit.jar.conf")
+
+# Template usato se il template di Multicraft non è disponibile né in locale né scaricandolo
+DEFAULT_CONFIG_TEMPLATE = """[encoding]
+#encode = system
+#decode = system
+#fileEncoding = latin-1
+
+[config]
+name = CraftBukkit
+source =
+configSource =
+category = Mods
+
+[start]
+command = "{JAVA}" -Xmx{MAX_MEMORY}M -Xms{START_MEMORY}M -Djline.terminal=jline.UnsupportedTerminal -jar "{JAR}" nogui
+"""
+
+# Template di configurazione analizzato, caricato una sola volta per processo
+config_template = None
+config_template_lock = threading.Lock()
+
+# Opzioni della JVM comuni a tutti i comandi di avvio
+JVM_BASE_OPTIONS = "-Xmx{MAX_MEMORY}M -Xms{START_MEMORY}M -Djline.terminal=jline.UnsupportedTerminal"
+
+# Numero di file .jar.conf rigenerati in parallelo
+CONFIG_WORKERS = 8
+
+# Profili di avvio della JVM scritti nel comando del file .jar.conf:
+# versione minima di Java richiesta e opzioni aggiunte a JVM_BASE_OPTIONS
+JVM_G1_OPTIONS = [
+    "-XX:+UseG1GC", "-XX:+ParallelRefProcEnabled", "-XX:MaxGCPauseMillis=200", "-XX:+UnlockExperimentalVMOptions",
+    "-XX:+DisableExplicitGC", "-XX:+AlwaysPreTouch", "-XX:G1NewSizePercent=30", "-XX:G1MaxNewSizePercent=40",
+    "-XX:G1HeapRegionSize=8M", "-XX:G1ReservePercent=20", "-XX:G1HeapWastePercent=5", "-XX:G1MixedGCCountTarget=4",
+    "-XX:InitiatingHeapOccupancyPercent=15", "-XX:G1MixedGCLiveThresholdPercent=90", "-XX:G1RSetUpdatingPauseTimePercent=5",
+    "-XX:SurvivorRatio=32", "-XX:+PerfDisableSharedMem", "-XX:MaxTenuringThreshold=1",
+]
+JVM_PROFILES = {
+    "default": {"min_java": 0, "options": []},
+    "g1": {"min_java": 8, "options": JVM_G1_OPTIONS},
+    "g1-largepages": {"min_java": 8, "options": JVM_G1_OPTIONS + ["-XX:+UseTransparentHugePages"]},
+    "zgc": {"min_java": 15, "options": ["-XX:+UseZGC", "-XX:+AlwaysPreTouch", "-XX:+DisableExplicitGC", "-XX:+PerfDisableSharedMem"]},
+    "shenandoah": {"min_java": 12, "options": ["-XX:+UseShenandoahGC", "-XX:+AlwaysPreTouch", "-XX:+DisableExplicitGC", "-XX:+PerfDisableSharedMem"]},
+}
+
+# Profilo predefinito: 'auto' sceglie in base alla versione di Java e all'epoca di Minecraft
+JVM_PROFILE_AUTO = "auto"
+
+# Eseguibile Java usato per rilevare la versione installata (lo stesso che Multicraft avvia come {JAVA})
+JAVA_EXECUTABLE = "java"
+
+# Commento scritto nel file .jar.conf con il profilo della JVM usato, letto dal comando 'configs'
+JVM_PROFILE_MARKER = "# jvmProfile:"
+
+# Archivio CDS (class data sharing) creato con un avvio di prova e salvato nella directory dell'installazione
+CDS_ARCHIVE_FILENAME = "forge-cds.jsa"
+
+# Versione minima di Java per gli archivi CDS dinamici (-XX:ArchiveClassesAtExit)
+CDS_MIN_JAVA = 13
+
+# Tempo massimo in secondi di un avvio di prova e memoria assegnata al server
+CDS_TRAINING_TIMEOUT = 15 * 60
+CDS_TRAINING_MEMORY_MB = 2048
+
+# Avvii misurati senza e con l'archivio CDS dopo quello di creazione, confrontati per mediana
+CDS_TIMING_RUNS = 3
+
+# Indice delle versioni di Forge salvato su disco e sua validità in secondi
+VERSION_INDEX_PATH = os.path.join(CACHE_DIRECTORY, "version_index.json")
+VERSION_INDEX_MAX_AGE = 6 * 60 * 60
+
+# Indice delle versioni di Forge caricato in memoria
+version_index = None
+
+# Snapshot binario del catalogo delle versioni e versione del suo formato
+VERSION_CATALOGUE_PATH = os.path.join(CACHE_DIRECTORY, "version_catalogue.bin")
+VERSION_CATALOGUE_FORMAT = 1
+
+# Catalogo delle versioni caricato in memoria e lock per l'aggiornamento dei suoi metadati
+version_catalogue = None
+version_catalogue_lock = threading.Lock()
+
+# Strategie di installazione: universal unito al server vanilla, installer con jar di avvio, installer con file di argomenti
+STRATEGY_UNIVERSAL = "universal"
+STRATEGY_INSTALLER = "installer"
+STRATEGY_ARGS_FILE = "args"
+
+# Prime versioni di Minecraft installate con l'installer e con il file di argomenti unix_args.txt
+INSTALLER_MIN_GAME_VERSION = "1.5.2"
+ARGS_FILE_MIN_GAME_VERSION = "1.17.1"
+
+# Numero massimo di richieste contemporanee del risolutore asincrono, in totale e per singolo host
+RESOLVER_MAX_CONCURRENCY = 16
+RESOLVER_MAX_PER_HOST = 6
+
+# Event loop e pool di thread del risolutore, creati al primo utilizzo e condivisi da tutte le installazioni
+resolver_loop = None
+resolver_executor = None
+resolver_lock = threading.Lock()
+
+# Directory, dentro la daemon jar directory, dell'archivio condiviso delle librerie di Forge
+SHARED_LIBRARIES_DIRNAME = ".forge-libraries"
+
+# Serializza l'aggiornamento dei riferimenti dell'archivio condiviso tra installazioni parallele
+shared_libraries_lock = threading.RLock()
+
+# Suffissi delle directory, accanto a quella finale, in cui un'installazione viene preparata e in cui viene spostata quella sostituita
+STAGING_SUFFIX = ".staging"
+PREVIOUS_SUFFIX = ".previous"
+
+# Numera le directory di staging create da questo processo
+staging_counter = itertools.count(1)
+
+# Indice delle versioni installate nella daemon jar directory (dimensioni, librerie condivise, stato)
+INVENTORY_FILENAME = ".forge-inventory.json"
+INVENTORY_FORMAT = 1
+inventory_lock = threading.Lock()
+
+# Pulizia: età minima delle installazioni incomplete da rimuovere e build più recenti sempre mantenute per versione di Minecraft
+GC_MIN_AGE = 60 * 60
+GC_KEEP_BUILDS = 1
+
+# Mirror locale in formato Maven delle librerie richieste dagli installer di Forge
+MAVEN_MIRROR_DIRECTORY = os.path.join(CACHE_DIRECTORY, "maven")
+
+# Repository predefinito delle librerie di Minecraft per gli installer con formato legacy
+MINECRAFT_LIBRARIES_URL = "https://libraries.minecraft.net/"
+
+# Numero di librerie scaricate in parallelo nel mirror locale
+MAVEN_PREFETCH_WORKERS = 8
+
+# Numero di thread usati per aggiornare il proprietario dei file installati
+OWNERSHIP_WORKERS = 8
+
+# Esegue l'installer di Forge con l'utente proprietario della daemon jar directory (se eseguito come root)
+INSTALLER_RUN_AS_OWNER = True
+
+# Numero predefinito di installazioni eseguite in parallelo in modalità batch
+BATCH_MAX_WORKERS = 4
+
+# Formato dei bundle di installazione, nome del loro manifest e numero di file estratti in parallelo
+BUNDLE_FORMAT = 1
+BUNDLE_MANIFEST_NAME = "manifest.json"
+BUNDLE_WORKERS = 8
+
+# Estensioni dei file già compressi, salvati nei bundle senza ricompressione
+BUNDLE_STORED_EXTENSIONS = (".jar", ".zip", ".gz", ".xz", ".png")
+
+# Prefisso delle metriche esportate in formato Prometheus
+METRICS_PREFIX = "multicraft_forge_installer"
+
+# Descrizione dei contatori esportati in formato Prometheus
+METRICS_DESCRIPTIONS = {
+    "http_requests": "Richieste HTTP inviate ai server",
+    "http_retries": "Nuovi tentativi delle richieste HTTP (errori 5xx o connessioni interrotte)",
+    "http_cache_requests": "Richieste servite dalla cache HTTP per esito (hit, stale, miss, fallback)",
+    "artifact_cache_requests": "Ricerche nella cache degli artefatti per esito (hit, miss)",
+    "downloaded_bytes": "Byte scaricati",
+    "download_resumes": "Download ripresi con una richiesta Range",
+    "libraries_prefetched": "Librerie scaricate nel mirror Maven locale",
+    "libraries_seeded": "Librerie collegate nell'installazione prima dell'installer",
+    "chown_changed_entries": "File e cartelle a cui è stato cambiato il proprietario",
+    "installs": "Installazioni per esito",
+    "bundles_applied": "Bundle di installazione applicati per esito (installed, unchanged, failed)",
+}
+
+# Metriche dell'esecuzione corrente: durata delle fasi e contatori
+run_metrics = {"started_at": time.time(), "stages": {}, "counters": {}}
+metrics_lock = threading.Lock()
 
 # Chiede all'utente di inserire la directory di installazione
 def ask_install_directory(default_directory="/home/minecraft/multicraft/jar/"):
@@ -58,33 +396,474 @@ def ask_install_directory(default_directory="/home/minecraft/multicraft/jar/"):
 
     return install_directory
 
+# Registra la durata di una fase dell'installazione
+def record_stage_duration(stage, seconds):
+    with metrics_lock:
+        entry = run_metrics["stages"].setdefault(stage, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        entry["count"] += 1
+        entry["total_seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+# Misura la durata del blocco with come fase dell'installazione
+@contextlib.contextmanager
+def metrics_stage(stage):
+    start_time = time.monotonic()
+    try:
+        yield
+    finally:
+        record_stage_duration(stage, time.monotonic() - start_time)
+
+# Decoratore che misura la durata di ogni chiamata della funzione come fase dell'installazione
+def measured_stage(stage):
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with metrics_stage(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# Incrementa un contatore dell'esecuzione corrente, con etichette opzionali
+def count_metric(name, amount=1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with metrics_lock:
+        run_metrics["counters"][key] = run_metrics["counters"].get(key, 0) + amount
+
+# Costruisce il resoconto dell'esecuzione corrente
+def build_metrics_report():
+    """
+    Ritorna un dizionario serializzabile in JSON con la durata delle fasi (numero di chiamate,
+    tempo totale e massimo; le fasi eseguite in parallelo si sommano) e i contatori.
+    """
+    with metrics_lock:
+        stages = {stage: dict(entry, total_seconds=round(entry["total_seconds"], 4), max_seconds=round(entry["max_seconds"], 4))
+                  for stage, entry in sorted(run_metrics["stages"].items())}
+        counters = [{"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(run_metrics["counters"].items())]
+    finished_at = time.time()
+    return {
+        "host": os.uname().nodename,
+        "started_at": run_metrics["started_at"],
+        "finished_at": finished_at,
+        "elapsed_seconds": round(finished_at - run_metrics["started_at"], 4),
+        "stages": stages,
+        "counters": counters,
+    }
+
+# Scrive un file sostituendolo atomicamente
+def write_file_atomically(path, content):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as file:
+        file.write(content)
+    os.replace(temp_path, path)
+
+# Converte il resoconto dell'esecuzione nel formato testuale di Prometheus
+def format_prometheus_metrics(report):
+    """
+    Ritorna le metriche nel formato del textfile collector di node_exporter.
+    Tutti i valori descrivono l'ultima esecuzione, quindi sono esportati come gauge.
+    """
+    def labels_text(labels):
+        if not labels:
+            return ""
+        escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for key, value in labels.items())
+        return "{" + ",".join(escaped) + "}"
+
+    lines = []
+    def add_metric(name, description, samples):
+        metric = f"{METRICS_PREFIX}_last_run_{name}"
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} gauge")
+        lines.extend(f"{metric}{labels_text(labels)} {value}" for labels, value in samples)
+
+    add_metric("timestamp_seconds", "Ora di fine dell'ultima esecuzione", [({}, round(report["finished_at"], 3))])
+    add_metric("duration_seconds", "Durata dell'ultima esecuzione", [({}, report["elapsed_seconds"])])
+    stages = report["stages"].items()
+    add_metric("stage_seconds", "Tempo totale trascorso in ogni fase (le fasi in parallelo si sommano)",
+               [({"stage": stage}, entry["total_seconds"]) for stage, entry in stages])
+    add_metric("stage_max_seconds", "Durata massima di una singola esecuzione di ogni fase",
+               [({"stage": stage}, entry["max_seconds"]) for stage, entry in stages])
+    add_metric("stage_count", "Numero di esecuzioni di ogni fase", [({"stage": stage}, entry["count"]) for stage, entry in stages])
+
+    counters = {}
+    for counter in report["counters"]:
+        counters.setdefault(counter["name"], []).append((counter["labels"], counter["value"]))
+    for name, samples in counters.items():
+        add_metric(name, METRICS_DESCRIPTIONS.get(name, name), samples)
+
+    return "\n".join(lines) + "\n"
+
+# Scrive le metriche dell'esecuzione come resoconto JSON e/o file per il textfile collector di Prometheus
+def write_metrics_reports(json_path=None, prometheus_path=None):
+    report = build_metrics_report()
+    for stage, entry in report["stages"].items():
+        logger.info(f"Fase {stage}: {entry['count']} esecuzioni, {entry['total_seconds']:.3f} s in totale, massimo {entry['max_seconds']:.3f} s")
+    try:
+        if json_path:
+            write_file_atomically(json_path, json.dumps(report, indent=2) + "\n")
+            logger.info(f"Resoconto dell'esecuzione salvato in {json_path}")
+        if prometheus_path:
+            write_file_atomically(prometheus_path, format_prometheus_metrics(report))
+            logger.info(f"Metriche Prometheus salvate in {prometheus_path}")
+    except OSError as e:
+        logger.error(f"Errore nel salvataggio delle metriche: {e}")
+        return False
+    return True
+
+# Ritorna la politica di nuovi tentativi con attesa esponenziale e variazione casuale
+@functools.lru_cache(maxsize=None)
+def jittered_retry_class():
+    """
+    La classe viene creata al primo utilizzo, così urllib3 viene importato solo quando
+    serve una sessione HTTP.
+    """
+    class JitteredRetry(urllib3_retry.Retry):
+        """
+        Come Retry di urllib3, ma l'attesa tra i tentativi viene moltiplicata per un fattore
+        casuale tra 0.5 e 1.5, così più installazioni parallele non ritentano tutte insieme.
+        """
+        def get_backoff_time(self):
+            return super().get_backoff_time() * random.uniform(0.5, 1.5)
+
+        def increment(self, *args, **kwargs):
+            count_metric("http_retries")
+            return super().increment(*args, **kwargs)
+
+    return JitteredRetry
+
+# Ritorna la sessione HTTP condivisa, creandola al primo utilizzo
+def get_http_session():
+    """
+    Ritorna la sessione HTTP usata da tutte le richieste dello script.
+    La sessione mantiene le connessioni aperte (keep-alive) in un pool per host e ritenta
+    automaticamente le richieste GET e HEAD in caso di errori 5xx o connessioni interrotte.
+    Il pool di connessioni è thread-safe, quindi la sessione è condivisa anche dalle installazioni parallele.
+    """
+    global http_session
+
+    with http_session_lock:
+        if http_session is None:
+            retry = jittered_retry_class()(
+                total=HTTP_MAX_RETRIES,
+                connect=HTTP_MAX_RETRIES,
+                read=HTTP_MAX_RETRIES,
+                status=HTTP_MAX_RETRIES,
+                backoff_factor=HTTP_BACKOFF_FACTOR,
+                status_forcelist=(500, 502, 503, 504),
+                allowed_methods=frozenset(["GET", "HEAD"]),
+                raise_on_status=False,
+            )
+            adapter = requests_adapters.HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            http_session = session
+            logger.debug("Sessione HTTP condivisa creata")
+
+    return http_session
+
+# Ritorna il timeout (connessione, lettura) da usare per le richieste HTTP
+def http_timeout():
+    return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+# Ritorna i percorsi dei file su disco di una risposta nella cache HTTP
+def http_cache_paths(cache_id):
+    directory = os.path.join(HTTP_CACHE_DIRECTORY, cache_id[:2])
+    return os.path.join(directory, f"{cache_id}.json"), os.path.join(directory, f"{cache_id}.body")
+
+# Legge una risposta dalla cache HTTP, prima in memoria e poi su disco
+def read_http_cache_entry(cache_id):
+    with http_cache_lock:
+        entry = html_cache.get(cache_id)
+        if entry is not None:
+            html_cache.move_to_end(cache_id)
+            return entry
+
+    meta_path, body_path = http_cache_paths(cache_id)
+    try:
+        with open(meta_path, 'r') as file:
+            entry = json.load(file)
+        with open(body_path, 'rb') as file:
+            entry["body"] = file.read()
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Voce della cache HTTP non leggibile ({meta_path}): {e}")
+        return None
+
+    remember_http_cache_entry(cache_id, entry)
+    return entry
+
+# Inserisce una risposta nella cache in memoria, rimuovendo le meno recenti oltre il limite di dimensione
+def remember_http_cache_entry(cache_id, entry):
+    with http_cache_lock:
+        html_cache[cache_id] = entry
+        html_cache.move_to_end(cache_id)
+        total_size = sum(len(cached["body"]) for cached in html_cache.values())
+        while total_size > HTTP_CACHE_MEMORY_MAX_BYTES and len(html_cache) > 1:
+            evicted_id, evicted = html_cache.popitem(last=False)
+            total_size -= len(evicted["body"])
+            logger.debug("Risposta %s rimossa dalla cache HTTP in memoria", evicted['url'])
+
+# Salva una risposta nella cache HTTP, in memoria e su disco
+def write_http_cache_entry(cache_id, entry):
+    remember_http_cache_entry(cache_id, entry)
+
+    meta_path, body_path = http_cache_paths(cache_id)
+    meta = {key: value for key, value in entry.items() if key != "body"}
+    try:
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(body_path + suffix, 'wb') as file:
+            file.write(entry["body"])
+        with open(meta_path + suffix, 'w') as file:
+            json.dump(meta, file)
+        os.replace(body_path + suffix, body_path)
+        os.replace(meta_path + suffix, meta_path)
+    except OSError as e:
+        logger.debug(f"Impossibile salvare su disco la risposta per {entry['url']}: {e}")
+
+# Esegue una richiesta HTTP condizionale e aggiorna la cache
+def revalidate_http_cache_entry(cache_id, url, method, headers, entry):
+    """
+    Contatta il server per aggiornare una voce della cache. Se la voce esiste vengono
+    inviati If-None-Match e If-Modified-Since: con una risposta 304 viene solo aggiornata
+    la data di validità. Ritorna la voce aggiornata oppure None in caso di errore.
+    """
+    request_headers = dict(headers or {})
+    if entry and method == "GET":
+        if entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+    count_metric("http_requests", method=method)
+    try:
+        response = get_http_session().request(method, url, headers=request_headers, timeout=http_timeout(), allow_redirects=True)
+    except requests.RequestException as e:
+        logger.error(f"Errore nella richiesta {method} a {url}: {e}")
+        return None
+
+    if response.status_code == 304 and entry:
+        logger.debug(f"Risposta in cache per {url} ancora valida (304)")
+        entry = dict(entry, fetched_at=time.time())
+    else:
+        entry = {
+            "url": url,
+            "method": method,
+            "status": response.status_code,
+            "final_url": response.url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "encoding": response.encoding or "utf-8",
+            "fetched_at": time.time(),
+            "body": response.content if method == "GET" else b"",
+        }
+        # Le risposte di errore non vengono salvate, così un artefatto pubblicato dopo o un guasto temporaneo non restano in cache
+        if response.status_code >= 400:
+            return entry
+
+    write_http_cache_entry(cache_id, entry)
+    return entry
+
+# Riconvalida una voce della cache in background
+def revalidate_http_cache_entry_in_background(cache_id, url, method, headers, entry):
+    with http_cache_lock:
+        if cache_id in http_cache_revalidating:
+            return
+        http_cache_revalidating.add(cache_id)
+
+    def revalidate():
+        try:
+            revalidate_http_cache_entry(cache_id, url, method, headers, entry)
+        finally:
+            with http_cache_lock:
+                http_cache_revalidating.discard(cache_id)
+
+    threading.Thread(target=revalidate, daemon=True).start()
+
+# Esegue una richiesta HTTP usando la cache persistente delle risposte
+def cached_http_request(url, method="GET", ttl=HTTP_CACHE_TTL, headers=None, stale_while_revalidate=HTTP_CACHE_STALE_WHILE_REVALIDATE):
+    """
+    Ritorna la risposta a una richiesta GET o HEAD come dizionario (status, final_url, body, ...),
+    usando la cache su disco e in memoria:
+    - entro ttl secondi la risposta in cache viene usata senza contattare il server;
+    - entro stale_while_revalidate secondi dalla scadenza la risposta viene usata e riconvalidata in background;
+    - altrimenti viene eseguita una richiesta condizionale (If-None-Match / If-Modified-Since).
+    Se il server non è raggiungibile o risponde con un errore 5xx viene usata l'ultima risposta
+    in cache, se presente. Ritorna None se la risposta non è disponibile.
+    """
+    cache_id = hashlib.sha1(f"{method} {url}".encode()).hexdigest()
+    entry = read_http_cache_entry(cache_id)
+
+    if entry:
+        age = time.time() - entry["fetched_at"]
+        if age < ttl:
+            logger.debug("Risposta per %s trovata nella cache", url)
+            count_metric("http_cache_requests", result="hit")
+            return entry
+        if age < ttl + stale_while_revalidate:
+            logger.debug("Risposta scaduta per %s usata durante la riconvalida in background", url)
+            count_metric("http_cache_requests", result="stale")
+            revalidate_http_cache_entry_in_background(cache_id, url, method, headers, entry)
+            return entry
+
+    updated_entry = revalidate_http_cache_entry(cache_id, url, method, headers, entry)
+    if entry and (updated_entry is None or updated_entry["status"] >= 500):
+        status = "non raggiungibile" if updated_entry is None else f"in errore ({updated_entry['status']})"
+        logger.warning(f"Server {status}, uso la risposta in cache per {url}")
+        count_metric("http_cache_requests", result="fallback")
+        return entry
+    count_metric("http_cache_requests", result="miss")
+    return updated_entry
+
+# Ritorna il contenuto testuale di una risposta della cache HTTP
+def http_entry_text(entry):
+    return entry["body"].decode(entry.get("encoding") or "utf-8", errors="replace")
+
 # Ottiene l'HTML di una pagina web
+@measured_stage("resolve")
 def get_html(url):
     # Log dell'inizio del tentativo di recupero dell'HTML
     logger.debug(f"Tentativo di recupero dell'HTML per {url}")
 
-    if url not in html_cache:
-        try:
-            # Esecuzione della richiesta HTTP GET
-            response = requests.get(url, timeout=5, headers={'User-Agent': 'Mozilla/5.0'})
-            response.raise_for_status()
-
-            if response.status_code == 200:
-                # Salvataggio dell'HTML nella cache se la richiesta ha avuto successo
-                html_cache[url] = response.text
-                logger.info(f"HTML recuperato con successo per {url}")
-            else:
-                # Log se la richiesta non è andata a buon fine
-                logger.error(f"Risposta non valida per {url}: Status code {response.status_code}")
-        except requests.RequestException as e:
-            # Log dell'errore in caso di eccezione nella richiesta
-            logger.error(f"Errore nel recupero dell'HTML per {url}: {e}")
-            return None
-    else:
-        # Log se l'HTML è già presente nella cache
-        logger.debug(f"HTML per {url} trovato nella cache")
+    # Richiesta HTTP GET tramite la cache persistente delle risposte
+    entry = cached_http_request(url, headers={'User-Agent': 'Mozilla/5.0'})
+    if entry is None:
+        logger.error(f"Errore nel recupero dell'HTML per {url}")
+        return None
+
+    if entry["status"] != 200:
+        # Log se la richiesta non è andata a buon fine
+        logger.error(f"Risposta non valida per {url}: Status code {entry['status']}")
+        return None
 
-    return html_cache.get(url, None)
+    logger.info(f"HTML recuperato con successo per {url}")
+    return http_entry_text(entry)
+
+# Ritorna la classe del parser delle pagine di Forge, creata al primo utilizzo
+@functools.lru_cache(maxsize=None)
+def forge_page_parser_class():
+    """
+    La classe viene creata al primo utilizzo, così html.parser viene importato solo
+    quando serve analizzare una pagina.
+    """
+    class ForgePageParser(html_parser.HTMLParser):
+        """
+        Estrae in un solo passaggio, senza costruire l'albero del documento:
+        - le versioni di Minecraft dalla lista '.li-version-list li';
+        - le build di Forge dalle celle 'td.download-version', con data di rilascio
+          ('td.download-time'), promozioni (icone 'promo-latest'/'promo-recommended')
+          e link di download;
+        - gli hash MD5 e SHA1 dei tooltip 'div.info-tooltip', associati al link che li precede
+          e ai link contenuti nel tooltip.
+        """
+        VOID_TAGS = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"))
+
+        def __init__(self):
+            super().__init__(convert_charrefs=True)
+            self.stack = []
+            self.version_list_depth = None
+            self.capture = None
+            self.last_link = None
+            self.game_versions = []
+            self.builds = []
+            self.hashes = []
+
+        def handle_starttag(self, tag, attrs):
+            attributes = dict(attrs)
+            classes = (attributes.get("class") or "").split()
+            if tag not in self.VOID_TAGS:
+                self.stack.append(tag)
+            depth = len(self.stack)
+
+            if "li-version-list" in classes and self.version_list_depth is None:
+                self.version_list_depth = depth
+            elif tag == "li" and self.version_list_depth is not None and self.capture is None:
+                self.capture = {"kind": "game_version", "depth": depth, "text": []}
+            elif tag == "td" and "download-version" in classes:
+                self.builds.append({"version": None, "date": None, "promotions": [], "files": []})
+                self.capture = {"kind": "build_version", "depth": depth, "text": []}
+            elif tag == "td" and "download-time" in classes and self.builds:
+                self.builds[-1]["date"] = attributes.get("title")
+            elif tag == "i" and self.capture and self.capture["kind"] == "build_version":
+                self.builds[-1]["promotions"].extend(name[len("promo-"):] for name in classes if name.startswith("promo-"))
+            elif tag == "div" and "info-tooltip" in classes:
+                self.capture = {"kind": "tooltip", "depth": depth, "text": [], "links": [self.last_link] if self.last_link else []}
+            elif tag == "a" and attributes.get("href"):
+                if self.capture and self.capture["kind"] == "tooltip":
+                    self.capture["links"].append(attributes["href"])
+                else:
+                    self.last_link = attributes["href"]
+                    if self.builds and "tr" in self.stack:
+                        self.builds[-1]["files"].append({"url": attributes["href"], "md5": None, "sha1": None})
+
+        def handle_endtag(self, tag):
+            if tag in self.VOID_TAGS or tag not in self.stack:
+                return
+            # Chiude anche gli elementi lasciati aperti all'interno di quello corrente
+            while self.stack.pop() != tag:
+                pass
+            depth = len(self.stack)
+            if self.capture and depth < self.capture["depth"]:
+                self.finish_capture()
+            if self.version_list_depth is not None and depth < self.version_list_depth:
+                self.version_list_depth = None
+
+        def handle_data(self, data):
+            if self.capture:
+                self.capture["text"].append(data)
+
+        def finish_capture(self):
+            capture, self.capture = self.capture, None
+            if capture["kind"] == "game_version":
+                text = "".join(capture["text"]).strip()
+                if text:
+                    self.game_versions.append(text)
+            elif capture["kind"] == "build_version":
+                self.builds[-1]["version"] = "".join(part.strip() for part in capture["text"])
+            elif capture["kind"] == "tooltip":
+                text = "".join(capture["text"])
+                md5 = re.search(r"MD5:\s*(\S+)", text)
+                sha1 = re.search(r"SHA1:\s*(\S+)", text)
+                md5, sha1 = (md5.group(1) if md5 else None), (sha1.group(1) if sha1 else None)
+                for link in capture["links"]:
+                    self.hashes.append((link, md5, sha1))
+                if self.builds and self.builds[-1]["files"] and self.builds[-1]["files"][-1]["url"] == self.last_link:
+                    self.builds[-1]["files"][-1].update(md5=md5, sha1=sha1)
+
+    return ForgePageParser
+
+# Estrae da una pagina di Forge versioni, build, link e hash, con cache per contenuto
+def parse_forge_page(html):
+    """
+    Analizza una pagina di files.minecraftforge.net in un solo passaggio e ritorna un dizionario:
+    - game_versions: versioni di Minecraft della lista laterale;
+    - builds: lista di {version, date, promotions, files: [{url, md5, sha1}]} nell'ordine della pagina;
+    - hashes: lista di (link, md5, sha1) per ogni link associato a un tooltip con gli hash.
+    Il risultato viene mantenuto in memoria, indicizzato per SHA1 del contenuto, quindi
+    analizzare di nuovo la stessa pagina (es. per più artefatti) non costa nulla.
+    """
+    content_id = hashlib.sha1(html.encode("utf-8", errors="replace")).hexdigest()
+    with forge_page_cache_lock:
+        page = forge_page_cache.get(content_id)
+        if page is not None:
+            forge_page_cache.move_to_end(content_id)
+            return page
+
+    with metrics_stage("parse"):
+        parser = forge_page_parser_class()()
+        parser.feed(html)
+        parser.close()
+        if parser.capture:
+            parser.finish_capture()
+        page = {"game_versions": parser.game_versions, "builds": parser.builds, "hashes": parser.hashes}
+
+    with forge_page_cache_lock:
+        forge_page_cache[content_id] = page
+        while len(forge_page_cache) > FORGE_PAGE_CACHE_MAX_ENTRIES:
+            forge_page_cache.popitem(last=False)
+    return page
 
 # Ottiene le versioni di Forge per la versione di Minecraft specificata
 def get_version_data(version_url):
@@ -93,17 +872,12 @@ def get_version_data(version_url):
     logger.debug(f"Richiesta HTML per {version_url}")
 
     if html:
-        # Analisi HTML della pagina
-        soup = BeautifulSoup(html, 'html.parser')
-        version_data = []
         try:
             # Estrazione dei dati delle versioni
-            version_elements = soup.find_all('td', class_='download-version')
-            for version_element in version_elements:
-                version_text = version_element.get_text(strip=True)
-                version_data.append(version_text)
-                logger.debug(f"Versione trovata: {version_text}")
-
+            builds = parse_forge_page(html)["builds"]
+            version_data = [build["version"] for build in builds if build["version"]]
+            annotate_catalogue_from_page(version_url, builds)
+            logger.debug(f"Versioni trovate: {len(version_data)}")
             logger.info(f"Versioni estratte con successo da {version_url}")
             return version_data
         except Exception as e:
@@ -115,80 +889,461 @@ def get_version_data(version_url):
         logger.error(f"Impossibile recuperare il contenuto HTML da {version_url}")
         return []
 
-# Ottiene il link dell'installer per la versione di Forge specificata
-def get_installer_link(game_version, forge_version):
-    installer_url = f"https://maven.minecraftforge.net/net/minecraftforge/forge/{game_version}-{forge_version}/forge-{game_version}-{forge_version}-installer.jar"
+# Aggiunge al catalogo delle versioni la data di rilascio e gli hash delle build di una pagina index_<mc>.html
+def annotate_catalogue_from_page(version_url, builds):
+    match = re.search(r"index_(.+)\.html$", version_url)
+    if not match or version_catalogue is None:
+        return
+    game_version = match.group(1)
+    suffix = "-universal.zip" if install_strategy(game_version) == STRATEGY_UNIVERSAL else "-installer.jar"
+    for build in builds:
+        if not build["version"]:
+            continue
+        artifact = next((file for file in build["files"] if file["url"].endswith(suffix)), {})
+        annotate_version_catalogue(game_version, build["version"], released=build["date"],
+                                   md5=artifact.get("md5"), sha1=artifact.get("sha1"))
+
+# Calcola una chiave di ordinamento per versioni di Minecraft o Forge
+def version_sort_key(version_text):
+    """
+    Ritorna una chiave di ordinamento per una versione come '1.20.1', '14.23.5.2860',
+    '10.13.4.1614-1.7.10' o '1.7.10_pre4'. A parità di parte numerica, le versioni
+    con un suffisso (pre-release) vengono ordinate prima della versione finale.
+    """
+    match = re.match(r"(\d+(?:\.\d+)*)(.*)", version_text)
+    if not match:
+        return ((), 0, version_text)
+    numbers = tuple(int(part) for part in match.group(1).split("."))
+    suffix = match.group(2)
+    return (numbers, 0 if suffix else 1, suffix)
+
+# Ritorna la strategia di installazione di una versione di Minecraft
+@functools.lru_cache(maxsize=None)
+def install_strategy(game_version):
+    """
+    Ritorna STRATEGY_UNIVERSAL per le versioni precedenti alla 1.5.2, STRATEGY_INSTALLER
+    fino alla 1.17.1 esclusa e STRATEGY_ARGS_FILE dalla 1.17.1 in poi. Il confronto usa
+    version_sort_key, quindi accetta anche versioni non standard come '1.7.10_pre4'.
+    """
+    key = version_sort_key(game_version)
+    if key < version_sort_key(INSTALLER_MIN_GAME_VERSION):
+        return STRATEGY_UNIVERSAL
+    if key < version_sort_key(ARGS_FILE_MIN_GAME_VERSION):
+        return STRATEGY_INSTALLER
+    return STRATEGY_ARGS_FILE
+
+# Legge in streaming il file maven-metadata.xml e raggruppa le versioni di Forge per versione di Minecraft
+def parse_maven_metadata(stream):
+    """
+    Analizza il file maven-metadata.xml di Forge con un parser XML incrementale,
+    senza costruire l'albero completo del documento.
+    Ritorna un dizionario {versione_minecraft: [versioni_forge dalla più recente]}.
+    """
+    versions = {}
+    for event, element in ElementTree.iterparse(stream, events=("end",)):
+        if element.tag == "version" and element.text:
+            full_version = element.text.strip()
+            if "-" in full_version:
+                game_version, forge_version = full_version.split("-", 1)
+                versions.setdefault(game_version, []).append(forge_version)
+        element.clear()
+
+    for forge_versions in versions.values():
+        forge_versions.sort(key=version_sort_key, reverse=True)
+    return versions
+
+# Costruisce l'indice delle versioni di Forge da maven-metadata.xml e dal file delle promozioni
+@measured_stage("resolve")
+def build_version_index():
+    """
+    Scarica maven-metadata.xml e promotions_slim.json e costruisce l'indice compatto
+    di tutte le coppie versione di Minecraft -> versioni di Forge.
+    Ritorna l'indice oppure None in caso di errore.
+    """
+    logger.debug(f"Costruzione dell'indice delle versioni da {FORGE_MAVEN_METADATA_URL}")
+    # I file vengono sempre riconvalidati: se non sono cambiati il server risponde 304
+    entry = cached_http_request(FORGE_MAVEN_METADATA_URL, ttl=0, stale_while_revalidate=0)
+    if entry is None or entry["status"] != 200:
+        logger.error(f"Errore nella lettura di {FORGE_MAVEN_METADATA_URL}")
+        return None
     try:
-        # Richiesta HEAD per verificare il link
-        response = requests.head(installer_url)
-        logger.debug(f"Richiesta HEAD inviata a {installer_url}")
+        versions = parse_maven_metadata(io.BytesIO(entry["body"]))
+    except ElementTree.ParseError as e:
+        logger.error(f"Errore nell'analisi di {FORGE_MAVEN_METADATA_URL}: {e}")
+        return None
+
+    promos = {}
+    entry = cached_http_request(FORGE_PROMOTIONS_URL, ttl=0, stale_while_revalidate=0)
+    try:
+        if entry is None or entry["status"] != 200:
+            raise ValueError("risposta non valida")
+        promos = json.loads(http_entry_text(entry)).get("promos", {})
+    except ValueError as e:
+        logger.warning(f"Promozioni di Forge non disponibili ({FORGE_PROMOTIONS_URL}): {e}")
+
+    index = {"generated_at": time.time(), "versions": versions, "promos": promos}
+    logger.info(f"Indice delle versioni costruito: {len(versions)} versioni di Minecraft, {sum(len(v) for v in versions.values())} versioni di Forge")
+    return index
+
+# Carica l'indice delle versioni dalla memoria, dal disco o ricostruendolo
+def load_version_index(max_age=VERSION_INDEX_MAX_AGE):
+    """
+    Ritorna l'indice delle versioni di Forge. L'indice viene letto dal disco se è più
+    recente di max_age secondi, altrimenti viene ricostruito e salvato.
+    Se la ricostruzione non riesce viene usato l'indice su disco anche se scaduto.
+    Ritorna None se nessun indice è disponibile.
+    """
+    global version_index
 
-        # Log della risposta
-        logger.debug(f"Risposta per il link Installer: {response.status_code}")
+    if version_index and time.time() - version_index["generated_at"] < max_age:
+        return version_index
 
-        # Controllo dello status code della risposta
-        if response.status_code == 200:
-            logger.info(f"Link Installer trovato: {installer_url}")
-            return installer_url
-        else:
-            logger.warning(f"Link Installer non trovato o non raggiungibile: Status Code {response.status_code}")
+    disk_index = None
+    try:
+        with open(VERSION_INDEX_PATH, 'r') as file:
+            disk_index = json.load(file)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f"Indice delle versioni su disco non leggibile ({VERSION_INDEX_PATH}): {e}")
+
+    if disk_index and time.time() - disk_index["generated_at"] < max_age:
+        logger.debug(f"Indice delle versioni caricato da {VERSION_INDEX_PATH}")
+        version_index = disk_index
+        return version_index
+
+    index = build_version_index()
+    if index is None:
+        if disk_index:
+            logger.warning("Uso dell'indice delle versioni su disco scaduto")
+        version_index = disk_index
+        return version_index
+
+    try:
+        os.makedirs(os.path.dirname(VERSION_INDEX_PATH), exist_ok=True)
+        temp_path = f"{VERSION_INDEX_PATH}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(index, file, separators=(",", ":"))
+        os.replace(temp_path, VERSION_INDEX_PATH)
+    except OSError as e:
+        logger.warning(f"Impossibile salvare l'indice delle versioni in {VERSION_INDEX_PATH}: {e}")
+
+    version_index = index
+    return version_index
+
+# Versione di Forge del catalogo, con chiavi di ordinamento, strategia di installazione e metadati
+class ForgeBuild:
+    """
+    Record compatto (con __slots__) di una coppia versione di Minecraft - versione di Forge.
+    Le chiavi di ordinamento e la strategia di installazione vengono calcolate una sola volta,
+    quando il record viene creato dall'indice, e salvate nello snapshot del catalogo.
+    released, md5 e sha1 (data di rilascio e hash dell'artefatto di installazione) vengono
+    aggiunti quando sono noti, dalle pagine di Forge o dai file di checksum Maven.
+    """
+    __slots__ = ("game_version", "forge_version", "game_key", "forge_key", "strategy",
+                 "released", "md5", "sha1", "recommended", "latest")
+
+    def __init__(self, game_version, forge_version, game_key=None, forge_key=None, strategy=None,
+                 released=None, md5=None, sha1=None, recommended=False, latest=False):
+        self.game_version = game_version
+        self.forge_version = forge_version
+        self.game_key = game_key if game_key is not None else version_sort_key(game_version)
+        self.forge_key = forge_key if forge_key is not None else version_sort_key(forge_version)
+        self.strategy = strategy or install_strategy(game_version)
+        self.released = released
+        self.md5 = md5
+        self.sha1 = sha1
+        self.recommended = recommended
+        self.latest = latest
+
+    # Ritorna i valori del record nell'ordine di __slots__, come salvati nello snapshot
+    def to_tuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+# Catalogo delle versioni di Forge ordinate, con accesso diretto per versione di Minecraft e per coppia
+class VersionCatalogue:
+    """
+    Contiene ogni coppia una sola volta, ordinata dalla versione di Minecraft e di Forge
+    più recente. by_game e by_pair condividono gli stessi record di builds.
+    """
+    __slots__ = ("generated_at", "builds", "by_game", "by_pair", "game_versions", "dirty")
+
+    def __init__(self, generated_at, builds):
+        builds.sort(key=lambda build: (build.game_key, build.forge_key), reverse=True)
+        self.generated_at = generated_at
+        self.builds = builds
+        self.by_pair = {(build.game_version, build.forge_version): build for build in builds}
+        self.by_game = {}
+        for build in builds:
+            self.by_game.setdefault(build.game_version, []).append(build)
+        self.game_versions = list(self.by_game)
+        self.dirty = False
+
+# Costruisce il catalogo delle versioni dall'indice, mantenendo i metadati già raccolti
+def build_version_catalogue(index, previous=None):
+    """
+    Crea un record per ogni versione di Forge dell'indice e applica le promozioni
+    (recommended/latest) come flag dei record. Data di rilascio e hash raccolti nel
+    catalogo precedente vengono copiati nei record corrispondenti.
+    """
+    builds = {}
+    for game_version, forge_versions in index["versions"].items():
+        for forge_version in forge_versions:
+            builds[(game_version, forge_version)] = ForgeBuild(game_version, forge_version)
+
+    for promotion, forge_version in index.get("promos", {}).items():
+        game_version, _, kind = promotion.rpartition("-")
+        if kind not in ("latest", "recommended") or not game_version:
+            continue
+        # Una versione promossa non ancora presente in maven-metadata.xml viene comunque aggiunta
+        build = builds.setdefault((game_version, forge_version), ForgeBuild(game_version, forge_version))
+        setattr(build, kind, True)
+
+    if previous:
+        for pair, build in builds.items():
+            old = previous.by_pair.get(pair)
+            if old:
+                build.released, build.md5, build.sha1 = old.released, old.md5, old.sha1
+
+    return VersionCatalogue(index["generated_at"], list(builds.values()))
+
+# Legge lo snapshot binario del catalogo delle versioni
+def read_version_catalogue():
+    """
+    Ritorna il catalogo salvato in VERSION_CATALOGUE_PATH, oppure None se lo snapshot
+    non esiste, non è leggibile o ha un formato diverso da quello attuale.
+    """
+    try:
+        with open(VERSION_CATALOGUE_PATH, 'rb') as file:
+            snapshot = marshal.load(file)
+        if snapshot.get("format") != VERSION_CATALOGUE_FORMAT:
+            logger.debug(f"Formato dello snapshot del catalogo non aggiornato ({VERSION_CATALOGUE_PATH})")
             return None
-    except requests.RequestException as e:
-        logger.error(f"Errore nella verifica del link Installer: {e}")
+        return VersionCatalogue(snapshot["generated_at"], [ForgeBuild(*values) for values in snapshot["builds"]])
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, TypeError, KeyError, AttributeError) as e:
+        logger.warning(f"Snapshot del catalogo delle versioni non leggibile ({VERSION_CATALOGUE_PATH}): {e}")
+        return None
+
+# Salva il catalogo delle versioni nello snapshot binario
+def save_version_catalogue(catalogue):
+    """
+    Salva i record come tuple con marshal, che si rilegge in pochi millisecondi senza
+    ricalcolare chiavi di ordinamento e strategie. Il file viene sostituito atomicamente.
+    """
+    with version_catalogue_lock:
+        snapshot = {
+            "format": VERSION_CATALOGUE_FORMAT,
+            "generated_at": catalogue.generated_at,
+            "builds": [build.to_tuple() for build in catalogue.builds],
+        }
+        catalogue.dirty = False
+    try:
+        os.makedirs(os.path.dirname(VERSION_CATALOGUE_PATH), exist_ok=True)
+        temp_path = f"{VERSION_CATALOGUE_PATH}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as file:
+            marshal.dump(snapshot, file)
+        os.replace(temp_path, VERSION_CATALOGUE_PATH)
+        logger.debug(f"Catalogo delle versioni salvato in {VERSION_CATALOGUE_PATH}")
+    except OSError as e:
+        logger.warning(f"Impossibile salvare il catalogo delle versioni in {VERSION_CATALOGUE_PATH}: {e}")
+
+# Carica il catalogo delle versioni dalla memoria, dallo snapshot o dall'indice delle versioni
+def load_version_catalogue(max_age=VERSION_INDEX_MAX_AGE):
+    """
+    Ritorna il catalogo delle versioni. Lo snapshot su disco viene usato se è più recente
+    di max_age secondi o se corrisponde all'indice delle versioni disponibile, altrimenti
+    il catalogo viene ricostruito dall'indice e salvato.
+    Ritorna None se nessun indice è disponibile.
+    """
+    global version_catalogue
+
+    if version_catalogue and time.time() - version_catalogue.generated_at < max_age:
+        return version_catalogue
+
+    snapshot = read_version_catalogue()
+    if snapshot and time.time() - snapshot.generated_at < max_age:
+        logger.debug(f"Catalogo delle versioni caricato da {VERSION_CATALOGUE_PATH}")
+        version_catalogue = snapshot
+        return version_catalogue
+
+    index = load_version_index(max_age)
+    if index is None:
+        if snapshot:
+            logger.warning("Uso del catalogo delle versioni su disco scaduto")
+        version_catalogue = snapshot
+        return version_catalogue
+
+    if snapshot and snapshot.generated_at == index["generated_at"]:
+        version_catalogue = snapshot
+        return version_catalogue
+
+    catalogue = build_version_catalogue(index, previous=version_catalogue or snapshot)
+    save_version_catalogue(catalogue)
+    version_catalogue = catalogue
+    return version_catalogue
+
+# Aggiunge data di rilascio e hash a una versione del catalogo già caricato
+def annotate_version_catalogue(game_version, forge_version, released=None, md5=None, sha1=None):
+    """
+    Aggiorna solo il catalogo in memoria, senza caricarlo se non lo è già: le modifiche
+    vengono salvate nello snapshot da flush_version_catalogue.
+    """
+    catalogue = version_catalogue
+    build = catalogue.by_pair.get((game_version, forge_version)) if catalogue else None
+    if build is None:
+        return
+    with version_catalogue_lock:
+        for name, value in (("released", released), ("md5", md5), ("sha1", sha1)):
+            if value and getattr(build, name) != value:
+                setattr(build, name, value)
+                catalogue.dirty = True
+
+# Salva il catalogo delle versioni se sono stati aggiunti metadati
+def flush_version_catalogue():
+    if version_catalogue and version_catalogue.dirty:
+        save_version_catalogue(version_catalogue)
+
+# Ritorna le versioni di Minecraft presenti nel catalogo, dalla più recente
+def list_game_versions(catalogue):
+    return catalogue.game_versions
+
+# Ritorna le versioni di Forge per una versione di Minecraft, filtrate per intervallo
+def query_forge_versions(catalogue, game_version, minimum=None, maximum=None):
+    """
+    Ritorna le versioni di Forge disponibili per game_version, dalla più recente,
+    limitate all'intervallo [minimum, maximum] se indicato.
+    """
+    builds = catalogue.by_game.get(game_version, [])
+    if minimum:
+        minimum_key = version_sort_key(minimum)
+        builds = [build for build in builds if build.forge_key >= minimum_key]
+    if maximum:
+        maximum_key = version_sort_key(maximum)
+        builds = [build for build in builds if build.forge_key <= maximum_key]
+    return [build.forge_version for build in builds]
+
+# Risolve "latest", "recommended" o una versione esatta di Forge per una versione di Minecraft
+def resolve_forge_version(catalogue, game_version, forge_spec):
+    """
+    Ritorna la versione di Forge corrispondente a forge_spec per game_version:
+    'latest' e 'recommended' vengono risolti con le promozioni di Forge
+    ('latest' ricade sulla versione più recente del catalogo), una versione esatta
+    viene ritornata se presente. Ritorna None se la versione non esiste.
+    """
+    builds = catalogue.by_game.get(game_version, [])
+
+    if forge_spec in ("latest", "recommended"):
+        for build in builds:
+            if getattr(build, forge_spec):
+                return build.forge_version
+        if forge_spec == "latest" and builds:
+            return builds[0].forge_version
+        logger.warning(f"Nessuna versione '{forge_spec}' di Forge per Minecraft {game_version}")
+        return None
+
+    return forge_spec if (game_version, forge_spec) in catalogue.by_pair else None
+
+# Ottiene le versioni di Forge per una versione di Minecraft dal catalogo, con le pagine HTML come alternativa
+def get_forge_versions(game_version, version_links):
+    """
+    Ritorna le versioni di Forge per game_version usando il catalogo delle versioni.
+    Se il catalogo non è disponibile o non contiene la versione, analizza le pagine index_<mc>.html.
+    """
+    catalogue = load_version_catalogue()
+    if catalogue and game_version in catalogue.by_game:
+        logger.debug(f"Versioni di Forge per {game_version} lette dal catalogo")
+        return [build.forge_version for build in catalogue.by_game[game_version]]
+
+    forge_versions = []
+    for version_url in version_links:
+        logger.info(f"Recupero versioni di Forge da: {version_url}")
+        versions = get_version_data(version_url)
+        logger.debug(f"Versioni trovate: {versions}")
+        forge_versions.extend(versions)
+    return forge_versions
+
+# Ottiene il link dell'installer per la versione di Forge specificata
+@measured_stage("probe")
+def get_installer_link(game_version, forge_version):
+    installer_url = f"{FORGE_MAVEN_URL}{game_version}-{forge_version}/forge-{game_version}-{forge_version}-installer.jar"
+    # Richiesta HEAD per verificare il link, tramite la cache delle risposte
+    response = cached_http_request(installer_url, method="HEAD", ttl=LINK_CHECK_TTL)
+    logger.debug(f"Richiesta HEAD inviata a {installer_url}")
+
+    if response is None:
+        logger.error(f"Errore nella verifica del link Installer: {installer_url}")
+        return None
+
+    # Log della risposta
+    logger.debug(f"Risposta per il link Installer: {response['status']}")
+
+    # Controllo dello status code della risposta
+    if response["status"] == 200:
+        logger.info(f"Link Installer trovato: {installer_url}")
+        return installer_url
+    else:
+        logger.warning(f"Link Installer non trovato o non raggiungibile: Status Code {response['status']}")
         return None
 
 # Ottiene il link dell'universal per la versione di Forge specificata
+@measured_stage("probe")
 def get_universal_link(game_version, forge_version):
-    universal_url = f"https://maven.minecraftforge.net/net/minecraftforge/forge/{game_version}-{forge_version}/forge-{game_version}-{forge_version}-universal.zip"
-    try:
-        # Richiesta HEAD per verificare il link
-        response = requests.head(universal_url)
-        logger.debug(f"Richiesta HEAD inviata a {universal_url}")
+    universal_url = f"{FORGE_MAVEN_URL}{game_version}-{forge_version}/forge-{game_version}-{forge_version}-universal.zip"
+    # Richiesta HEAD per verificare il link, tramite la cache delle risposte
+    response = cached_http_request(universal_url, method="HEAD", ttl=LINK_CHECK_TTL)
+    logger.debug(f"Richiesta HEAD inviata a {universal_url}")
 
-        # Log della risposta
-        logger.debug(f"Risposta per il link Universal: {response.status_code}")
+    if response is None:
+        logger.error(f"Errore nella verifica del link Universal: {universal_url}")
+        return None
 
-        # Controllo dello status code della risposta
-        if response.status_code == 200:
-            logger.info(f"Link Universal trovato: {universal_url}")
-            return universal_url
-        else:
-            logger.warning(f"Link Universal non trovato o non raggiungibile: Status Code {response.status_code}")
-            return None
-    except requests.RequestException as e:
-        logger.error(f"Errore nella verifica del link Universal: {e}")
+    # Log della risposta
+    logger.debug(f"Risposta per il link Universal: {response['status']}")
+
+    # Controllo dello status code della risposta
+    if response["status"] == 200:
+        logger.info(f"Link Universal trovato: {universal_url}")
+        return universal_url
+    else:
+        logger.warning(f"Link Universal non trovato o non raggiungibile: Status Code {response['status']}")
         return None
 
 # Ottiene il link del server vanilla per la versione di Minecraft specificata
+@measured_stage("probe")
 def get_vanilla_link(game_version):
-    vanilla_url = f"http://www.multicraft.org/download/jar/?file=minecraft&version={game_version}&client=multicraft"
-    try:
-        # Richiesta HEAD per verificare il link
-        response = requests.head(vanilla_url, allow_redirects=True)
-        logger.debug(f"Richiesta HEAD inviata a {vanilla_url}")
-        
-        # Log della risposta
-        logger.debug(f"Risposta per il link Vanilla: {response.status_code}, URL: {response.url}")
-        
-        # Se lo status code è 200 o 302 (redirect), restituisce l'URL effettivo
-        if response.status_code in [200, 302]:
-            logger.info(f"Link Vanilla trovato: {response.url}")
-            return response.url
-        else:
-            logger.warning(f"Link Vanilla non trovato o non raggiungibile: Status Code {response.status_code}")
-            return None
-    except requests.RequestException as e:
-        logger.error(f"Errore nella verifica del link Vanilla: {e}")
+    vanilla_url = MULTICRAFT_VANILLA_URL.format(game_version=game_version)
+    # Richiesta HEAD per verificare il link (seguendo i redirect), tramite la cache delle risposte
+    response = cached_http_request(vanilla_url, method="HEAD", ttl=LINK_CHECK_TTL)
+    logger.debug(f"Richiesta HEAD inviata a {vanilla_url}")
+
+    if response is None:
+        logger.error(f"Errore nella verifica del link Vanilla: {vanilla_url}")
+        return None
+
+    # Log della risposta
+    logger.debug(f"Risposta per il link Vanilla: {response['status']}, URL: {response['final_url']}")
+
+    # Se lo status code è 200 o 302 (redirect), restituisce l'URL effettivo
+    if response["status"] in [200, 302]:
+        logger.info(f"Link Vanilla trovato: {response['final_url']}")
+        return response["final_url"]
+    else:
+        logger.warning(f"Link Vanilla non trovato o non raggiungibile: Status Code {response['status']}")
         return None
 
 # Scarica un file dall'URL specificato e lo salva in una directory temporanea
-def download_to_temp_folder(download_url, filename):
+def download_to_temp_folder(download_url, filename, cache_key=None, temp_dir_name=TEMP_DIR_NAME, resolve_link=None):
     """
     Scarica un file dall'URL specificato e lo salva in una directory temporanea con un nome specifico.
+    Se viene indicata una chiave di cache, il file viene prima cercato nella cache degli artefatti
+    e, dopo il download, salvato nella cache.
+    resolve_link è una funzione che ritorna il link del file: viene chiamata se il link non è noto
+    (es. l'artefatto risultava nella cache) e il file non può essere ripristinato dalla cache.
     Ritorna il percorso del file scaricato.
     """
     # Crea una directory temporanea con un nome specifico
-    temp_dir_name = "multicraft-forge-installer"
     system_temp_dir = tempfile.gettempdir()
     temp_dir = os.path.join(system_temp_dir, temp_dir_name)
 
@@ -205,28 +1360,40 @@ def download_to_temp_folder(download_url, filename):
 
     file_path = os.path.join(temp_dir, filename)
 
-    try:
-        response = requests.get(download_url)
-        response.raise_for_status()
-        logger.debug(f"Inizio download del file da {download_url}")
+    if cache_key and restore_cached_artifact(cache_key, file_path, allow_link=True):
+        return file_path
 
-        with open(file_path, 'wb') as file:
-            file.write(response.content)
+    # L'artefatto può essere stato rimosso dalla cache dopo la verifica dei link
+    if not download_url and resolve_link:
+        logger.info(f"{filename} non più disponibile nella cache, verifica del link")
+        download_url = resolve_link()
 
-        logger.info(f"Download completato: {file_path}")
-        return file_path
-    except requests.RequestException as e:
-        logger.error(f"Errore nel download del file da {download_url}: {e}")
+    if not download_url:
+        logger.error(f"Nessun link disponibile per scaricare {filename}")
         return None
 
+    logger.debug(f"Inizio download del file da {download_url}")
+    hashes = stream_download(download_url, file_path)
+    if hashes is None or not verify_downloaded_artifact(file_path, download_url):
+        return None
+
+    if cache_key:
+        store_artifact_in_cache(cache_key, file_path, hashes, allow_link=True)
+
+    return file_path
+
 # Scarica un file dall'URL specificato e lo salva nella directory target specificata
-def download_to_target_folder(download_url, filename, install_directory, game_version, forge_version):
+def download_to_target_folder(download_url, filename, install_directory, game_version, forge_version, cache_key=None, target_directory=None, resolve_link=None):
     """
     Scarica un file dall'URL specificato e lo salva nella directory target specificata.
+    Se viene indicata una chiave di cache, il file viene prima cercato nella cache degli artefatti
+    e, dopo il download, salvato nella cache.
+    target_directory sostituisce la directory dell'installazione (es. la directory di staging).
+    resolve_link è usata come in download_to_temp_folder.
     Ritorna il percorso del file scaricato.
     """
     # Costruisci il percorso della directory target
-    target_directory = os.path.join(install_directory, f"forge-{game_version}-{forge_version}")
+    target_directory = target_directory or os.path.join(install_directory, f"forge-{game_version}-{forge_version}")
     
     logger.debug(f"Preparazione download in: {target_directory}")
 
@@ -242,19 +1409,460 @@ def download_to_target_folder(download_url, filename, install_directory, game_ve
     # Percorso completo dove il file sarà salvato
     file_path = os.path.join(target_directory, filename)
 
+    # copy_contents_to_jar sostituisce il file invece di modificarlo, quindi può essere un hardlink alla cache
+    if cache_key and restore_cached_artifact(cache_key, file_path, allow_link=True):
+        return file_path
+
+    # L'artefatto può essere stato rimosso dalla cache dopo la verifica dei link
+    if not download_url and resolve_link:
+        logger.info(f"{filename} non più disponibile nella cache, verifica del link")
+        download_url = resolve_link()
+
+    if not download_url:
+        logger.error(f"Nessun link disponibile per scaricare {filename}")
+        return None
+
+    hashes = stream_download(download_url, file_path)
+    if hashes is None or not verify_downloaded_artifact(file_path, download_url):
+        return None
+
+    if cache_key:
+        store_artifact_in_cache(cache_key, file_path, hashes, allow_link=True)
+
+    return file_path
+
+# Legge il journal di un download parziale
+def read_download_journal(journal_path):
     try:
-        response = requests.get(download_url)
-        response.raise_for_status()
+        with open(journal_path, 'r') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Journal del download non leggibile ({journal_path}): {e}")
+        return None
 
-        with open(file_path, 'wb') as file:
-            file.write(response.content)
+# Salva il journal di un download parziale
+def write_download_journal(journal_path, journal):
+    try:
+        temp_path = f"{journal_path}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(journal, file)
+        os.replace(temp_path, journal_path)
+    except OSError as e:
+        logger.warning(f"Impossibile salvare il journal del download {journal_path}: {e}")
 
-        logger.info(f"Download completato: {file_path}")
-        return file_path
-    except requests.RequestException as e:
-        logger.error(f"Errore nel download del file da {download_url}: {e}")
+# Prepara la ripresa di un download parziale ricostruendo lo stato degli hash
+def prepare_download_resume(download_url, temp_path, journal_path, md5_obj, sha1_obj):
+    """
+    Controlla se esiste un download parziale (file '.part' e journal) per lo stesso URL.
+    Lo stato degli oggetti hash non può essere salvato su disco, quindi viene ricostruito
+    leggendo la parte già scaricata, fino all'ultimo punto registrato nel journal,
+    e confrontato con lo SHA1 registrato per escludere file '.part' danneggiati.
+    Ritorna il journal e il numero di byte da cui riprendere (0 se il download riparte da capo).
+    """
+    journal = read_download_journal(journal_path)
+    if not journal or journal.get("url") != download_url or not os.path.isfile(temp_path):
+        return None, 0
+
+    offset = journal["bytes"]
+    try:
+        if os.path.getsize(temp_path) < offset:
+            return None, 0
+        with open(temp_path, 'r+b') as file:
+            # I byte scritti dopo l'ultimo punto registrato vengono scartati e riscaricati
+            file.truncate(offset)
+            for chunk in iter(lambda: file.read(DOWNLOAD_CHUNK_SIZE), b""):
+                md5_obj.update(chunk)
+                sha1_obj.update(chunk)
+    except OSError as e:
+        logger.warning(f"Impossibile riprendere il download parziale {temp_path}: {e}")
+        return None, 0
+
+    if sha1_obj.hexdigest() != journal["sha1"]:
+        logger.warning(f"Download parziale {temp_path} danneggiato, il download riparte da capo")
+        return None, 0
+
+    logger.info(f"Ripresa del download di {download_url} da {offset} byte")
+    return journal, offset
+
+# Acquisisce in modo esclusivo il download verso un percorso di destinazione
+@contextlib.contextmanager
+def download_lock(file_path):
+    """
+    Serializza i download verso lo stesso file, sia tra i thread di questo processo sia tra
+    esecuzioni diverse dello script (tramite flock su un file '.part.lock' accanto alla destinazione),
+    così il file '.part' e il suo journal hanno sempre un solo scrittore.
+    Il file di lock viene rimosso al rilascio; chi era in attesa su un file ormai rimosso riprova.
+    """
+    with download_locks_lock:
+        path_lock = download_locks.setdefault(file_path, threading.Lock())
+    lock_path = f"{file_path}.part.lock"
+    with path_lock:
+        while True:
+            lock_file = open(lock_path, 'a')
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if os.fstat(lock_file.fileno()).st_ino == os.stat(lock_path).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            lock_file.close()
+        try:
+            yield
+        finally:
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+            lock_file.close()
+
+# Scarica un file in streaming su disco calcolando MD5 e SHA1 nello stesso passaggio
+@measured_stage("download")
+def stream_download(download_url, file_path, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """
+    Scarica un file a blocchi in un file temporaneo '.part' accanto alla destinazione,
+    aggiornando gli hash MD5 e SHA1 durante la scrittura, e lo rinomina atomicamente al termine.
+    La memoria occupata non dipende dalla dimensione del file.
+    Accanto al file '.part' viene mantenuto un journal ('.part.json') con i byte scaricati:
+    se la connessione si interrompe, il download riprende con una richiesta Range, sia nei
+    tentativi successivi sia in una nuova esecuzione dello script. Anche dopo un errore 5xx il
+    download parziale viene mantenuto e ripreso; viene scartato solo con un errore 4xx.
+    Ritorna un dizionario con gli hash calcolati oppure None in caso di errore.
+    """
+    try:
+        with download_lock(file_path):
+            return _stream_download(download_url, file_path, chunk_size)
+    except OSError as e:
+        logger.error(f"Impossibile acquisire il lock del download di {file_path}: {e}")
         return None
 
+def _stream_download(download_url, file_path, chunk_size):
+    temp_path = f"{file_path}.part"
+    journal_path = f"{temp_path}.json"
+
+    for attempt in range(1, DOWNLOAD_MAX_ATTEMPTS + 1):
+        md5_obj = hashlib.md5()
+        sha1_obj = hashlib.sha1()
+        journal, offset = prepare_download_resume(download_url, temp_path, journal_path, md5_obj, sha1_obj)
+        if offset == 0:
+            md5_obj = hashlib.md5()
+            sha1_obj = hashlib.sha1()
+
+        headers = {}
+        if offset:
+            count_metric("download_resumes")
+            headers["Range"] = f"bytes={offset}-"
+            # If-Range garantisce che la parte mancante appartenga alla stessa versione del file
+            if journal.get("etag") or journal.get("last_modified"):
+                headers["If-Range"] = journal.get("etag") or journal.get("last_modified")
+
+        try:
+            with get_http_session().get(download_url, stream=True, timeout=http_timeout(), headers=headers) as response:
+                if offset and response.status_code == 416:
+                    logger.warning(f"Intervallo non valido per {download_url}, il download riparte da capo")
+                    remove_partial_download(temp_path, journal_path)
+                    continue
+                response.raise_for_status()
+
+                if offset and response.status_code != 206:
+                    # Il server non supporta Range o il file è cambiato: si riparte da capo
+                    logger.info(f"Il server ha inviato il file completo per {download_url}, il download riparte da capo")
+                    offset = 0
+                    md5_obj = hashlib.md5()
+                    sha1_obj = hashlib.sha1()
+
+                journal = {
+                    "url": download_url,
+                    "etag": response.headers.get("ETag") or (journal or {}).get("etag"),
+                    "last_modified": response.headers.get("Last-Modified") or (journal or {}).get("last_modified"),
+                    "bytes": offset,
+                    "sha1": sha1_obj.hexdigest(),
+                }
+                write_download_journal(journal_path, journal)
+
+                with open(temp_path, 'ab' if offset else 'wb') as file:
+                    unjournaled_bytes = 0
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        if chunk:
+                            file.write(chunk)
+                            md5_obj.update(chunk)
+                            sha1_obj.update(chunk)
+                            count_metric("downloaded_bytes", len(chunk))
+                            journal["bytes"] += len(chunk)
+                            unjournaled_bytes += len(chunk)
+                            # Registra periodicamente un punto di ripresa
+                            if unjournaled_bytes >= DOWNLOAD_JOURNAL_INTERVAL:
+                                file.flush()
+                                journal["sha1"] = sha1_obj.hexdigest()
+                                write_download_journal(journal_path, journal)
+                                unjournaled_bytes = 0
+
+            os.replace(temp_path, file_path)
+            if os.path.exists(journal_path):
+                os.remove(journal_path)
+
+            stat_info = os.stat(file_path)
+            hashes = {
+                "md5": md5_obj.hexdigest(),
+                "sha1": sha1_obj.hexdigest(),
+                "size": stat_info.st_size,
+                "mtime_ns": stat_info.st_mtime_ns,
+            }
+            downloaded_hashes[file_path] = hashes
+            logger.info(f"Download completato: {file_path} ({hashes['size']} byte, SHA1 {hashes['sha1']})")
+            return hashes
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status is None or status < 500:
+                # Errore definitivo (es. 404): il download parziale non potrà essere completato
+                logger.error(f"Errore nel download del file da {download_url}: {e}")
+                remove_partial_download(temp_path, journal_path)
+                return None
+            # Errore temporaneo del server: il download parziale resta valido e viene ripreso
+            logger.warning(f"Errore del server nel download di {download_url} (tentativo {attempt}/{DOWNLOAD_MAX_ATTEMPTS}): {e}")
+            if attempt < DOWNLOAD_MAX_ATTEMPTS:
+                time.sleep(HTTP_BACKOFF_FACTOR * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+        except requests.RequestException as e:
+            # Connessione interrotta: registra quanto scaricato e riprova dal punto raggiunto
+            if journal and os.path.isfile(temp_path):
+                journal["bytes"] = min(journal["bytes"], os.path.getsize(temp_path))
+                journal["sha1"] = sha1_obj.hexdigest() if journal["bytes"] == os.path.getsize(temp_path) else journal["sha1"]
+                write_download_journal(journal_path, journal)
+            logger.warning(f"Download di {download_url} interrotto (tentativo {attempt}/{DOWNLOAD_MAX_ATTEMPTS}): {e}")
+            if attempt < DOWNLOAD_MAX_ATTEMPTS:
+                time.sleep(HTTP_BACKOFF_FACTOR * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+        except OSError as e:
+            logger.error(f"Errore nella scrittura del file {file_path}: {e}")
+            return None
+
+    logger.error(f"Errore nel download del file da {download_url}: tentativi esauriti, il download parziale verrà ripreso alla prossima esecuzione")
+    return None
+
+# Rimuove il file parziale e il journal di un download
+def remove_partial_download(temp_path, journal_path):
+    for path in (temp_path, journal_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+# Ottiene gli hash MD5 e SHA1 di un file, riusando quelli calcolati durante il download
+def get_file_hashes(file_path):
+    """
+    Ritorna gli hash MD5 e SHA1 di un file.
+    Se il file è stato scaricato con stream_download e non è stato modificato da allora,
+    usa gli hash calcolati durante il download senza rileggere il file.
+    """
+    try:
+        stat_info = os.stat(file_path)
+    except OSError as e:
+        logger.error(f"Errore nella lettura delle informazioni del file {file_path}: {e}")
+        return None, None
+
+    hashes = downloaded_hashes.get(file_path)
+    if hashes and hashes["size"] == stat_info.st_size and hashes["mtime_ns"] == stat_info.st_mtime_ns:
+        logger.debug("Hash di %s già calcolati durante il download", file_path)
+        return hashes["md5"], hashes["sha1"]
+
+    # Calcola entrambi gli hash con una sola lettura del file
+    try:
+        md5_obj = hashlib.md5()
+        sha1_obj = hashlib.sha1()
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(DOWNLOAD_CHUNK_SIZE), b""):
+                md5_obj.update(chunk)
+                sha1_obj.update(chunk)
+        return md5_obj.hexdigest(), sha1_obj.hexdigest()
+    except OSError as e:
+        logger.error(f"Errore nel calcolo degli hash del file {file_path}: {e}")
+        return None, None
+
+# Costruisce la chiave di un artefatto nella cache (es. forge/<mc>/<forge>/installer)
+def artifact_cache_key(*parts):
+    """
+    Costruisce la chiave di cache di un artefatto a partire dalle sue coordinate
+    (versione di gioco, versione di Forge, classificatore).
+    """
+    return "/".join(str(part) for part in parts)
+
+# Carica l'indice della cache degli artefatti
+def load_artifact_cache_index():
+    """
+    Carica l'indice della cache degli artefatti, che associa ogni chiave allo SHA1 del contenuto.
+    Ritorna un dizionario vuoto se l'indice non esiste o non è leggibile.
+    """
+    index_path = os.path.join(ARTIFACT_CACHE_DIRECTORY, "index.json")
+    try:
+        with open(index_path, 'r') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Indice della cache degli artefatti non leggibile ({index_path}): {e}")
+        return {}
+
+# Salva l'indice della cache degli artefatti
+def save_artifact_cache_index(index):
+    """
+    Salva l'indice della cache degli artefatti scrivendo un file temporaneo e rinominandolo.
+    """
+    index_path = os.path.join(ARTIFACT_CACHE_DIRECTORY, "index.json")
+    temp_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'w') as file:
+            json.dump(index, file, indent=1, sort_keys=True)
+        os.replace(temp_path, index_path)
+    except OSError as e:
+        logger.warning(f"Impossibile salvare l'indice della cache degli artefatti: {e}")
+
+# Ritorna il percorso del contenuto di un artefatto nella cache a partire dal suo SHA1
+def artifact_blob_path(sha1):
+    return os.path.join(ARTIFACT_CACHE_DIRECTORY, "blobs", sha1[:2], sha1)
+
+# Collega o copia un file, usando un hardlink quando consentito
+def link_or_copy_file(source_path, target_path, allow_link):
+    """
+    Crea target_path a partire da source_path, tramite hardlink se consentito e possibile,
+    altrimenti con una copia. Il file di destinazione viene sostituito atomicamente.
+    """
+    temp_path = f"{target_path}.{os.getpid()}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    if allow_link:
+        try:
+            os.link(source_path, temp_path)
+            os.replace(temp_path, target_path)
+            return
+        except OSError:
+            logger.debug("Hardlink non possibile da %s, uso una copia", source_path)
+    shutil.copyfile(source_path, temp_path)
+    os.replace(temp_path, target_path)
+
+# Controlla se un artefatto è presente nella cache
+def is_artifact_cached(cache_key):
+    with artifact_cache_lock:
+        entry = load_artifact_cache_index().get(cache_key)
+    return bool(entry) and os.path.isfile(artifact_blob_path(entry["sha1"]))
+
+# Ripristina un artefatto dalla cache nel percorso indicato
+def restore_cached_artifact(cache_key, file_path, allow_link=True):
+    """
+    Cerca l'artefatto nella cache e, se presente, lo collega o lo copia in file_path.
+    Gli hash dell'artefatto vengono registrati in modo che la verifica non debba rileggere il file.
+    Ritorna True se l'artefatto è stato ripristinato dalla cache.
+    """
+    with artifact_cache_lock:
+        return _restore_cached_artifact(cache_key, file_path, allow_link)
+
+def _restore_cached_artifact(cache_key, file_path, allow_link):
+    index = load_artifact_cache_index()
+    entry = index.get(cache_key)
+    if not entry:
+        logger.debug("Artefatto %s non presente nella cache", cache_key)
+        count_metric("artifact_cache_requests", result="miss")
+        return False
+
+    blob_path = artifact_blob_path(entry["sha1"])
+    try:
+        if os.path.getsize(blob_path) != entry["size"]:
+            logger.warning(f"Artefatto {cache_key} nella cache danneggiato, verrà scaricato di nuovo")
+            os.remove(blob_path)
+            return False
+        link_or_copy_file(blob_path, file_path, allow_link)
+    except OSError as e:
+        logger.warning(f"Impossibile ripristinare l'artefatto {cache_key} dalla cache: {e}")
+        return False
+
+    stat_info = os.stat(file_path)
+    downloaded_hashes[file_path] = {
+        "md5": entry["md5"],
+        "sha1": entry["sha1"],
+        "size": stat_info.st_size,
+        "mtime_ns": stat_info.st_mtime_ns,
+    }
+
+    entry["last_used"] = time.time()
+    save_artifact_cache_index(index)
+    count_metric("artifact_cache_requests", result="hit")
+    logger.info(f"Artefatto {cache_key} recuperato dalla cache: {file_path}")
+    return True
+
+# Salva un file scaricato nella cache degli artefatti
+def store_artifact_in_cache(cache_key, file_path, hashes, allow_link=True):
+    """
+    Salva il file nella cache degli artefatti, indirizzato per SHA1, e aggiorna l'indice.
+    Se la cache supera la dimensione massima vengono rimossi gli artefatti usati meno di recente.
+    """
+    with artifact_cache_lock:
+        return _store_artifact_in_cache(cache_key, file_path, hashes, allow_link)
+
+def _store_artifact_in_cache(cache_key, file_path, hashes, allow_link):
+    blob_path = artifact_blob_path(hashes["sha1"])
+    try:
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        if not os.path.isfile(blob_path):
+            link_or_copy_file(file_path, blob_path, allow_link)
+    except OSError as e:
+        logger.warning(f"Impossibile salvare l'artefatto {cache_key} nella cache: {e}")
+        return False
+
+    index = load_artifact_cache_index()
+    previous = index.get(cache_key)
+    index[cache_key] = {
+        "sha1": hashes["sha1"],
+        "md5": hashes["md5"],
+        "size": hashes["size"],
+        "last_used": time.time(),
+    }
+    # Il contenuto sostituito viene rimosso se nessun'altra chiave lo usa
+    if previous and previous["sha1"] != hashes["sha1"] and all(entry["sha1"] != previous["sha1"] for entry in index.values()):
+        try:
+            os.remove(artifact_blob_path(previous["sha1"]))
+        except OSError:
+            pass
+    evict_artifact_cache(index)
+    save_artifact_cache_index(index)
+    logger.info(f"Artefatto {cache_key} salvato nella cache")
+    return True
+
+# Rimuove dalla cache gli artefatti usati meno di recente finché non si rientra nella dimensione massima
+def evict_artifact_cache(index, max_bytes=None):
+    """
+    Applica il limite di dimensione alla cache degli artefatti con politica LRU.
+    Modifica l'indice passato e rimuove dal disco i contenuti delle chiavi eliminate che non
+    sono più referenziati. Se la cache rientra già nel limite non viene eseguito alcun lavoro.
+    """
+    max_bytes = ARTIFACT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    # Dimensione totale contando una sola volta i contenuti condivisi da più chiavi
+    references = {}
+    sizes = {}
+    for entry in index.values():
+        references[entry["sha1"]] = references.get(entry["sha1"], 0) + 1
+        sizes[entry["sha1"]] = entry["size"]
+    total_size = sum(sizes.values())
+    if total_size <= max_bytes:
+        return
+
+    removed_sha1s = []
+    for cache_key, entry in sorted(index.items(), key=lambda item: item[1]["last_used"]):
+        if total_size <= max_bytes:
+            break
+        del index[cache_key]
+        logger.info(f"Artefatto {cache_key} rimosso dalla cache (limite di {max_bytes} byte)")
+        references[entry["sha1"]] -= 1
+        if not references[entry["sha1"]]:
+            total_size -= sizes[entry["sha1"]]
+            removed_sha1s.append(entry["sha1"])
+
+    # Rimuove solo i contenuti delle chiavi appena eliminate che nessun'altra chiave referenzia
+    for sha1 in removed_sha1s:
+        blob_path = artifact_blob_path(sha1)
+        try:
+            if os.path.exists(blob_path):
+                os.remove(blob_path)
+        except OSError as e:
+            logger.warning(f"Impossibile rimuovere {sha1} dalla cache: {e}")
+
 # Calcola l'hash di un file
 def calculate_file_hash(file_path, hash_type):
     """
@@ -266,7 +1874,7 @@ def calculate_file_hash(file_path, hash_type):
     try:
         hash_obj = hashlib.new(hash_type)
         with open(file_path, 'rb') as file:
-            for chunk in iter(lambda: file.read(4096), b""):
+            for chunk in iter(lambda: file.read(DOWNLOAD_CHUNK_SIZE), b""):
                 hash_obj.update(chunk)
 
         hash_value = hash_obj.hexdigest()
@@ -279,26 +1887,14 @@ def calculate_file_hash(file_path, hash_type):
 # Estrae gli hash MD5 e SHA1 dal contenuto HTML della pagina di download
 def extract_hashes(html_content, installer_url):
     logger.debug(f"Inizio estrazione degli hash da {installer_url}")
-    soup = BeautifulSoup(html_content, 'html.parser')
-    links = soup.find_all('a', href=True)
-
-    for link in links:
-        if installer_url in link['href']:
-            info_div = link.find_next_sibling("div", class_="info-tooltip")
-            if info_div:
-                md5 = sha1 = None
-                for line in info_div.get_text().split("\n"):
-                    if "MD5:" in line:
-                        md5 = line.split("MD5:")[1].strip()
-                    elif "SHA1:" in line:
-                        sha1 = line.split("SHA1:")[1].strip()
-                if md5 and sha1:
-                    logger.info(f"Estratti hash MD5: {md5} e SHA1: {sha1} per {installer_url}")
-                else:
-                    logger.warning(f"Non sono stati trovati hash MD5 o SHA1 validi per {installer_url}")
-                return md5, sha1
+    # La pagina viene analizzata una sola volta anche se si cercano gli hash di più artefatti
+    for link, md5, sha1 in parse_forge_page(html_content)["hashes"]:
+        if installer_url in link:
+            if md5 and sha1:
+                logger.info(f"Estratti hash MD5: {md5} e SHA1: {sha1} per {installer_url}")
             else:
-                logger.warning(f"Nessun div di informazioni trovato accanto al link per {installer_url}")
+                logger.warning(f"Non sono stati trovati hash MD5 o SHA1 validi per {installer_url}")
+            return md5, sha1
     logger.error(f"Hash MD5 e SHA1 non trovati per {installer_url}")
     return None, None
 
@@ -306,12 +1902,14 @@ def extract_hashes(html_content, installer_url):
 def verify_file_hash(file_path, expected_md5, expected_sha1):
     """
     Verifica che gli hash MD5 e SHA1 del file corrispondano ai valori attesi.
+    Un valore atteso None non viene controllato, ma almeno uno dei due deve essere indicato.
     """
     try:
-        md5_hash = calculate_file_hash(file_path, "md5")
-        sha1_hash = calculate_file_hash(file_path, "sha1")
+        md5_hash, sha1_hash = get_file_hashes(file_path)
 
-        if md5_hash == expected_md5 and sha1_hash == expected_sha1:
+        md5_ok = expected_md5 is None or md5_hash == expected_md5.lower()
+        sha1_ok = expected_sha1 is None or sha1_hash == expected_sha1.lower()
+        if (expected_md5 or expected_sha1) and md5_ok and sha1_ok:
             logger.info(f"Verifica hash per {file_path} riuscita: MD5 e SHA1 corrispondono.")
             return True
         else:
@@ -321,6 +1919,74 @@ def verify_file_hash(file_path, expected_md5, expected_sha1):
         logger.error(f"Errore nella verifica degli hash del file {file_path}: {e}")
         return False
 
+# Ottiene gli hash attesi di un artefatto Maven dai file .md5 e .sha1 pubblicati accanto ad esso
+def get_expected_hashes(artifact_url):
+    """
+    Legge gli hash attesi di un artefatto dai file '<artefatto>.md5' e '<artefatto>.sha1'
+    del repository Maven, tramite la cache HTTP persistente (gli artefatti pubblicati non cambiano).
+    Un hash è considerato non pubblicato solo se il server risponde 404; per URL esterni al
+    repository Maven di Forge non esistono file di checksum e viene ritornato (None, None).
+    Se un file di checksum non può essere letto (server non raggiungibile, errore del server o
+    contenuto non valido) viene ritornato None e il risultato non viene memorizzato, così una
+    richiesta successiva riprova. I risultati validi vengono mantenuti anche in memoria.
+    """
+    if not artifact_url.startswith(FORGE_MAVEN_URL):
+        return None, None
+
+    if artifact_url in expected_hashes_cache:
+        return expected_hashes_cache[artifact_url]
+
+    expected = []
+    for extension, length in (("md5", 32), ("sha1", 40)):
+        checksum_url = f"{artifact_url}.{extension}"
+        entry = cached_http_request(checksum_url, ttl=CHECKSUM_TTL)
+        if entry and entry["status"] == 404:
+            expected.append(None)
+            continue
+        if entry is None or entry["status"] != 200:
+            status = entry["status"] if entry else "nessuna risposta"
+            logger.error(f"Impossibile leggere il file di checksum {checksum_url}: {status}")
+            return None
+        # Il file contiene l'hash, eventualmente seguito dal nome del file
+        tokens = http_entry_text(entry).split()
+        if not tokens or not re.fullmatch(f"[0-9a-fA-F]{{{length}}}", tokens[0]):
+            logger.error(f"File di checksum {checksum_url} non valido")
+            return None
+        expected.append(tokens[0].lower())
+
+    expected_hashes_cache[artifact_url] = tuple(expected)
+    logger.debug(f"Hash attesi per {artifact_url}: MD5={expected[0]}, SHA1={expected[1]}")
+    return expected_hashes_cache[artifact_url]
+
+# Verifica un artefatto appena scaricato confrontando gli hash calcolati durante il download con quelli pubblicati
+@measured_stage("verify")
+def verify_downloaded_artifact(file_path, download_url):
+    """
+    Confronta gli hash calcolati durante il download con quelli pubblicati nei file di checksum Maven.
+    Se gli hash non corrispondono il file viene eliminato e l'installazione non deve proseguire.
+    La verifica viene saltata solo se i file di checksum non sono pubblicati (404); se non è
+    possibile leggerli il file non viene considerato verificato.
+    Ritorna False in caso di hash non corrispondenti o non verificabili.
+    """
+    expected = get_expected_hashes(download_url)
+    if expected is None:
+        logger.error(f"Impossibile verificare il file scaricato da {download_url}: hash pubblicati non disponibili")
+        return False
+    expected_md5, expected_sha1 = expected
+    if not (expected_md5 or expected_sha1):
+        logger.debug(f"Nessun file di checksum per {download_url}, verifica saltata")
+        return True
+
+    if verify_file_hash(file_path, expected_md5, expected_sha1):
+        return True
+
+    logger.error(f"Il file scaricato da {download_url} non corrisponde agli hash pubblicati e verrà eliminato")
+    try:
+        os.remove(file_path)
+    except OSError as e:
+        logger.error(f"Errore nella rimozione del file {file_path}: {e}")
+    return False
+
 # Crea una directory se non esiste già
 def create_directory_if_not_exists(directory):
     """
@@ -335,159 +2001,1102 @@ def create_directory_if_not_exists(directory):
     except OSError as e:
         logger.error(f"Errore nella creazione della directory {directory}: {e}")
 
-# Estrae il contenuto di forge-universal.zip e lo copia in server.jar
+# Copia una voce da un archivio ZIP a un altro senza decomprimerla e ricomprimerla
+def copy_zip_entry_raw(source_zip, info, target_zip):
+    """
+    Copia i dati compressi di una voce di source_zip in target_zip così come sono,
+    scrivendo un nuovo header locale con CRC e dimensioni già noti.
+    zipfile non offre un'API pubblica per questa operazione, quindi vengono aggiornate
+    le stesse strutture interne che aggiorna ZipFile.write.
+    Per voci cifrate o che richiedono ZIP64 la voce viene decompressa e ricompressa.
+    """
+    if info.flag_bits & 0x01 or info.file_size >= zipfile.ZIP64_LIMIT or info.compress_size >= zipfile.ZIP64_LIMIT:
+        target_zip.writestr(info, source_zip.read(info), compress_type=info.compress_type)
+        return
+
+    # Legge l'header locale per trovare l'inizio dei dati compressi
+    source_zip.fp.seek(info.header_offset)
+    local_header = source_zip.fp.read(30)
+    name_length, extra_length = struct.unpack("<HH", local_header[26:30])
+    source_zip.fp.seek(info.header_offset + 30 + name_length + extra_length)
+    raw_data = source_zip.fp.read(info.compress_size)
+
+    new_info = copy.copy(info)
+    # Le dimensioni vengono scritte nell'header locale, quindi il data descriptor non serve
+    new_info.flag_bits &= ~0x08
+    new_info.header_offset = target_zip.fp.tell()
+    target_zip.fp.write(new_info.FileHeader(False))
+    target_zip.fp.write(raw_data)
+
+    target_zip.filelist.append(new_info)
+    target_zip.NameToInfo[new_info.filename] = new_info
+    target_zip.start_dir = target_zip.fp.tell()
+    target_zip._didModify = True
+
+# Controlla se una voce di META-INF è una firma del jar, che non è più valida dopo la modifica
+def is_jar_signature_entry(name):
+    upper_name = name.upper()
+    return upper_name.startswith("META-INF/") and upper_name.endswith((".SF", ".RSA", ".DSA", ".EC"))
+
+# Costruisce server.jar unendo forge-universal.zip e il server vanilla senza estrarli su disco
+@measured_stage("merge")
 def copy_contents_to_jar(zip_path, jar_path, exclude_dir="META-INF"):
-    logger.debug(f"Inizio dell'estrazione e della copia del contenuto di {zip_path} in {jar_path}")
+    """
+    Crea un nuovo server.jar copiando direttamente le voci degli archivi:
+    prima quelle di forge-universal.zip (esclusa la cartella exclude_dir), che sostituiscono
+    le classi vanilla con lo stesso nome, poi le restanti voci del server vanilla, escluse
+    le firme in META-INF che non sarebbero più valide (il MANIFEST.MF vanilla viene mantenuto
+    perché contiene la Main-Class). I dati già compressi vengono copiati senza ricompressione.
+    Il nuovo jar sostituisce atomicamente quello esistente. Ritorna True in caso di successo.
+    """
+    logger.debug(f"Inizio della copia del contenuto di {zip_path} in {jar_path}")
+    temp_jar_path = f"{jar_path}.tmp"
+    excluded_prefix = exclude_dir.strip("/") + "/"
 
-    # Estrai il contenuto di forge-universal.zip
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall("temp_universal")
-            logger.info(f"Contenuto di {zip_path} estratto in una directory temporanea")
-    except zipfile.BadZipFile as e:
-        logger.error(f"Errore nell'apertura di {zip_path} come archivio ZIP: {e}")
-        return
+        with zipfile.ZipFile(zip_path, 'r') as universal_zip, \
+                zipfile.ZipFile(jar_path, 'r') as vanilla_zip, \
+                zipfile.ZipFile(temp_jar_path, 'w') as target_zip:
+            written_names = set()
+
+            for info in universal_zip.infolist():
+                if info.filename.startswith(excluded_prefix) or info.filename in written_names:
+                    continue
+                copy_zip_entry_raw(universal_zip, info, target_zip)
+                written_names.add(info.filename)
+            logger.debug(f"{len(written_names)} voci copiate da {zip_path}")
+
+            vanilla_count = 0
+            for info in vanilla_zip.infolist():
+                if info.filename in written_names or is_jar_signature_entry(info.filename):
+                    continue
+                copy_zip_entry_raw(vanilla_zip, info, target_zip)
+                written_names.add(info.filename)
+                vanilla_count += 1
+            logger.debug(f"{vanilla_count} voci mantenute dal server vanilla")
+
+        os.replace(temp_jar_path, jar_path)
+        logger.info(f"Contenuto di {zip_path} copiato con successo in {jar_path}")
+        return True
+    except (zipfile.BadZipFile, OSError) as e:
+        logger.error(f"Errore nella creazione di {jar_path} da {zip_path}: {e}")
+        if os.path.exists(temp_jar_path):
+            os.remove(temp_jar_path)
+        return False
 
-    # Apri server.jar come archivio ZIP
-    try:
-        with zipfile.ZipFile(jar_path, 'a') as jar_zip:
-            # Percorri i file nella directory temporanea
-            for foldername, subfolders, filenames in os.walk("temp_universal"):
-                for filename in filenames:
-                    # Assicurati di non includere i file nella cartella esclusa
-                    if exclude_dir not in foldername:
-                        file_path = os.path.join(foldername, filename)
-                        jar_zip.write(file_path, os.path.relpath(file_path, "temp_universal"))
-                        logger.debug(f"File {file_path} aggiunto a {jar_path}")
-            logger.info(f"Contenuto di {zip_path} copiato con successo in {jar_path}")
-    except zipfile.BadZipFile as e:
-        logger.error(f"Errore nell'apertura di {jar_path} come archivio ZIP: {e}")
-        return
+# Converte coordinate Maven (group:artifact:version[:classifier][@ext]) nel percorso relativo del file
+def maven_path_from_name(name):
+    coordinates, _, extension = name.partition("@")
+    parts = coordinates.split(":")
+    group, artifact, artifact_version = parts[0], parts[1], parts[2]
+    classifier = f"-{parts[3]}" if len(parts) > 3 else ""
+    return f"{group.replace('.', '/')}/{artifact}/{artifact_version}/{artifact}-{artifact_version}{classifier}.{extension or 'jar'}"
+
+# Legge dall'installer di Forge l'elenco delle librerie necessarie all'installazione del server
+def read_installer_libraries(installer_path):
+    """
+    Legge install_profile.json e version.json dall'installer e ritorna la lista delle librerie
+    come dizionari {path, url, sha1, size}, con path relativo alla directory libraries.
+    Sono inclusi anche gli output dei processori (es. il server patchato) di cui
+    install_profile.json indica lo SHA1 atteso: non si possono scaricare, ma se sono già
+    disponibili localmente l'installer non deve rieseguire i processori.
+    Supporta sia il formato attuale (1.12.2+) sia quello legacy con 'versionInfo'.
+    """
+    libraries = {}
+
+    def add_library(path, url, sha1, size=None):
+        if path not in libraries or (sha1 and not libraries[path]["sha1"]):
+            libraries[path] = {"path": path, "url": url or None, "sha1": sha1, "size": size}
 
-    # Pulisci eliminando la directory temporanea
     try:
-        shutil.rmtree("temp_universal")
-        logger.debug("Directory temporanea 'temp_universal' rimossa")
+        with zipfile.ZipFile(installer_path, 'r') as installer_zip:
+            names = set(installer_zip.namelist())
+            documents = [json.loads(installer_zip.read(name)) for name in ("install_profile.json", "version.json") if name in names]
+    except (zipfile.BadZipFile, OSError, ValueError) as e:
+        logger.warning(f"Impossibile leggere le librerie dall'installer {installer_path}: {e}")
+        return []
+
+    for document in documents:
+        if "versionInfo" in document:
+            # Formato legacy: coordinate Maven e URL del repository, senza percorsi
+            for library in document["versionInfo"].get("libraries", []):
+                if not library.get("serverreq", False):
+                    continue
+                path = maven_path_from_name(library["name"])
+                base_url = library.get("url") or MINECRAFT_LIBRARIES_URL
+                checksums = library.get("checksums") or [None]
+                add_library(path, base_url.rstrip("/") + "/" + path, checksums[0])
+            continue
+
+        for library in document.get("libraries", []):
+            artifact = library.get("downloads", {}).get("artifact")
+            if artifact and artifact.get("path"):
+                add_library(artifact["path"], artifact.get("url"), artifact.get("sha1"), artifact.get("size"))
+
+        # Output dei processori con SHA1 noto (es. PATCHED e PATCHED_SHA)
+        data = document.get("data", {})
+        for key, value in data.items():
+            sha_entry = data.get(f"{key}_SHA", {}).get("server", "")
+            server_value = value.get("server", "") if isinstance(value, dict) else ""
+            if sha_entry and server_value.startswith("[") and server_value.endswith("]"):
+                add_library(maven_path_from_name(server_value[1:-1]), None, sha_entry.strip("'"))
+
+    logger.debug(f"Librerie lette dall'installer {installer_path}: {len(libraries)}")
+    return list(libraries.values())
+
+# Controlla se un file locale corrisponde a una libreria (dimensione e SHA1, quando noti)
+def library_file_matches(file_path, library):
+    try:
+        if library["size"] is not None and os.path.getsize(file_path) != library["size"]:
+            return False
+        return library["sha1"] is None or file_sha1(file_path) == library["sha1"]
+    except OSError:
+        return False
+
+# Scarica in parallelo nel mirror locale le librerie mancanti
+@measured_stage("libraries")
+def prefetch_maven_libraries(libraries, mirror_directory=None, max_workers=MAVEN_PREFETCH_WORKERS):
+    """
+    Scarica nel mirror locale (struttura Maven) le librerie con URL e SHA1 noti che non sono
+    ancora presenti, in parallelo e tramite la sessione HTTP condivisa. Ogni file scaricato
+    viene verificato con lo SHA1 indicato dall'installer. Ritorna il numero di librerie scaricate.
+    """
+    mirror_directory = mirror_directory or MAVEN_MIRROR_DIRECTORY
+    missing = [library for library in libraries
+               if library["url"] and library["sha1"]
+               and not os.path.isfile(os.path.join(mirror_directory, library["path"]))]
+    if not missing:
+        return 0
+
+    def fetch(library):
+        target_path = os.path.join(mirror_directory, library["path"])
+        try:
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        except OSError as e:
+            logger.warning(f"Impossibile creare la directory del mirror per {library['path']}: {e}")
+            return False
+        try:
+            with download_lock(target_path), metrics_stage("download"):
+                # Un'altra installazione potrebbe aver scaricato la libreria durante l'attesa del lock
+                if library_file_matches(target_path, library):
+                    return False
+                hashes = _stream_download(library["url"], target_path, DOWNLOAD_CHUNK_SIZE)
+                if hashes is None:
+                    return False
+                if hashes["sha1"] != library["sha1"]:
+                    logger.error(f"SHA1 non corrispondente per la libreria {library['path']}, rimossa dal mirror")
+                    os.remove(target_path)
+                    return False
+        except OSError as e:
+            logger.warning(f"Impossibile scaricare la libreria {library['path']} nel mirror: {e}")
+            return False
+        return True
+
+    logger.info(f"Download di {len(missing)} librerie nel mirror locale {mirror_directory}")
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        downloaded = sum(executor.map(fetch, missing))
+    count_metric("libraries_prefetched", downloaded)
+    logger.info(f"Librerie scaricate nel mirror locale: {downloaded}/{len(missing)}")
+    return downloaded
+
+# Prepara la directory libraries dell'installazione con le librerie già disponibili localmente
+def seed_install_libraries(libraries, target_libraries_directory, source_directories):
+    """
+    Collega (hardlink, o copia se non possibile) nella directory libraries dell'installazione
+    le librerie già presenti in una delle source_directories con lo SHA1 atteso.
+    L'installer di Forge trova i file con checksum corretto e non li scarica di nuovo, e
+    salta i processori i cui output sono già presenti e corretti.
+    Vengono collegati solo file verificati, così l'installer non ha motivo di riscriverli.
+    Ritorna il numero di librerie collegate.
+    """
+    seeded = 0
+    for library in libraries:
+        if not library["sha1"]:
+            continue
+        target_path = os.path.join(target_libraries_directory, library["path"])
+        if os.path.exists(target_path):
+            continue
+        for source_directory in source_directories:
+            source_path = os.path.join(source_directory, library["path"])
+            if os.path.isfile(source_path) and library_file_matches(source_path, library):
+                try:
+                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                    link_or_copy_file(source_path, target_path, allow_link=True)
+                    seeded += 1
+                except OSError as e:
+                    logger.warning(f"Impossibile collegare la libreria {library['path']}: {e}")
+                break
+
+    count_metric("libraries_seeded", seeded)
+    logger.info(f"Librerie già disponibili collegate in {target_libraries_directory}: {seeded}/{len(libraries)}")
+    return seeded
+
+# Aggiunge al mirror locale le librerie scaricate o generate dall'installer
+def harvest_installed_libraries(libraries, libraries_directory, mirror_directory=None):
+    """
+    Dopo l'installazione, collega nel mirror locale le librerie presenti nell'installazione
+    con lo SHA1 atteso ma non ancora nel mirror (es. output dei processori o librerie senza URL),
+    così le installazioni successive di build correlate non devono rigenerarle.
+    """
+    mirror_directory = mirror_directory or MAVEN_MIRROR_DIRECTORY
+    harvested = 0
+    for library in libraries:
+        mirror_path = os.path.join(mirror_directory, library["path"])
+        installed_path = os.path.join(libraries_directory, library["path"])
+        if not library["sha1"] or os.path.exists(mirror_path) or not os.path.isfile(installed_path):
+            continue
+        if not library_file_matches(installed_path, library):
+            continue
+        try:
+            os.makedirs(os.path.dirname(mirror_path), exist_ok=True)
+            # I file creati dall'installer eseguito come altro utente vengono copiati, così il mirror
+            # non contiene file modificabili da quell'utente
+            own_file = os.stat(installed_path).st_uid == os.geteuid()
+            link_or_copy_file(installed_path, mirror_path, allow_link=own_file)
+            harvested += 1
+        except OSError as e:
+            logger.debug("Impossibile aggiungere %s al mirror locale: %s", library['path'], e)
+    if harvested:
+        logger.info(f"Librerie aggiunte al mirror locale: {harvested}")
+    return harvested
+
+# Elenca le directory libraries delle installazioni esistenti della stessa versione di Minecraft
+def installed_libraries_directories(install_directory, game_version, forge_version):
+    """
+    Ritorna le directory libraries di forge-<mc>-*, con per prima quella della stessa build
+    (reinstallazione) e poi le altre build dalla più recente: sono le sorgenti da cui
+    collegare le librerie invariate in caso di aggiornamento.
+    """
+    install_name = f"forge-{game_version}-{forge_version}"
+    prefix = f"forge-{game_version}-"
+    candidates = []
+    try:
+        with os.scandir(install_directory) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefix) and entry.is_dir(follow_symlinks=False):
+                    libraries_directory = os.path.join(entry.path, "libraries")
+                    if os.path.isdir(libraries_directory):
+                        candidates.append((entry.name == install_name, version_sort_key(entry.name[len(prefix):]), libraries_directory))
+    except OSError as e:
+        logger.debug(f"Impossibile elencare le installazioni in {install_directory}: {e}")
+    return [directory for _, _, directory in sorted(candidates, reverse=True)]
+
+# Controlla se un processo è ancora in esecuzione
+def process_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+# Rimuove le directory di staging lasciate da esecuzioni interrotte
+def remove_stale_staging_directories(install_directory, install_name=None):
+    """
+    Rimuove le directory .staging e .previous dei processi non più in esecuzione, solo per
+    install_name se indicato. Un'installazione rimasta in una directory .previous viene invece
+    rimessa al suo posto se manca quella finale.
+    Ritorna il numero di directory rimosse o ripristinate.
+    """
+    stale = []
+    with os.scandir(install_directory) as entries:
+        for entry in entries:
+            match = re.fullmatch(r"\.(forge-.+)\.(\d+)-\d+(\.staging|\.previous)", entry.name)
+            if match and install_name in (None, match.group(1)) and not process_alive(int(match.group(2))):
+                stale.append((entry.path, match.group(1), match.group(3)))
+
+    for path, name, suffix in stale:
+        target_directory = os.path.join(install_directory, name)
+        if suffix == PREVIOUS_SUFFIX and not os.path.lexists(target_directory):
+            logger.warning(f"Ripristino dell'installazione lasciata da un'esecuzione interrotta: {path}")
+            os.rename(path, target_directory)
+        else:
+            logger.warning(f"Rimozione della directory di un'installazione interrotta: {path}")
+            shutil.rmtree(path, ignore_errors=True)
+    return len(stale)
+
+# Crea la directory, accanto a quella finale, in cui viene preparata un'installazione
+def create_staging_directory(install_directory, install_name):
+    """
+    La directory di staging si trova nella daemon jar directory, quindi sullo stesso filesystem
+    di quella finale, e viene pubblicata con una rinomina. Il nome inizia con un punto, quindi
+    Multicraft non la considera. Le directory lasciate da esecuzioni interrotte vengono rimosse.
+    Ritorna il percorso della directory oppure None in caso di errore.
+    """
+    try:
+        remove_stale_staging_directories(install_directory, install_name)
+        staging_directory = os.path.join(install_directory, f".{install_name}.{os.getpid()}-{next(staging_counter)}{STAGING_SUFFIX}")
+        os.makedirs(staging_directory)
+        logger.debug(f"Directory di staging creata: {staging_directory}")
+        return staging_directory
     except OSError as e:
-        logger.error(f"Errore nella rimozione della directory temporanea 'temp_universal': {e}")
+        logger.error(f"Impossibile creare la directory di staging per {install_name} in {install_directory}: {e}")
+        return None
+
+# Elimina una directory di staging
+def remove_staging_directory(staging_directory):
+    if staging_directory and os.path.isdir(staging_directory):
+        shutil.rmtree(staging_directory, ignore_errors=True)
+        logger.debug(f"Directory di staging rimossa: {staging_directory}")
+
+# Pubblica un'installazione preparata nella directory di staging
+def publish_staged_install(staging_directory, target_directory):
+    """
+    Sposta l'eventuale installazione esistente in una directory .previous e rinomina la
+    directory di staging nel nome finale. Se la seconda rinomina non riesce l'installazione
+    esistente viene rimessa al suo posto e l'errore viene propagato.
+    Ritorna il percorso della directory .previous, oppure None se non esisteva un'installazione.
+    """
+    previous_directory = None
+    if os.path.lexists(target_directory):
+        previous_directory = staging_directory[:-len(STAGING_SUFFIX)] + PREVIOUS_SUFFIX
+        os.rename(target_directory, previous_directory)
+    try:
+        os.rename(staging_directory, target_directory)
+    except OSError:
+        if previous_directory:
+            os.rename(previous_directory, target_directory)
+        raise
+    logger.info(f"Installazione pubblicata in {target_directory}")
+    return previous_directory
+
+# Annulla la pubblicazione di un'installazione, ripristinando quella precedente
+def restore_previous_install(target_directory, previous_directory):
+    try:
+        shutil.rmtree(target_directory)
+        if previous_directory:
+            os.rename(previous_directory, target_directory)
+            logger.info(f"Installazione precedente ripristinata in {target_directory}")
+    except OSError as e:
+        logger.error(f"Errore nel ripristino dell'installazione precedente in {target_directory}: {e}")
 
 # Esegue l'installazione del server con il file jar specificato
-def execute_java_installation(jar_file_path, game_version, forge_version, install_directory):
+def execute_java_installation(jar_file_path, game_version, forge_version, install_directory, temp_dir_name=TEMP_DIR_NAME, staging_directory=None, jvm_profile=JVM_PROFILE_AUTO):
     """
     Esegue l'installazione del server Java con il file jar specificato.
+    L'installazione viene preparata in una directory di staging accanto a quella finale
+    (staging_directory, se già creata dal chiamante, o una nuova) e pubblicata con una rinomina
+    solo se tutti i passaggi riescono; il file .jar.conf viene scritto per ultimo.
+    In caso di errore la directory di staging viene eliminata, l'eventuale installazione
+    precedente resta invariata e i riferimenti all'archivio condiviso aggiunti vengono rilasciati.
+    L'installer viene eseguito nella directory temporanea dell'installazione, così i suoi log
+    vengono rimossi insieme ad essa e più installazioni possono procedere in parallelo.
+    jvm_profile è il profilo della JVM scritto nel comando di avvio del file .jar.conf.
+    Ritorna True se l'installazione è andata a buon fine.
     """
-    original_directory = os.getcwd()
+    work_directory = os.path.join(tempfile.gettempdir(), temp_dir_name)
     specific_dir = f"forge-{game_version}-{forge_version}"
     target_directory = os.path.join(install_directory, specific_dir)
-    logger.debug(f"Creazione della directory per l'installazione: {target_directory}")
-    create_directory_if_not_exists(target_directory)
+    staging_directory = staging_directory or create_staging_directory(install_directory, specific_dir)
+    if staging_directory is None:
+        return False
 
-    install_command = f"--installServer={target_directory}"
+    install_command = f"--installServer={staging_directory}"
+    install_index = None
+    shared_libraries = set()
+    previous_shared_libraries = shared_library_paths(install_directory, specific_dir)
+    published = False
+    strategy = install_strategy(game_version)
 
     try:
-        if version.parse(game_version) >= version.parse("1.5.2"):
+        if strategy != STRATEGY_UNIVERSAL:
+            # Prepara le librerie nel mirror locale, così l'installer non deve scaricarle una alla volta
+            libraries_directory = os.path.join(staging_directory, "libraries")
+            installer_libraries = read_installer_libraries(jar_file_path)
+            prefetch_maven_libraries(installer_libraries)
+            # Le librerie invariate rispetto alle build già installate vengono collegate invece che riscaricate o copiate
+            shared_directory = os.path.join(install_directory, SHARED_LIBRARIES_DIRNAME)
+            source_directories = [shared_directory] + installed_libraries_directories(install_directory, game_version, forge_version) + [MAVEN_MIRROR_DIRECTORY]
+            seed_install_libraries(installer_libraries, libraries_directory, source_directories)
+
+            process_options = installer_process_options(install_directory, [work_directory, staging_directory])
             logger.info(f"Esecuzione dell'installazione per la versione {game_version}")
-            subprocess.run(["java", "-jar", jar_file_path, install_command], check=True)
+            with metrics_stage("java_install"):
+                subprocess.run(["java", "-jar", jar_file_path, install_command], check=True, cwd=work_directory, **process_options)
             logger.info("Installazione completata con successo per versioni superiori alla 1.5.2")
 
-            if version.parse(game_version) >= version.parse("1.17.1"):
+            harvest_installed_libraries(installer_libraries, libraries_directory)
+
+            # Una sola scansione dell'installazione, usata da tutti i passaggi successivi
+            install_index = scan_install_directory(staging_directory)
+            shared_libraries = deduplicate_libraries(install_directory, game_version, forge_version, install_index, staging_directory)
+
+            if strategy == STRATEGY_ARGS_FILE:
                 files_to_remove = ["README.txt", "run.sh", "run.bat", "user_jvm_args.txt"]
-                remove_files(target_directory, files_to_remove)
+                remove_files(staging_directory, files_to_remove, index=install_index)
                 logger.debug("File non necessari rimossi")
 
-                libraries_directory = os.path.join(target_directory, "libraries")
-                find_and_copy_file(libraries_directory, target_directory, "unix_args.txt")
-                modify_unix_args_file(game_version, forge_version, install_directory)
-        
-            logger.debug("Pulizia della cartella temporanea e dei log in corso")
-            remove_temp_directory("multicraft-forge-installer")
-            remove_log_files(os.getcwd())
+                unix_args_path = f"net/minecraftforge/forge/{game_version}-{forge_version}/unix_args.txt"
+                find_and_copy_file(libraries_directory, staging_directory, "unix_args.txt", install_index, unix_args_path)
+                if not modify_unix_args_file(game_version, forge_version, install_directory, shared_libraries, staging_directory):
+                    return False
 
-        elif version.parse(game_version) < version.parse("1.5.2"):
+        else:
             logger.info(f"Esecuzione dell'installazione per la versione {game_version}")
-            # Cambia la directory di lavoro alla target_directory prima di eseguire il comando Java
-            os.chdir(target_directory)
-            subprocess.run(["java", "-jar", jar_file_path], check=True)
-            # Ripristina la directory di lavoro originale dopo l'esecuzione
-            os.chdir(original_directory)
+            # Esegue il comando Java nella directory di staging senza cambiare la directory di lavoro del processo
+            process_options = installer_process_options(install_directory, [staging_directory])
+            with metrics_stage("java_install"):
+                subprocess.run(["java", "-jar", jar_file_path], check=True, cwd=staging_directory, **process_options)
             logger.info("Installazione completata con successo per versioni inferiori alla 1.5.2")
             files_to_remove = ["eula.txt", "server.properties"]
-            remove_files(target_directory, files_to_remove, ["logs"])
-
-        config_url = "http://www.multicraft.org/download/conf/?file=craftbukkit.jar.conf"
-        config_filename = f"forge-{game_version}-{forge_version}.jar.conf"
-        download_and_modify_config(config_url, config_filename, game_version, forge_version, install_directory)
+            install_index = scan_install_directory(staging_directory, recursive=False)
+            remove_files(staging_directory, files_to_remove, ["logs"], index=install_index)
 
         user, group = get_directory_owner(install_directory)
-        config_file_path = os.path.join(install_directory, config_filename)
-        change_owner_recursively(target_directory, user, group, additional_files=[config_file_path])
-        logger.debug("Proprietario di directory e file di configurazione aggiornato")
+        change_owner_recursively(staging_directory, user, group)
+        logger.debug("Proprietario della directory dell'installazione aggiornato")
+
+        previous_directory = publish_staged_install(staging_directory, target_directory)
+        # Dopo la rinomina i percorsi relativi dell'indice restano validi
+        if install_index is not None:
+            install_index["root"] = target_directory
+
+        # Il file .jar.conf, che rende visibile la versione a Multicraft, viene scritto per ultimo
+        if not write_forge_config(game_version, forge_version, install_directory, install_index, owner=(user, group), jvm_profile=jvm_profile):
+            restore_previous_install(target_directory, previous_directory)
+            return False
+
+        published = True
+        if previous_directory:
+            shutil.rmtree(previous_directory, ignore_errors=True)
+        # Le librerie usate solo dalla build sostituita non sono più referenziate da questa installazione
+        release_shared_libraries(install_directory, specific_dir, keep=shared_libraries)
+        return True
 
     except subprocess.CalledProcessError as e:
         logger.error(f"Errore nell'esecuzione dell'installazione: {e}")
+        return False
+    except OSError as e:
+        logger.error(f"Errore durante l'installazione di {specific_dir}: {e}")
+        return False
+    finally:
+        if not published:
+            remove_staging_directory(staging_directory)
+            if shared_libraries - previous_shared_libraries:
+                release_shared_libraries(install_directory, specific_dir, keep=previous_shared_libraries)
+        logger.debug("Pulizia della cartella temporanea e dei log in corso")
+        remove_log_files(work_directory)
+        remove_temp_directory(temp_dir_name)
+
+# Costruisce l'indice dei file di una directory di installazione con una sola scansione
+def scan_install_directory(directory, recursive=True):
+    """
+    Scansiona la directory con os.scandir (senza seguire i link simbolici) e ritorna un indice:
+    - root: la directory scansionata;
+    - files: percorso relativo -> os.DirEntry (lo stat viene letto solo se richiesto e poi riusato);
+    - dirs: insieme dei percorsi relativi delle sottocartelle;
+    - names: nome del file -> lista dei percorsi relativi.
+    L'indice viene costruito una volta per installazione e usato da tutte le funzioni di ricerca e pulizia.
+    """
+    index = {"root": directory, "files": {}, "dirs": set(), "names": {}}
+    pending = [""]
+    while pending:
+        relative_directory = pending.pop()
+        try:
+            with os.scandir(os.path.join(directory, relative_directory)) as entries:
+                for entry in entries:
+                    relative_path = os.path.join(relative_directory, entry.name)
+                    if entry.is_dir(follow_symlinks=False):
+                        index["dirs"].add(relative_path)
+                        if recursive:
+                            pending.append(relative_path)
+                    else:
+                        index["files"][relative_path] = entry
+                        index["names"].setdefault(entry.name, []).append(relative_path)
+        except OSError as e:
+            logger.warning(f"Impossibile leggere la directory {os.path.join(directory, relative_directory)}: {e}")
+
+    logger.debug(f"Indice di {directory}: {len(index['files'])} file, {len(index['dirs'])} cartelle")
+    return index
+
+# Rimuove dall'indice un file o una cartella con tutto il suo contenuto
+def discard_from_index(index, relative_path):
+    prefix = relative_path + os.sep
+    removed = [path for path in index["files"] if path == relative_path or path.startswith(prefix)]
+    for path in removed:
+        del index["files"][path]
+        paths = index["names"].get(os.path.basename(path), [])
+        if path in paths:
+            paths.remove(path)
+    index["dirs"] = {path for path in index["dirs"] if path != relative_path and not path.startswith(prefix)}
+
+# Cerca un file nell'indice, prima nel percorso noto e poi per nome sotto una sottocartella
+def find_in_index(index, filename, subdirectory="", known_path=None):
+    """
+    Ritorna il percorso relativo (alla radice dell'indice) del file cercato, oppure None.
+    known_path è il percorso atteso relativo a subdirectory (es. il percorso Maven di unix_args.txt).
+    """
+    subdirectory = "" if subdirectory in ("", ".") else subdirectory
+    if known_path:
+        candidate = os.path.join(subdirectory, known_path)
+        if candidate in index["files"]:
+            return candidate
+    prefix = subdirectory + os.sep if subdirectory else ""
+    matches = sorted(path for path in index["names"].get(filename, []) if path.startswith(prefix))
+    return matches[0] if matches else None
+
+# Cerca un file in una directory senza indice, visitando prima il percorso noto e la sottocartella preferita
+def find_file_in_directory(directory, filename, known_path=None):
+    """
+    Ricerca di riserva quando non è disponibile un indice: controlla direttamente il percorso noto,
+    poi visita la directory con os.scandir fermandosi al primo file trovato.
+    Le sottocartelle che portano al percorso noto vengono visitate per prime.
+    """
+    if known_path and os.path.isfile(os.path.join(directory, known_path)):
+        return os.path.join(directory, known_path)
+
+    preferred_parts = os.path.dirname(known_path).split(os.sep) if known_path else []
+    pending = [(directory, 0)]
+    while pending:
+        current, depth = pending.pop()
+        subdirectories = []
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry)
+                    elif entry.name == filename:
+                        return entry.path
+        except OSError as e:
+            logger.warning(f"Impossibile leggere la directory {current}: {e}")
+            continue
+        # Le sottocartelle preferite vengono estratte per prime dalla pila
+        preferred = preferred_parts[depth] if depth < len(preferred_parts) else None
+        subdirectories.sort(key=lambda entry: entry.name == preferred)
+        pending.extend((entry.path, depth + 1) for entry in subdirectories)
+    return None
 
 # Rimuove i file specificati da una directory
-def remove_files(directory, file_list, folder_list=None):
+def remove_files(directory, file_list, folder_list=None, index=None):
     """
     Rimuove file e cartelle specificati da una directory.
+    Se è disponibile l'indice della directory, lo usa per sapere quali elementi esistono
+    e lo aggiorna dopo la rimozione.
     """
     logger.debug(f"Inizio della rimozione di file e cartelle in: {directory}")
+    if index is None or index["root"] != directory:
+        index = scan_install_directory(directory, recursive=False)
 
     # Rimuovi i file
     for file_name in file_list:
+        if file_name not in index["files"]:
+            continue
         file_path = os.path.join(directory, file_name)
-        if os.path.isfile(file_path):
-            try:
-                os.remove(file_path)
-                logger.info(f"File rimosso: {file_path}")
-            except OSError as e:
-                logger.error(f"Errore nella rimozione del file {file_path}: {e}")
+        try:
+            os.remove(file_path)
+            discard_from_index(index, file_name)
+            logger.info(f"File rimosso: {file_path}")
+        except OSError as e:
+            logger.error(f"Errore nella rimozione del file {file_path}: {e}")
 
     # Rimuovi le cartelle, se specificate
     if folder_list:
         for folder_name in folder_list:
+            if folder_name not in index["dirs"]:
+                continue
             folder_path = os.path.join(directory, folder_name)
-            if os.path.isdir(folder_path):
+            try:
+                shutil.rmtree(folder_path)
+                discard_from_index(index, folder_name)
+                logger.info(f"Cartella rimossa: {folder_path}")
+            except OSError as e:
+                logger.error(f"Errore nella rimozione della cartella {folder_path}: {e}")
+
+    logger.debug("Rimozione di file e cartelle completata")
+
+# Cerca un file nel source_directory e nelle sue sottodirectory e lo copia nel target_directory
+def find_and_copy_file(source_directory, target_directory, filename, index=None, known_path=None):
+    """
+    Cerca un file nel source_directory e nelle sue sottodirectory.
+    Se trovato, copia il file nel target_directory.
+    known_path è il percorso atteso del file relativo a source_directory: viene controllato per primo.
+    Se è disponibile l'indice dell'installazione la ricerca non legge il disco.
+    """
+    logger.debug(f"Ricerca del file '{filename}' in: {source_directory}")
+
+    if index is not None:
+        relative_path = find_in_index(index, filename, os.path.relpath(source_directory, index["root"]), known_path)
+        file_path = os.path.join(index["root"], relative_path) if relative_path else None
+    else:
+        file_path = find_file_in_directory(source_directory, filename, known_path)
+
+    if file_path is None:
+        logger.warning(f"File '{filename}' non trovato in {source_directory}")
+        return False
+
+    try:
+        shutil.copy(file_path, target_directory)
+        logger.info(f"File '{filename}' copiato da {file_path} a {target_directory}")
+        return True
+    except OSError as e:
+        logger.error(f"Errore nella copia del file {file_path} a {target_directory}: {e}")
+        return False
+
+# Carica i riferimenti dell'archivio condiviso delle librerie
+def load_shared_library_refs(shared_directory):
+    refs_path = os.path.join(shared_directory, ".refs.json")
+    try:
+        with open(refs_path, 'r') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Riferimenti dell'archivio condiviso non leggibili ({refs_path}): {e}")
+        return {}
+
+# Salva i riferimenti dell'archivio condiviso delle librerie
+def save_shared_library_refs(shared_directory, refs):
+    refs_path = os.path.join(shared_directory, ".refs.json")
+    temp_path = f"{refs_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as file:
+        json.dump(refs, file, separators=(",", ":"), sort_keys=True)
+    os.replace(temp_path, refs_path)
+
+# Calcola lo SHA1 di un file
+def file_sha1(file_path):
+    sha1_obj = hashlib.sha1()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(DOWNLOAD_CHUNK_SIZE), b""):
+            sha1_obj.update(chunk)
+    return sha1_obj.hexdigest()
+
+# Deduplica le librerie di un'installazione nell'archivio condiviso della daemon jar directory
+@measured_stage("deduplicate")
+def deduplicate_libraries(install_directory, game_version, forge_version, index=None, target_directory=None):
+    """
+    Collega le librerie di forge-<mc>-<forge>/libraries all'archivio condiviso
+    <install_directory>/.forge-libraries, che mantiene la stessa struttura Maven:
+    - se la libreria non è ancora nell'archivio, vi viene aggiunta con un hardlink;
+    - se è già presente con lo stesso contenuto (SHA1), la copia dell'installazione viene
+      sostituita da un hardlink a quella dell'archivio;
+    - se è presente con un contenuto diverso, la copia dell'installazione resta separata.
+    Le librerie condivise occupano spazio su disco e in page cache una sola volta.
+    Ogni libreria tiene il conteggio delle installazioni che la usano, per la rimozione.
+    Se è disponibile l'indice dell'installazione, le librerie vengono lette da esso.
+    target_directory sostituisce la directory dell'installazione (es. la directory di staging).
+    Ritorna l'insieme dei percorsi relativi delle librerie condivise.
+    """
+    install_name = f"forge-{game_version}-{forge_version}"
+    target_directory = target_directory or os.path.join(install_directory, install_name)
+    libraries_directory = os.path.join(target_directory, "libraries")
+    if index is None:
+        index = scan_install_directory(target_directory)
+    libraries_prefix = "libraries" + os.sep
+    shared_directory = os.path.join(install_directory, SHARED_LIBRARIES_DIRNAME)
+    shared_libraries = set()
+    linked_count = 0
+
+    if not os.path.isdir(libraries_directory):
+        return shared_libraries
+
+    with shared_libraries_lock:
+        try:
+            os.makedirs(shared_directory, exist_ok=True)
+            refs = load_shared_library_refs(shared_directory)
+
+            for index_path, dir_entry in index["files"].items():
+                if not index_path.startswith(libraries_prefix) or dir_entry.is_symlink():
+                    continue
+                private_path = dir_entry.path
+                relative_path = index_path[len(libraries_prefix):]
+                shared_path = os.path.join(shared_directory, relative_path)
+                entry = refs.get(relative_path)
+                private_stat = dir_entry.stat(follow_symlinks=False)
+
+                if entry and os.path.isfile(shared_path):
+                    shared_stat = os.stat(shared_path)
+                    if (shared_stat.st_dev, shared_stat.st_ino) != (private_stat.st_dev, private_stat.st_ino):
+                        if shared_stat.st_size != private_stat.st_size or file_sha1(private_path) != entry["sha1"]:
+                            logger.debug("Libreria %s diversa da quella condivisa, resta separata", relative_path)
+                            continue
+                        link_or_copy_file(shared_path, private_path, allow_link=True)
+                        linked_count += 1
+                else:
+                    private_sha1 = file_sha1(private_path)
+                    # Il file condiviso è stato rimosso: viene ricreato solo con lo stesso contenuto,
+                    # perché le installazioni registrate in refs continuano a usarlo
+                    if entry and private_sha1 != entry["sha1"]:
+                        logger.debug("Libreria condivisa %s mancante e diversa da quella dell'installazione, resta separata", relative_path)
+                        continue
+                    os.makedirs(os.path.dirname(shared_path), exist_ok=True)
+                    link_or_copy_file(private_path, shared_path, allow_link=True)
+                    if not entry:
+                        entry = {"sha1": private_sha1, "size": private_stat.st_size, "refs": []}
+                        refs[relative_path] = entry
+
+                if install_name not in entry["refs"]:
+                    entry["refs"].append(install_name)
+                shared_libraries.add(relative_path)
+
+            save_shared_library_refs(shared_directory, refs)
+        except OSError as e:
+            logger.error(f"Errore nella deduplica delle librerie di {install_name}: {e}")
+            return set()
+
+    logger.info(f"Librerie di {install_name} nell'archivio condiviso: {len(shared_libraries)} ({linked_count} deduplicate)")
+    return shared_libraries
+
+# Ritorna i percorsi delle librerie dell'archivio condiviso usate da un'installazione
+def shared_library_paths(install_directory, install_name):
+    shared_directory = os.path.join(install_directory, SHARED_LIBRARIES_DIRNAME)
+    with shared_libraries_lock:
+        refs = load_shared_library_refs(shared_directory)
+    return {relative_path for relative_path, entry in refs.items() if install_name in entry["refs"]}
+
+# Rilascia le librerie condivise usate da un'installazione, rimuovendo quelle non più usate
+def release_shared_libraries(install_directory, install_name, keep=None):
+    """
+    Rimuove install_name dai riferimenti dell'archivio condiviso delle librerie
+    ed elimina le librerie che non sono più usate da nessuna installazione.
+    I riferimenti alle librerie in keep vengono mantenuti.
+    Ritorna il numero di librerie eliminate.
+    """
+    shared_directory = os.path.join(install_directory, SHARED_LIBRARIES_DIRNAME)
+    if not os.path.isdir(shared_directory):
+        return 0
+
+    removed_count = 0
+    with shared_libraries_lock:
+        refs = load_shared_library_refs(shared_directory)
+        for relative_path in list(refs):
+            entry = refs[relative_path]
+            if keep and relative_path in keep:
+                continue
+            if install_name in entry["refs"]:
+                entry["refs"].remove(install_name)
+            if not entry["refs"]:
+                shared_path = os.path.join(shared_directory, relative_path)
+                try:
+                    if os.path.exists(shared_path):
+                        os.remove(shared_path)
+                    removed_count += 1
+                    del refs[relative_path]
+                    # Rimuove le directory rimaste vuote
+                    parent = os.path.dirname(shared_path)
+                    while parent != shared_directory and not os.listdir(parent):
+                        os.rmdir(parent)
+                        parent = os.path.dirname(parent)
+                except OSError as e:
+                    logger.error(f"Errore nella rimozione della libreria condivisa {shared_path}: {e}")
+        save_shared_library_refs(shared_directory, refs)
+
+    logger.info(f"Librerie condivise rilasciate da {install_name}: {removed_count} rimosse dall'archivio")
+    return removed_count
+
+# Percorso dell'indice delle versioni installate nella daemon jar directory
+def inventory_path(install_directory):
+    return os.path.join(install_directory, INVENTORY_FILENAME)
+
+# Legge l'indice delle versioni installate
+def load_inventory(install_directory):
+    path = inventory_path(install_directory)
+    try:
+        with open(path, 'r') as file:
+            inventory = json.load(file)
+        if inventory.get("format") == INVENTORY_FORMAT:
+            return inventory
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f"Indice delle versioni installate non leggibile ({path}): {e}")
+    return {"format": INVENTORY_FORMAT, "updated_at": 0, "installs": {}}
+
+# Misura una directory di installazione: byte propri, byte collegati ad altri file e file principali
+def measure_install_directory(directory):
+    """
+    Percorre la directory una sola volta. I file con più collegamenti (hardlink verso
+    l'archivio condiviso, il mirror Maven o la cache degli artefatti) sono conteggiati
+    a parte, perché rimuovere l'installazione non libera il loro spazio.
+    """
+    index = scan_install_directory(directory)
+    own_bytes = linked_bytes = 0
+    for entry in index["files"].values():
+        stat_info = entry.stat(follow_symlinks=False)
+        if stat_info.st_nlink > 1:
+            linked_bytes += stat_info.st_size
+        else:
+            own_bytes += stat_info.st_size
+    # File letti all'avvio del server, usati per stimare l'ultimo utilizzo (atime)
+    key_files = sorted(path for path in index["files"]
+                       if os.sep not in path and (path.endswith(".jar") or path == "unix_args.txt"))
+    return {"files": len(index["files"]), "own_bytes": own_bytes, "linked_bytes": linked_bytes, "key_files": key_files}
+
+# Ricava versione di Minecraft e di Forge dal nome di un'installazione forge-<mc>-<forge>
+def parse_install_name(name):
+    """
+    Ritorna (game_version, forge_version) se il nome ha la forma usata dallo script
+    (es. forge-1.20.1-47.2.0, forge-1.7.10-10.13.4.1614-1.7.10), altrimenti None.
+    """
+    match = re.fullmatch(r"forge-(\d+\.\d+(?:\.\d+)?(?:_pre\d+)?)-(\d+(?:\.\d+)+(?:-[\w.]+)?)", name)
+    return match.groups() if match else None
+
+# Controlla se un file .jar.conf è stato generato dallo script
+def is_generated_config(config_path, game_version, forge_version):
+    """
+    Un file generato contiene il commento con il profilo della JVM oppure, se creato da una
+    versione precedente dello script, nome e categoria scritti per la versione di Forge.
+    """
+    try:
+        with open(config_path, 'r', errors="replace") as file:
+            content = file.read(64 * 1024)
+    except OSError:
+        return False
+    if read_jvm_profile_marker(content) is not None:
+        return True
+    lines = {line.strip() for line in content.splitlines()}
+    return f"name = {forge_version}" in lines and f"category = [Forge] {game_version}" in lines
+
+# Aggiorna in modo incrementale l'indice delle versioni installate
+def update_inventory(install_directory, save=True):
+    """
+    Legge una sola volta la radice della daemon jar directory e associa ogni directory
+    forge-<mc>-<forge> al suo file .jar.conf; le installazioni in corso (directory di
+    staging) sono elencate in in_progress. Lo stato è 'installed' (directory e .jar.conf),
+    'incomplete' (directory senza .jar.conf) o 'orphaned-config' (.jar.conf senza directory).
+    Sono considerati solo i nomi forge-<mc>-<forge> validi (parse_install_name); managed indica
+    le installazioni create dallo script (.jar.conf generato dallo script, anche se in seguito
+    rimosso), le sole che la pulizia può eliminare.
+    Le installazioni vengono pubblicate con una rinomina, quindi una directory con lo stesso
+    inode e la stessa data di modifica non è cambiata e non viene percorsa di nuovo.
+    Condivisione delle librerie e ultimo utilizzo vengono invece ricalcolati a ogni chiamata,
+    dai riferimenti dell'archivio condiviso e dalla data di accesso dei file principali.
+    Con save False l'indice non viene salvato su disco.
+    Ritorna l'indice aggiornato.
+    """
+    with inventory_lock:
+        inventory = load_inventory(install_directory)
+        previous = inventory["installs"]
+        found = {}
+        in_progress = set()
+        with os.scandir(install_directory) as entries:
+            for entry in entries:
+                name = entry.name
+                staging_match = re.fullmatch(r"\.(forge-.+)\.\d+-\d+\.staging", name)
+                if staging_match:
+                    in_progress.add(staging_match.group(1))
+                elif name.endswith(".jar.conf") and parse_install_name(name[:-len(".jar.conf")]) and entry.is_file():
+                    found.setdefault(name[:-len(".jar.conf")], {})["config"] = entry.stat()
+                elif parse_install_name(name) and entry.is_dir(follow_symlinks=False):
+                    found.setdefault(name, {})["directory"] = entry.stat(follow_symlinks=False)
+
+        refs = load_shared_library_refs(os.path.join(install_directory, SHARED_LIBRARIES_DIRNAME))
+        installs = {}
+        changed = set(previous) != set(found)
+        for name, stats in found.items():
+            game_version, forge_version = parse_install_name(name)
+            directory_stat, config_stat = stats.get("directory"), stats.get("config")
+            signature = [directory_stat.st_ino, directory_stat.st_mtime_ns] if directory_stat else None
+            config_signature = [config_stat.st_ino, config_stat.st_mtime_ns] if config_stat else None
+            record = previous.get(name)
+            managed = bool(record and record.get("managed"))
+            if config_stat and (record is None or record.get("config_signature") != config_signature):
+                changed = True
+                managed = is_generated_config(os.path.join(install_directory, f"{name}.jar.conf"), game_version, forge_version)
+            if record is None or record.get("signature") != signature:
+                changed = True
+                record = {"game_version": game_version, "forge_version": forge_version, "signature": signature,
+                          "files": 0, "own_bytes": 0, "linked_bytes": 0, "key_files": []}
+                if directory_stat:
+                    record.update(measure_install_directory(os.path.join(install_directory, name)))
+                    logger.debug("Installazione %s misurata: %s file, %s byte propri", name, record['files'], record['own_bytes'])
+            record["managed"] = managed
+            record["config_signature"] = config_signature
+            if directory_stat and config_stat:
+                record["state"] = "installed"
+            else:
+                record["state"] = "incomplete" if directory_stat else "orphaned-config"
+
+            record["modified_at"] = max(stat_info.st_mtime for stat_info in (directory_stat, config_stat) if stat_info)
+            last_used = record["modified_at"]
+            for key_file in record["key_files"]:
+                try:
+                    last_used = max(last_used, os.stat(os.path.join(install_directory, name, key_file)).st_atime)
+                except OSError:
+                    pass
+            record["last_used"] = last_used
+
+            # Librerie dell'archivio condiviso usate da questa installazione e quelle usate solo da essa
+            shared = [entry for entry in refs.values() if name in entry["refs"]]
+            record["shared_libraries"] = len(shared)
+            record["exclusive_shared_bytes"] = sum(entry["size"] for entry in shared if len(entry["refs"]) == 1)
+            installs[name] = record
+
+        inventory["installs"] = installs
+        inventory["in_progress"] = sorted(in_progress)
+        inventory["shared_bytes"] = sum(entry["size"] for entry in refs.values())
+        inventory["updated_at"] = time.time()
+        if save and (changed or not os.path.isfile(inventory_path(install_directory))):
+            try:
+                write_file_atomically(inventory_path(install_directory), json.dumps(inventory, separators=(",", ":"), sort_keys=True))
+            except OSError as e:
+                logger.warning(f"Impossibile salvare l'indice delle versioni installate in {install_directory}: {e}")
+        return inventory
+
+# Ritorna le coppie (versione di Minecraft, versione di Forge) installate secondo l'indice
+def installed_forge_versions(install_directory):
+    if not os.path.isdir(install_directory):
+        return set()
+    try:
+        inventory = update_inventory(install_directory)
+    except OSError as e:
+        logger.warning(f"Impossibile leggere le installazioni in {install_directory}: {e}")
+        return set()
+    return {(record["game_version"], record["forge_version"])
+            for record in inventory["installs"].values() if record["state"] == "installed"}
+
+# Converte una dimensione come '500M' o '20G' in byte
+def parse_size(text):
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*", str(text), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Dimensione non valida: '{text}' (es. 500M, 20G)")
+    exponent = " KMGT".index(match.group(2).upper() or " ")
+    return int(float(match.group(1)) * 1024 ** exponent)
+
+# Rimuove le librerie dell'archivio condiviso non più usate da nessuna installazione
+def remove_orphaned_shared_libraries(install_directory, installed_names, dry_run=False):
+    """
+    Rimuove dai riferimenti le installazioni che non esistono più, elimina le librerie
+    senza riferimenti e i file dell'archivio che non compaiono nei riferimenti.
+    Ritorna (numero di librerie, byte liberati).
+    """
+    shared_directory = os.path.join(install_directory, SHARED_LIBRARIES_DIRNAME)
+    if not os.path.isdir(shared_directory):
+        return 0, 0
+
+    removed = freed = 0
+    with shared_libraries_lock:
+        refs = load_shared_library_refs(shared_directory)
+        for relative_path in list(refs):
+            entry = refs[relative_path]
+            entry["refs"] = [name for name in entry["refs"] if name in installed_names]
+            if not entry["refs"]:
+                del refs[relative_path]
+
+        index = scan_install_directory(shared_directory)
+        for relative_path, dir_entry in index["files"].items():
+            if relative_path == ".refs.json" or relative_path in refs:
+                continue
+            removed += 1
+            stat_info = dir_entry.stat(follow_symlinks=False)
+            # Lo spazio viene liberato solo se nessuna installazione usa ancora il file con un hardlink
+            if stat_info.st_nlink == 1:
+                freed += stat_info.st_size
+            if not dry_run:
                 try:
-                    shutil.rmtree(folder_path)
-                    logger.info(f"Cartella rimossa: {folder_path}")
+                    os.remove(dir_entry.path)
                 except OSError as e:
-                    logger.error(f"Errore nella rimozione della cartella {folder_path}: {e}")
+                    logger.error(f"Errore nella rimozione della libreria condivisa {dir_entry.path}: {e}")
 
-    logger.debug("Rimozione di file e cartelle completata")
+        if not dry_run:
+            for relative_path in sorted(index["dirs"], key=len, reverse=True):
+                try:
+                    os.rmdir(os.path.join(shared_directory, relative_path))
+                except OSError:
+                    pass
+            save_shared_library_refs(shared_directory, refs)
 
-# Cerca un file nel source_directory e nelle sue sottodirectory e lo copia nel target_directory
-def find_and_copy_file(source_directory, target_directory, filename):
+    if removed:
+        logger.info(f"Librerie condivise non più usate{' (simulazione)' if dry_run else ''}: {removed}, {freed} byte")
+    return removed, freed
+
+# Rimuove le versioni di Forge non più usate e le librerie orfane entro un limite di spazio
+def collect_garbage(install_directory, max_bytes=None, keep=GC_KEEP_BUILDS, protect=(), dry_run=False, remove_orphans=False):
     """
-    Cerca un file nel source_directory e nelle sue sottodirectory.
-    Se trovato, copia il file nel target_directory.
+    Considera solo le installazioni create dallo script (managed nell'indice):
+    - rimuove sempre le directory di staging abbandonate;
+    - con remove_orphans rimuove anche le installazioni incomplete (directory senza .jar.conf,
+      più vecchie di GC_MIN_AGE secondi) e i .jar.conf senza directory;
+    - se indicato max_bytes, rimuove le build meno usate di recente (data di accesso dei file
+      principali) finché lo spazio occupato da installazioni e archivio condiviso rientra nel
+      limite; le keep build più recenti di ogni versione di Minecraft e quelle in protect
+      (nomi forge-<mc>-<forge>) non vengono mai rimosse;
+    - rimuove le librerie dell'archivio condiviso non più usate.
+    Il .jar.conf viene rimosso prima della directory, così Multicraft non vede mai
+    un'installazione parziale. Con dry_run non viene modificato nulla, nemmeno l'indice.
+    Ritorna un riepilogo con le installazioni rimosse e i byte liberati.
     """
-    logger.debug(f"Ricerca del file '{filename}' in: {source_directory}")
-
-    file_found = False
-    for root, dirs, files in os.walk(source_directory):
-        if filename in files:
-            file_path = os.path.join(root, filename)
-            try:
-                shutil.copy(file_path, target_directory)
-                logger.info(f"File '{filename}' copiato da {file_path} a {target_directory}")
-                file_found = True
-                break  # Interrompe il ciclo dopo aver trovato e copiato il file
-            except OSError as e:
-                logger.error(f"Errore nella copia del file {file_path} a {target_directory}: {e}")
+    start_time = time.monotonic()
+    if not dry_run:
+        remove_stale_staging_directories(install_directory)
+    inventory = update_inventory(install_directory, save=not dry_run)
+    installs = inventory["installs"]
+    now = time.time()
+
+    # Spazio liberato rimuovendo un'installazione: file propri e librerie condivise usate solo da essa
+    def reclaimable(record):
+        return record["own_bytes"] + record["exclusive_shared_bytes"]
+
+    removals = []
+    for name, record in installs.items():
+        if not (remove_orphans and record["managed"]) or name in protect:
+            continue
+        if record["state"] == "orphaned-config" or (record["state"] == "incomplete" and now - record["modified_at"] > GC_MIN_AGE):
+            removals.append((name, record["state"]))
+
+    if max_bytes is not None:
+        # Spazio occupato: file propri delle installazioni e archivio condiviso delle librerie
+        used_bytes = inventory["shared_bytes"] + sum(record["own_bytes"] for record in installs.values())
+        used_bytes -= sum(reclaimable(installs[name]) for name, _ in removals)
+        newest = {}
+        for name, record in installs.items():
+            newest.setdefault(record["game_version"], []).append(name)
+        kept = set(protect)
+        for names in newest.values():
+            names.sort(key=lambda name: version_sort_key(installs[name]["forge_version"]), reverse=True)
+            kept.update(names[:keep])
+        candidates = sorted((name for name, record in installs.items()
+                             if record["state"] == "installed" and record["managed"] and name not in kept),
+                            key=lambda name: installs[name]["last_used"])
+        for name in candidates:
+            if used_bytes <= max_bytes:
                 break
-
-    if not file_found:
-        logger.warning(f"File '{filename}' non trovato in {source_directory}")
+            removals.append((name, "unused"))
+            used_bytes -= reclaimable(installs[name])
+
+    summary = {"install_directory": install_directory, "dry_run": dry_run, "removed": [], "freed_bytes": 0}
+    for name, reason in removals:
+        record = installs[name]
+        summary["removed"].append({"name": name, "reason": reason, "bytes": reclaimable(record)})
+        summary["freed_bytes"] += record["own_bytes"]
+        logger.info(f"Rimozione di {name} ({reason}){' (simulazione)' if dry_run else ''}")
+        if dry_run:
+            continue
+        try:
+            config_path = os.path.join(install_directory, f"{name}.jar.conf")
+            if os.path.exists(config_path):
+                os.remove(config_path)
+            directory = os.path.join(install_directory, name)
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+        except OSError as e:
+            logger.error(f"Errore nella rimozione di {name}: {e}")
+
+    # Le librerie delle installazioni in corso restano nell'archivio anche se la directory finale non esiste ancora
+    removed_names = {name for name, _ in removals}
+    remaining = {name for name in installs if name not in removed_names} | set(inventory["in_progress"])
+    summary["orphaned_libraries"], freed = remove_orphaned_shared_libraries(install_directory, remaining, dry_run)
+    summary["freed_bytes"] += freed
+    if not dry_run:
+        update_inventory(install_directory)
+    summary["elapsed_seconds"] = round(time.monotonic() - start_time, 3)
+    logger.info(f"Pulizia di {install_directory}: {len(summary['removed'])} installazioni rimosse, {summary['freed_bytes']} byte liberati")
+    return summary
 
 # Modifica il file unix_args.txt
-def modify_unix_args_file(game_version, forge_version, install_directory):
+def modify_unix_args_file(game_version, forge_version, install_directory, shared_libraries=None, staging_directory=None):
     """
     Modifica il file unix_args.txt sostituendo 'libraries' con il percorso delle 'libraries' nella directory di Forge.
+    I percorsi delle librerie presenti in shared_libraries puntano invece all'archivio condiviso.
+    Se l'installazione è ancora nella directory di staging, il file viene letto e scritto lì
+    ma i percorsi puntano già alla directory finale.
+    Ritorna True se il file è stato modificato.
     """
     specific_dir = f"forge-{game_version}-{forge_version}"
     target_directory = os.path.join(install_directory, specific_dir)
-    file_path = os.path.join(target_directory, "unix_args.txt")
+    file_path = os.path.join(staging_directory or target_directory, "unix_args.txt")
 
     logger.debug(f"Modifica del file unix_args.txt in: {file_path}")
 
@@ -496,15 +3105,27 @@ def modify_unix_args_file(game_version, forge_version, install_directory):
             content = file.read()
             logger.debug("File unix_args.txt letto con successo")
 
-        new_content = content.replace('libraries', f'{target_directory}/libraries')
+        shared_directory = os.path.join(install_directory, SHARED_LIBRARIES_DIRNAME)
+
+        def replace_library_path(match):
+            relative_path = match.group(1)
+            if shared_libraries and relative_path in shared_libraries:
+                return f"{shared_directory}/{relative_path}"
+            return f"{target_directory}/libraries/{relative_path}"
+
+        # Prima i singoli file di libreria, poi le altre occorrenze (es. -DlibraryDirectory=libraries)
+        new_content = re.sub(r"(?<![\w/.-])libraries/([^\s:;]+)", replace_library_path, content)
+        new_content = re.sub(r"(?<![\w/.-])libraries(?![\w/.-])", f"{target_directory}/libraries", new_content)
         logger.debug("Contenuto del file modificato per includere il percorso corretto delle libraries")
 
         with open(file_path, 'w') as file:
             file.write(new_content)
             logger.info("File unix_args.txt modificato e salvato con successo")
+        return True
 
     except OSError as e:
         logger.error(f"Errore nella modifica del file {file_path}: {e}")
+        return False
 
 # Ottiene l'utente proprietario e il gruppo di una directory
 def get_directory_owner(directory):
@@ -526,117 +3147,665 @@ def get_directory_owner(directory):
         logger.error(f"Errore nell'ottenere il proprietario della directory {directory}: {e}")
         return None, None
 
+# Controlla se un file è un hardlink a un contenuto della cache degli artefatti o del mirror Maven
+def is_cache_link(path, stat_info, root_directory):
+    """
+    Le cache non vengono percorse: il file viene confrontato (device e inode) solo con i contenuti
+    che potrebbero corrispondergli, cioè la libreria con lo stesso percorso nel mirror Maven per i
+    file sotto <root_directory>/libraries e il contenuto con lo SHA1 registrato per quel percorso
+    durante il download o il ripristino dalla cache degli artefatti.
+    """
+    if not stat.S_ISREG(stat_info.st_mode) or stat_info.st_nlink < 2:
+        return False
+    candidates = []
+    relative_path = os.path.relpath(path, root_directory)
+    libraries_prefix = "libraries" + os.sep
+    if relative_path.startswith(libraries_prefix):
+        candidates.append(os.path.join(MAVEN_MIRROR_DIRECTORY, relative_path[len(libraries_prefix):]))
+    hashes = downloaded_hashes.get(path)
+    if hashes:
+        candidates.append(artifact_blob_path(hashes["sha1"]))
+    for candidate in candidates:
+        try:
+            candidate_stat = os.stat(candidate)
+        except OSError:
+            continue
+        if (candidate_stat.st_dev, candidate_stat.st_ino) == (stat_info.st_dev, stat_info.st_ino):
+            return True
+    return False
+
 # Cambio del proprietario di una directory e del suo contenuto ricorsivamente
+@measured_stage("chown")
 def change_owner_recursively(directory, user, group, additional_files=None):
     """
     Cambia il proprietario di una directory e del suo contenuto ricorsivamente.
     Cambia anche il proprietario di eventuali file aggiuntivi specificati nella lista additional_files.
+    La directory viene letta con os.scandir senza seguire i link simbolici, gli elementi che hanno
+    già utente e gruppo corretti vengono saltati e le sottocartelle sono elaborate in parallelo.
+    I file che sono hardlink alla cache degli artefatti o al mirror Maven non vengono modificati:
+    cambiarne il proprietario lo cambierebbe anche nella cache, rendendola scrivibile dall'utente
+    del server. Restano leggibili e possono comunque essere rimossi o sostituiti da quell'utente.
+    Ritorna il numero di elementi modificati.
     """
     logger.debug(f"Inizio del cambio di proprietario per la directory: {directory}")
+    start_time = time.monotonic()
+    changed = 0
+    skipped = []
     try:
         uid = pwd.getpwnam(user).pw_uid
         gid = grp.getgrnam(group).gr_gid
-        os.chown(directory, uid, gid)
-        logger.info(f"Proprietario cambiato per la directory: {directory}")
 
-        for root, dirs, files in os.walk(directory):
-            for dir in dirs:
-                os.chown(os.path.join(root, dir), uid, gid)
-            for file in files:
-                os.chown(os.path.join(root, file), uid, gid)
+        # Cambia il proprietario di un elemento solo se necessario
+        def chown_if_needed(path, stat_info):
+            if stat_info.st_uid == uid and stat_info.st_gid == gid:
+                return 0
+            if is_cache_link(path, stat_info, directory):
+                skipped.append(path)
+                return 0
+            os.chown(path, uid, gid, follow_symlinks=False)
+            return 1
+
+        # Elabora una singola directory e ritorna le sottocartelle da visitare
+        def process_directory(path):
+            count = 0
+            subdirectories = []
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    count += chown_if_needed(entry.path, entry.stat(follow_symlinks=False))
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+            return count, subdirectories
+
+        changed += chown_if_needed(directory, os.stat(directory, follow_symlinks=False))
+
+        with futures.ThreadPoolExecutor(max_workers=OWNERSHIP_WORKERS) as executor:
+            pending = {executor.submit(process_directory, directory)}
+            while pending:
+                future = pending.pop()
+                count, subdirectories = future.result()
+                changed += count
+                pending.update(executor.submit(process_directory, path) for path in subdirectories)
 
         logger.debug("Proprietario cambiato per tutti i file e le sottocartelle.")
 
         if additional_files:
             for file_path in additional_files:
-                if os.path.exists(file_path):
-                    os.chown(file_path, uid, gid)
+                if os.path.exists(file_path) and chown_if_needed(file_path, os.stat(file_path, follow_symlinks=False)):
+                    changed += 1
                     logger.info(f"Proprietario cambiato per il file aggiuntivo: {file_path}")
 
-        logger.info(f"Proprietario cambiato con successo per {directory} e il suo contenuto.")
-    except OSError as e:
+        if skipped:
+            logger.info(f"File collegati alla cache lasciati invariati in {directory}: {len(skipped)}")
+        elapsed = time.monotonic() - start_time
+        count_metric("chown_changed_entries", changed)
+        logger.info(f"Proprietario cambiato con successo per {directory} e il suo contenuto: {changed} elementi modificati in {elapsed:.2f} s")
+    except (OSError, KeyError) as e:
         logger.error(f"Errore nel cambiare il proprietario per {directory}: {e}")
 
     logger.debug("Fine del cambio di proprietario")
+    return changed
+
+# Prepara l'esecuzione dell'installer con l'utente proprietario della daemon jar directory
+def installer_process_options(install_directory, writable_directories):
+    """
+    Se lo script è eseguito come root, ritorna gli argomenti per subprocess.run che avviano
+    l'installer con utente e gruppo proprietari della daemon jar directory, così i file vengono
+    creati già con il proprietario corretto e il passaggio finale non deve modificarli.
+    Le directory in cui l'installer deve scrivere vengono prima assegnate a quell'utente.
+    Ritorna un dizionario vuoto se non applicabile (utente non root, stesso utente o Python < 3.9).
+    """
+    if not INSTALLER_RUN_AS_OWNER or os.geteuid() != 0 or sys.version_info < (3, 9):
+        return {}
+    try:
+        stat_info = os.stat(install_directory)
+    except OSError as e:
+        logger.warning(f"Impossibile leggere il proprietario di {install_directory}: {e}")
+        return {}
+    if stat_info.st_uid == 0:
+        return {}
+
+    user, group = get_directory_owner(install_directory)
+    if user is None:
+        return {}
+    for directory in writable_directories:
+        change_owner_recursively(directory, user, group)
+    logger.info(f"L'installer verrà eseguito come utente {user}, gruppo {group}")
+    return {"user": stat_info.st_uid, "group": stat_info.st_gid}
 
 # Funzione per trovare il file .jar di forge nella sua directory del daemon jar
-def find_forge_jar(install_directory, game_version, forge_version):
+def find_forge_jar(install_directory, game_version, forge_version, index=None):
     """
     Trova il file .jar di Forge che contiene 'forge' nel nome, nella directory specificata.
+    Se è disponibile l'indice dell'installazione la ricerca non legge il disco.
     """
-    pattern = f"{install_directory}/forge-{game_version}-{forge_version}/*forge*.jar"
-    logger.debug(f"Cercando file jar di Forge con pattern: {pattern}")  # Aggiunto log per il debug
-    
-    jar_files = glob.glob(pattern)
+    forge_directory = os.path.join(install_directory, f"forge-{game_version}-{forge_version}")
+    if index is None or os.path.normpath(index["root"]) != os.path.normpath(forge_directory):
+        index = scan_install_directory(forge_directory, recursive=False)
+
+    # Solo i file nella radice dell'installazione, come il pattern <directory>/*forge*.jar
+    jar_files = sorted(path for path in index["files"]
+                       if os.sep not in path and "forge" in path and path.endswith(".jar"))
     logger.debug(f"File jar trovati: {jar_files}")  # Log dei file trovati
 
     if jar_files:
-        logger.info(f"File jar di Forge trovato: {jar_files[0]}")  # Log del file selezionato
-        return jar_files[0]  # Restituisce il primo file trovato che corrisponde al pattern
+        forge_jar_path = os.path.join(forge_directory, jar_files[0])
+        logger.info(f"File jar di Forge trovato: {forge_jar_path}")  # Log del file selezionato
+        return forge_jar_path  # Restituisce il primo file trovato che corrisponde al pattern
     else:
         logger.error("File jar di Forge non trovato.")  # Log in caso di errore
         return None
 
-# Scarica e modifica il file di configurazione
-def download_and_modify_config(config_url, config_filename, game_version, forge_version, install_directory):
+# Scrive un file di configurazione di Multicraft sostituendolo atomicamente
+def write_config_file(config_path, content, owner=None):
     """
-    Scarica e modifica il file di configurazione.
+    Scrive content in un file temporaneo, lo assegna a owner (utente, gruppo) se indicato e
+    lo script è eseguito come root, e lo rinomina in config_path, così Multicraft non legge
+    mai un file di configurazione incompleto.
     """
-    logger.debug("Inizio della funzione download_and_modify_config")
-    config_path = os.path.join(install_directory.rstrip("/"), config_filename)
-    logger.debug(f"Percorso del file di configurazione: {config_path}")
-    category_value = f"[Forge] {game_version}"
+    temp_path = f"{config_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'w') as file:
+            file.write(content)
+        if owner and owner[0] and os.geteuid() == 0:
+            shutil.chown(temp_path, *owner)
+        os.replace(temp_path, config_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+# Analizza il testo di un file .jar.conf in una lista di righe
+def parse_config_template(text):
+    """
+    Ritorna una lista con una voce per riga: (chiave, valore) per le impostazioni 'chiave = valore'
+    e (None, riga) per intestazioni delle sezioni, commenti e righe vuote, che vengono mantenuti.
+    """
+    entries = []
+    for line in text.splitlines():
+        key, separator, value = line.partition("=")
+        if separator and key.strip() and not line.lstrip().startswith(("#", ";", "[")):
+            entries.append((key.strip(), value.strip()))
+        else:
+            entries.append((None, line))
+    return entries
 
-    command_value = ""
-    # Comando per le versioni tra 1.5.2 e 1.17.1
-    if version.parse("1.5.2") <= version.parse(game_version) < version.parse("1.17.1"):
-        forge_jar_path = find_forge_jar(install_directory, game_version, forge_version)
+# Carica il template del file .jar.conf senza accessi alla rete
+def load_config_template():
+    """
+    Usa, nell'ordine, la copia locale in CONFIG_TEMPLATE_PATH e la risposta di MULTICRAFT_CONFIG_URL
+    già presente nella cache HTTP. Se nessuna delle due è disponibile il template viene scaricato
+    una sola volta e salvato in CONFIG_TEMPLATE_PATH; solo se il download non riesce viene usato,
+    con un avviso, il template predefinito DEFAULT_CONFIG_TEMPLATE.
+    Il template viene analizzato una sola volta per processo.
+    """
+    global config_template
+    with config_template_lock:
+        if config_template is not None:
+            return config_template
+
+        text, source = None, None
+        try:
+            with open(CONFIG_TEMPLATE_PATH, 'r') as file:
+                text, source = file.read(), CONFIG_TEMPLATE_PATH
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Template del file di configurazione non leggibile ({CONFIG_TEMPLATE_PATH}): {e}")
+
+        if text is None:
+            entry = read_http_cache_entry(hashlib.sha1(f"GET {MULTICRAFT_CONFIG_URL}".encode()).hexdigest())
+            if entry and entry["status"] == 200:
+                text, source = http_entry_text(entry), MULTICRAFT_CONFIG_URL
+
+        if text is None:
+            logger.info(f"Template del file di configurazione non presente in locale, download da {MULTICRAFT_CONFIG_URL}")
+            text, source = download_config_template(), MULTICRAFT_CONFIG_URL
+
+        if text is None:
+            logger.warning("Template di Multicraft non disponibile: i file .jar.conf vengono generati dal template predefinito, "
+                           "che contiene solo le impostazioni essenziali ('configs --refresh-template' per aggiornarli)")
+            text, source = DEFAULT_CONFIG_TEMPLATE, "predefinito"
+
+        config_template = parse_config_template(text)
+        logger.debug(f"Template del file di configurazione caricato ({source}): {len(config_template)} righe")
+        return config_template
+
+# Scarica il template del file .jar.conf di Multicraft e ne salva una copia locale
+def download_config_template():
+    """
+    Ritorna il testo del template scaricato, oppure None se il download non riesce.
+    Se la copia locale non può essere salvata il testo viene comunque ritornato.
+    """
+    response = cached_http_request(MULTICRAFT_CONFIG_URL, ttl=0, stale_while_revalidate=0)
+    if response is None or response["status"] != 200:
+        logger.error(f"Errore durante il download del template del file di configurazione da {MULTICRAFT_CONFIG_URL}")
+        return None
+
+    text = http_entry_text(response)
+    try:
+        os.makedirs(os.path.dirname(CONFIG_TEMPLATE_PATH), exist_ok=True)
+        write_file_atomically(CONFIG_TEMPLATE_PATH, text)
+    except OSError as e:
+        logger.error(f"Impossibile salvare il template del file di configurazione in {CONFIG_TEMPLATE_PATH}: {e}")
+    return text
+
+# Aggiorna la copia locale del template del file .jar.conf
+def refresh_config_template():
+    global config_template
+    if download_config_template() is None or not os.path.isfile(CONFIG_TEMPLATE_PATH):
+        return False
+
+    with config_template_lock:
+        config_template = None
+    logger.info(f"Template del file di configurazione aggiornato: {CONFIG_TEMPLATE_PATH}")
+    return True
+
+# Rileva la versione principale di Java installata (8, 11, 17, 21, ...)
+@functools.lru_cache(maxsize=None)
+def detect_java_version(java_executable=JAVA_EXECUTABLE):
+    """
+    Esegue 'java -version' una sola volta per processo e ne legge la versione, sia nel
+    formato 1.x (Java 8 e precedenti) sia in quello attuale. Ritorna None se Java non è
+    disponibile o la versione non è riconosciuta.
+    """
+    try:
+        completed = subprocess.run([java_executable, "-version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=30)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"Impossibile rilevare la versione di Java: {e}")
+        return None
+
+    match = re.search(r'version "(?:1\.)?(\d+)', completed.stdout.decode(errors="replace"))
+    if not match:
+        logger.warning("Versione di Java non riconosciuta")
+        return None
+    logger.debug(f"Versione di Java rilevata: {match.group(1)}")
+    return int(match.group(1))
+
+# Sceglie il profilo della JVM per una versione di Minecraft
+def choose_jvm_profile(game_version, requested=JVM_PROFILE_AUTO, java_version=None):
+    """
+    Con 'auto' le versioni legacy (< 1.5.2) e Java non rilevato o precedente a Java 8 usano
+    'default', le altre il profilo G1 ottimizzato. Un profilo richiesto esplicitamente che
+    la versione di Java rilevata non supporta viene sostituito dalla scelta automatica.
+    Ritorna il nome del profilo.
+    """
+    if requested != JVM_PROFILE_AUTO:
+        minimum = JVM_PROFILES[requested]["min_java"]
+        if java_version is None or java_version >= minimum:
+            return requested
+        logger.warning(f"Il profilo JVM '{requested}' richiede Java {minimum} (rilevato Java {java_version}): uso la scelta automatica")
+
+    if install_strategy(game_version) == STRATEGY_UNIVERSAL or java_version is None or java_version < JVM_PROFILES["g1"]["min_java"]:
+        return "default"
+    return "g1"
+
+# Ritorna le opzioni della JVM di un profilo per la versione di Java indicata
+def jvm_profile_options(profile, java_version=None):
+    options = list(JVM_PROFILES[profile]["options"])
+    # In Java 21 e 22 ZGC generazionale va abilitato esplicitamente, dalla 23 è l'unica modalità
+    if profile == "zgc" and java_version in (21, 22):
+        options.append("-XX:+ZGenerational")
+    return options
+
+# Legge il profilo della JVM registrato in un file .jar.conf generato dallo script
+def read_jvm_profile_marker(content):
+    """
+    Ritorna il profilo richiesto alla generazione del file: il nome del profilo se scelto
+    esplicitamente (anche se sostituito perché non supportato dalla versione di Java),
+    'auto' se scelto automaticamente, None se il file non lo indica.
+    """
+    for line in content.splitlines():
+        if line.startswith(JVM_PROFILE_MARKER):
+            match = re.fullmatch(r"\s*(\S+)(?:\s+\((auto|richiesto (\S+))\))?\s*", line[len(JVM_PROFILE_MARKER):])
+            if not match:
+                return None
+            requested = JVM_PROFILE_AUTO if match.group(2) == "auto" else match.group(3) or match.group(1)
+            return requested if requested in JVM_PROFILES or requested == JVM_PROFILE_AUTO else None
+    return None
+
+# Costruisce il comando di avvio di una versione di Forge per il file .jar.conf
+def forge_launch_command(game_version, forge_version, forge_jar_file=None, jvm_options=()):
+    """
+    Ritorna il comando nei tre formati: server.jar modificato (< 1.5.2), jar di Forge
+    creato dall'installer (1.5.2 - 1.17.1, forge_jar_file è il nome del file) e file di
+    argomenti unix_args.txt (>= 1.17.1). jvm_options viene aggiunto alle opzioni comuni.
+    Ritorna None se manca il jar di Forge.
+    """
+    install_path = f"{{JAR_DIR}}/forge-{game_version}-{forge_version}"
+    java_options = " ".join([JVM_BASE_OPTIONS, *jvm_options])
+    strategy = install_strategy(game_version)
+    if strategy == STRATEGY_ARGS_FILE:
+        return f'"{{JAVA}}" {java_options} "@{install_path}/unix_args.txt"'
+    if strategy == STRATEGY_INSTALLER:
+        if not forge_jar_file:
+            return None
+        return f'"{{JAVA}}" {java_options} -jar "{install_path}/{forge_jar_file}" nogui'
+    return f'"{{JAVA}}" {java_options} -jar "{install_path}/server.jar" nogui'
+
+# Genera il contenuto del file .jar.conf di una versione di Forge dal template
+def render_forge_config(game_version, forge_version, forge_jar_file=None, template=None, jvm_profile=JVM_PROFILE_AUTO, shared_archive=False):
+    """
+    Imposta nome, categoria e comando di avvio e svuota source e configSource, lasciando
+    invariate le altre righe del template. Il profilo della JVM (JVM_PROFILES, oppure 'auto')
+    viene applicato al comando e registrato in un commento prima di esso; con shared_archive
+    il comando usa l'archivio CDS dell'installazione. Non accede né alla rete né al disco se
+    il template e la versione di Java sono già noti.
+    Ritorna None se il comando di avvio non può essere costruito.
+    """
+    java_version = detect_java_version()
+    profile = choose_jvm_profile(game_version, jvm_profile, java_version)
+    jvm_options = jvm_profile_options(profile, java_version)
+    if shared_archive and (java_version is None or java_version >= CDS_MIN_JAVA):
+        jvm_options.append(f"-XX:SharedArchiveFile={{JAR_DIR}}/forge-{game_version}-{forge_version}/{CDS_ARCHIVE_FILENAME}")
+    command_value = forge_launch_command(game_version, forge_version, forge_jar_file, jvm_options)
+    if command_value is None:
+        return None
+
+    values = {
+        "name": forge_version,
+        "category": f"[Forge] {game_version}",
+        "command": command_value,
+        "source": "",
+        "configSource": "",
+    }
+    lines = []
+    for key, value in template or load_config_template():
+        if key is None:
+            if not value.startswith(JVM_PROFILE_MARKER):
+                lines.append(value)
+            continue
+        if key == "command":
+            requested = "(auto)" if jvm_profile == JVM_PROFILE_AUTO else "" if jvm_profile == profile else f"(richiesto {jvm_profile})"
+            lines.append(f"{JVM_PROFILE_MARKER} {profile} {requested}".rstrip())
+        if key in values:
+            lines.append(f"{key} = {values[key]}" if values[key] else f"{key} = ")
+        else:
+            lines.append(f"{key} = {value}")
+    return "\n".join(lines)
+
+# Genera il contenuto del file di configurazione di una versione di Forge installata
+def forge_config_content(game_version, forge_version, install_directory, install_index=None, jvm_profile=JVM_PROFILE_AUTO):
+    """
+    Ritorna il contenuto del file forge-<mc>-<forge>.jar.conf per l'installazione presente in
+    install_directory (jar di Forge e archivio CDS inclusi), oppure None se non può essere generato.
+    install_index è l'indice della directory dell'installazione, se già disponibile.
+    """
+    forge_jar_file = None
+    if install_strategy(game_version) == STRATEGY_INSTALLER:
+        forge_jar_path = find_forge_jar(install_directory, game_version, forge_version, install_index)
         if forge_jar_path is None:
-            logger.error("File jar di Forge non trovato.")
-            return False
+            return None
         forge_jar_file = os.path.basename(forge_jar_path)
-        command_value = f'"{{JAVA}}" -Xmx{{MAX_MEMORY}}M -Xms{{START_MEMORY}}M -Djline.terminal=jline.UnsupportedTerminal -jar "{{JAR_DIR}}/forge-{game_version}-{forge_version}/{forge_jar_file}" nogui'
-    # Comando per le versioni senza file .jar, uguali o superiori alla 1.17.1
-    elif version.parse(game_version) >= version.parse("1.17.1"):
-        command_value = f'"{{JAVA}}" -Xmx{{MAX_MEMORY}}M -Xms{{START_MEMORY}}M -Djline.terminal=jline.UnsupportedTerminal "@{{JAR_DIR}}/forge-{game_version}-{forge_version}/unix_args.txt"'
-    # Comando per le versioni inferiori alla 1.5.2
-    else:
-        command_value = f'"{{JAVA}}" -Xmx{{MAX_MEMORY}}M -Xms{{START_MEMORY}}M -Djline.terminal=jline.UnsupportedTerminal -jar "{{JAR_DIR}}/forge-{game_version}-{forge_version}/server.jar" nogui'
-
-    try:
-        logger.debug(f"Tentativo di scaricare il file di configurazione da: {config_url}")
-        response = requests.get(config_url)
-        response.raise_for_status()
-        logger.info("File di configurazione scaricato con successo.")
-
-        content = response.text.splitlines()
-        modified_content = []
-        for line in content:
-            if line.startswith("name ="):
-                modified_content.append(f"name = {forge_version}")
-            elif line.startswith("category ="):
-                modified_content.append(f"category = {category_value}")
-            elif line.startswith("command ="):
-                modified_content.append(f"command = {command_value}")
-            elif line.startswith("source =") or line.startswith("configSource ="):
-                modified_content.append(line.split('=')[0] + "= ")
-            else:
-                modified_content.append(line)
 
-        with open(config_path, 'w') as file:
-            file.write("\n".join(modified_content))
-        logger.info(f"File di configurazione modificato e salvato in: {config_path}")
+    shared_archive = os.path.isfile(cds_archive_path(install_directory, game_version, forge_version))
+    return render_forge_config(game_version, forge_version, forge_jar_file, jvm_profile=jvm_profile, shared_archive=shared_archive)
 
-    except requests.RequestException as e:
-        logger.error(f"Errore durante il download del file di configurazione: {e}")
-        return False
+# Genera e scrive il file di configurazione di una versione di Forge
+@measured_stage("config")
+def write_forge_config(game_version, forge_version, install_directory, install_index=None, owner=None, jvm_profile=JVM_PROFILE_AUTO):
+    """
+    Genera il file forge-<mc>-<forge>.jar.conf dal template, senza accessi alla rete.
+    install_index è l'indice della directory dell'installazione, se già disponibile.
+    Il file viene scritto in un file temporaneo, assegnato a owner (utente, gruppo) se indicato,
+    e poi rinominato, così Multicraft non legge mai un file di configurazione incompleto.
+    """
+    config_path = os.path.join(install_directory.rstrip("/"), f"forge-{game_version}-{forge_version}.jar.conf")
+    logger.debug(f"Percorso del file di configurazione: {config_path}")
+
+    try:
+        content = forge_config_content(game_version, forge_version, install_directory, install_index, jvm_profile)
+        if content is None:
+            return False
+        write_config_file(config_path, content, owner)
+        logger.info(f"File di configurazione generato e salvato in: {config_path}")
     except Exception as e:
-        logger.error(f"Errore generico durante la modifica del file di configurazione: {e}")
+        logger.error(f"Errore generico durante la scrittura del file di configurazione: {e}")
         return False
-
-    logger.debug("Fine della funzione download_and_modify_config")
     return True
 
+# Rigenera i file .jar.conf delle versioni installate
+def regenerate_forge_configs(install_directory, targets=None, max_workers=CONFIG_WORKERS, dry_run=False, jvm_profile=None):
+    """
+    Rigenera dal template i file .jar.conf di tutte le versioni installate (o solo delle coppie
+    (game_version, forge_version) in targets), ad esempio dopo un aggiornamento del template o
+    delle opzioni della JVM. Se jvm_profile non è indicato ogni file mantiene il profilo della
+    JVM con cui è stato generato ('auto' viene rivalutato con la versione di Java attuale).
+    I file vengono generati in parallelo e riscritti atomicamente solo se il contenuto cambia,
+    mantenendo il proprietario della daemon jar directory.
+    Ritorna un riepilogo con l'esito di ogni versione: 'updated', 'unchanged' o 'failed'.
+    """
+    start_time = time.monotonic()
+    inventory = update_inventory(install_directory)
+    pairs = sorted((record["game_version"], record["forge_version"])
+                   for record in inventory["installs"].values() if record["state"] == "installed")
+    if targets is not None:
+        targets = set(targets)
+        pairs = [pair for pair in pairs if pair in targets]
+    template = load_config_template()
+    owner = get_directory_owner(install_directory)
+    # La versione di Java viene rilevata una sola volta, prima di generare i file in parallelo
+    detect_java_version()
+
+    def regenerate(pair):
+        game_version, forge_version = pair
+        result = {"game_version": game_version, "forge_version": forge_version, "status": "failed"}
+        config_path = os.path.join(install_directory, f"forge-{game_version}-{forge_version}.jar.conf")
+        try:
+            forge_jar_file = None
+            if install_strategy(game_version) == STRATEGY_INSTALLER:
+                forge_jar_path = find_forge_jar(install_directory, game_version, forge_version)
+                forge_jar_file = forge_jar_path and os.path.basename(forge_jar_path)
+            with open(config_path, 'r') as file:
+                current_content = file.read()
+            profile = jvm_profile or read_jvm_profile_marker(current_content) or JVM_PROFILE_AUTO
+            shared_archive = os.path.isfile(cds_archive_path(install_directory, game_version, forge_version))
+            content = render_forge_config(game_version, forge_version, forge_jar_file, template, profile, shared_archive)
+            if content is None:
+                return result
+            if current_content == content:
+                result["status"] = "unchanged"
+                return result
+            if not dry_run:
+                write_config_file(config_path, content, owner)
+            result["status"] = "updated"
+        except OSError as e:
+            logger.error(f"Errore durante la rigenerazione di {config_path}: {e}")
+        return result
+
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(regenerate, pairs))
+
+    summary = {"install_directory": install_directory, "dry_run": dry_run,
+               "elapsed_seconds": round(time.monotonic() - start_time, 3), "results": results}
+    for status in ("updated", "unchanged", "failed"):
+        summary[status] = sum(1 for result in results if result["status"] == status)
+    logger.info(f"File di configurazione rigenerati: {summary['updated']} aggiornati, {summary['unchanged']} invariati, {summary['failed']} non riusciti")
+    return summary
+
+# Percorso dell'archivio CDS di un'installazione
+def cds_archive_path(install_directory, game_version, forge_version):
+    return os.path.join(install_directory, f"forge-{game_version}-{forge_version}", CDS_ARCHIVE_FILENAME)
+
+# Prepara un mondo usa e getta per l'avvio di prova del server
+def prepare_training_world(directory, game_version):
+    """
+    Crea nella directory eula.txt e server.properties per un server non raggiungibile
+    dall'esterno (porta libera su localhost, modalità offline) con un mondo piatto,
+    che viene generato rapidamente.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    level_type = "minecraft\\:flat" if version_sort_key(game_version) >= version_sort_key("1.19") else "FLAT"
+    properties = {
+        "server-ip": "127.0.0.1",
+        "server-port": port,
+        "online-mode": "false",
+        "level-name": "cds-training",
+        "level-type": level_type,
+        "generate-structures": "false",
+        "spawn-npcs": "false",
+        "spawn-animals": "false",
+        "spawn-monsters": "false",
+        "enable-query": "false",
+        "enable-rcon": "false",
+        "max-players": 1,
+    }
+    with open(os.path.join(directory, "eula.txt"), 'w') as file:
+        file.write("eula=true\n")
+    with open(os.path.join(directory, "server.properties"), 'w') as file:
+        file.write("".join(f"{key}={value}\n" for key, value in properties.items()))
+
+# Avvia il server finché non ha terminato il caricamento e poi lo arresta
+def run_training_server(arguments, work_directory, process_options, timeout=CDS_TRAINING_TIMEOUT):
+    """
+    Avvia il server con gli argomenti indicati nella directory del mondo di prova, attende
+    il messaggio 'Done (...)' e invia il comando 'stop', così la JVM termina normalmente
+    (necessario per scrivere l'archivio CDS). Oltre timeout secondi il processo viene terminato.
+    Ritorna i secondi trascorsi fino al termine del caricamento, oppure None se il server
+    non è arrivato al termine del caricamento o non si è arrestato correttamente.
+    """
+    start_time = time.monotonic()
+    ready_seconds = None
+    process = subprocess.Popen(arguments, cwd=work_directory, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT, **process_options)
+    timer = threading.Timer(timeout, process.kill)
+    timer.start()
+    try:
+        for line in process.stdout:
+            if ready_seconds is None and re.search(rb"Done \(\d", line):
+                ready_seconds = time.monotonic() - start_time
+                logger.debug(f"Server avviato in {ready_seconds:.1f} secondi, arresto in corso")
+                process.stdin.write(b"stop\n")
+                process.stdin.flush()
+        process.wait()
+    finally:
+        timer.cancel()
+        process.stdout.close()
+        process.stdin.close()
+
+    if process.returncode != 0:
+        logger.error(f"L'avvio di prova del server è terminato con codice {process.returncode}")
+        return None
+    return ready_seconds
+
+# Crea l'archivio CDS di un'installazione con un avvio di prova del server
+@measured_stage("cds")
+def build_cds_archive(game_version, forge_version, install_directory, jvm_profile=JVM_PROFILE_AUTO):
+    """
+    Avvia il server installato su un mondo usa e getta con -XX:ArchiveClassesAtExit, così la JVM
+    salva nell'archivio CDS le classi di Minecraft e Forge caricate all'avvio. Questo avvio, più
+    lento per la registrazione delle classi, fa anche da riscaldamento (file già nella cache del
+    sistema) e non viene misurato. Seguono CDS_TIMING_RUNS avvii senza archivio e altrettanti con
+    -XX:SharedArchiveFile, alternati e ognuno su un mondo nuovo, e il miglioramento del tempo di
+    avvio è calcolato sulle mediane. L'archivio viene salvato nella directory dell'installazione
+    solo se tutti gli avvii riescono. Richiede Java 13 o superiore e non è disponibile per le versioni legacy (< 1.5.2).
+    Ritorna un riepilogo con i tempi di avvio senza e con l'archivio, oppure None.
+    """
+    java_version = detect_java_version()
+    if java_version is None or java_version < CDS_MIN_JAVA:
+        logger.warning(f"L'archivio CDS richiede Java {CDS_MIN_JAVA} o superiore (rilevato: {java_version or 'nessuno'})")
+        return None
+    strategy = install_strategy(game_version)
+    if strategy == STRATEGY_UNIVERSAL:
+        logger.warning(f"L'archivio CDS non è disponibile per le versioni di Minecraft precedenti alla {INSTALLER_MIN_GAME_VERSION}")
+        return None
+
+    install_name = f"forge-{game_version}-{forge_version}"
+    if strategy == STRATEGY_ARGS_FILE:
+        launch_arguments = [f"@{os.path.join(install_directory, install_name, 'unix_args.txt')}", "nogui"]
+    else:
+        forge_jar_path = find_forge_jar(install_directory, game_version, forge_version)
+        if forge_jar_path is None:
+            return None
+        launch_arguments = ["-jar", forge_jar_path, "nogui"]
+
+    profile = choose_jvm_profile(game_version, jvm_profile, java_version)
+    java_options = [JAVA_EXECUTABLE, f"-Xmx{CDS_TRAINING_MEMORY_MB}M", f"-Xms{CDS_TRAINING_MEMORY_MB}M",
+                    *jvm_profile_options(profile, java_version)]
+    archive_path = cds_archive_path(install_directory, game_version, forge_version)
+    temp_archive_path = f"{archive_path}.{os.getpid()}.tmp"
+    work_directory = tempfile.mkdtemp(prefix="mfi-cds-")
+    logger.info(f"Avvio di prova di Forge {game_version}-{forge_version} per creare l'archivio CDS")
+
+    runs = [("training", [f"-XX:ArchiveClassesAtExit={temp_archive_path}"])]
+    for number in range(CDS_TIMING_RUNS):
+        runs += [(f"baseline-{number}", []), (f"archived-{number}", [f"-XX:SharedArchiveFile={temp_archive_path}"])]
+    timings = {"baseline": [], "archived": []}
+
+    try:
+        for name, _ in runs:
+            prepare_training_world(os.path.join(work_directory, name), game_version)
+        process_options = installer_process_options(install_directory, [work_directory])
+
+        # Il primo avvio registra le classi caricate e le salva nell'archivio all'uscita;
+        # gli altri, su mondi nuovi, misurano lo stesso lavoro senza e con l'archivio
+        for name, archive_options in runs:
+            seconds = run_training_server(java_options + archive_options + launch_arguments,
+                                          os.path.join(work_directory, name), process_options)
+            if name == "training" and (seconds is None or not os.path.isfile(temp_archive_path)):
+                logger.error(f"Archivio CDS non creato per Forge {game_version}-{forge_version}")
+                return None
+            if seconds is None:
+                logger.error(f"Avvio di prova '{name}' di Forge {game_version}-{forge_version} non riuscito")
+                return None
+            if name != "training":
+                timings[name.partition("-")[0]].append(seconds)
+        baseline_seconds = statistics.median(timings["baseline"])
+        archived_seconds = statistics.median(timings["archived"])
+
+        user, group = get_directory_owner(install_directory)
+        if user and os.geteuid() == 0:
+            shutil.chown(temp_archive_path, user, group)
+        os.replace(temp_archive_path, archive_path)
+    except OSError as e:
+        logger.error(f"Errore durante la creazione dell'archivio CDS di Forge {game_version}-{forge_version}: {e}")
+        return None
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+        if os.path.exists(temp_archive_path):
+            os.remove(temp_archive_path)
+
+    report = {
+        "archive": archive_path,
+        "archive_bytes": os.path.getsize(archive_path),
+        "java_version": java_version,
+        "jvm_profile": profile,
+        "baseline_seconds": round(baseline_seconds, 3),
+        "archived_seconds": round(archived_seconds, 3),
+        "timing_runs": CDS_TIMING_RUNS,
+        "improvement_percent": round((baseline_seconds - archived_seconds) / baseline_seconds * 100, 1) if baseline_seconds else 0.0,
+    }
+    logger.info(f"Archivio CDS di Forge {game_version}-{forge_version} creato: avvio da {report['baseline_seconds']} a "
+                f"{report['archived_seconds']} secondi ({report['improvement_percent']}%)")
+    return report
+
+# Crea gli archivi CDS di versioni già installate e aggiorna i loro file .jar.conf
+def build_cds_archives(targets, install_directory, jvm_profile=None):
+    """
+    Gli avvii di prova vengono eseguiti uno alla volta, perché i tempi di avvio misurati non
+    siano falsati da altri server in esecuzione. Se jvm_profile non è indicato viene usato il
+    profilo registrato nel file .jar.conf di ogni versione.
+    Ritorna una lista con l'esito di ogni versione: 'created' o 'failed'.
+    """
+    results = []
+    for game_version, forge_version in targets:
+        result = {"game_version": game_version, "forge_version": forge_version, "status": "failed", "cds": None}
+        config_path = os.path.join(install_directory, f"forge-{game_version}-{forge_version}.jar.conf")
+        try:
+            with open(config_path, 'r') as file:
+                profile = jvm_profile or read_jvm_profile_marker(file.read()) or JVM_PROFILE_AUTO
+        except OSError as e:
+            logger.error(f"Forge {game_version}-{forge_version} non è installato in {install_directory}: {e}")
+            results.append(result)
+            continue
+
+        result["cds"] = build_cds_archive(game_version, forge_version, install_directory, profile)
+        if result["cds"] and regenerate_forge_configs(install_directory, [(game_version, forge_version)], jvm_profile=profile)["failed"] == 0:
+            result["status"] = "created"
+        results.append(result)
+    return results
+
 # Rimuove la directory temporanea specificata e tutto il suo contenuto
 def remove_temp_directory(temp_dir_name):
     """
@@ -659,38 +3828,728 @@ def remove_temp_directory(temp_dir_name):
     logger.debug("Fine della procedura di rimozione della directory temporanea")
 
 # Rimuove tutti i file .log nella directory specificata
-def remove_log_files(directory):
+def remove_log_files(directory, index=None):
     """
     Rimuove tutti i file .log nella directory specificata.
     """
     logger.debug(f"Cercando file .log in: {directory}")
-    log_files = glob.glob(os.path.join(directory, "*.log"))
+    if index is None or index["root"] != directory:
+        index = scan_install_directory(directory, recursive=False)
+    log_files = sorted(path for path in index["files"] if os.sep not in path and path.endswith(".log"))
 
     if not log_files:
         logger.info("Nessun file .log trovato per la rimozione.")
         return
 
-    for file in log_files:
+    for file_name in log_files:
+        file = os.path.join(directory, file_name)
         try:
             os.remove(file)
+            discard_from_index(index, file_name)
             logger.info(f"File log rimosso: {file}")
         except OSError as e:
             logger.error(f"Errore nella rimozione del file log {file}: {e}")
 
+# Esegue una funzione bloccante rispettando i limiti di concorrenza globali e per host
+async def run_limited(executor, global_limit, host_limits, url, function, *args):
+    host = urlsplit(url).netloc
+    if host not in host_limits:
+        host_limits[host] = asyncio.Semaphore(RESOLVER_MAX_PER_HOST)
+
+    async with global_limit, host_limits[host]:
+        # get_event_loop ritorna il loop in esecuzione nel thread del risolutore (get_running_loop richiede Python 3.7)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(executor, function, *args)
+
+# Esegue una coroutine del risolutore sull'event loop condiviso
+def run_resolver(coroutine_function, *args):
+    """
+    L'event loop gira in un thread in background e i lavori bloccanti vengono eseguiti in un
+    unico pool di RESOLVER_MAX_CONCURRENCY thread, entrambi creati al primo utilizzo: le
+    installazioni che verificano i propri link (anche da più thread contemporaneamente) non
+    creano ogni volta un nuovo event loop e un nuovo pool di thread.
+    Attende il termine della coroutine e ne ritorna il risultato.
+    """
+    global resolver_loop, resolver_executor
+
+    with resolver_lock:
+        if resolver_loop is None:
+            resolver_executor = futures.ThreadPoolExecutor(max_workers=RESOLVER_MAX_CONCURRENCY, thread_name_prefix="resolver")
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="resolver-loop", daemon=True).start()
+            resolver_loop = loop
+            logger.debug("Event loop del risolutore avviato")
+
+    return asyncio.run_coroutine_threadsafe(coroutine_function(*args), resolver_loop).result()
+
+# Risolve in modo concorrente le pagine index_<mc>.html
+async def fetch_version_data_async(version_links):
+    """
+    Scarica e analizza contemporaneamente le pagine index_<mc>.html indicate.
+    Ritorna un dizionario {link: [versioni di Forge]} nello stesso ordine dei link.
+    """
+    global_limit = asyncio.Semaphore(RESOLVER_MAX_CONCURRENCY)
+    host_limits = {}
+    results = await asyncio.gather(*[
+        run_limited(resolver_executor, global_limit, host_limits, link, get_version_data, link)
+        for link in version_links
+    ])
+    return dict(zip(version_links, results))
+
+# Verifica in modo concorrente i link degli artefatti di più versioni di Forge
+async def resolve_install_targets_async(targets):
+    """
+    Per ogni coppia (game_version, forge_version) verifica contemporaneamente i link
+    necessari all'installazione (installer, oppure universal e server vanilla), saltando
+    quelli degli artefatti già presenti nella cache.
+    Ritorna una lista di dizionari con i link, nello stesso ordine dei target.
+    """
+    global_limit = asyncio.Semaphore(RESOLVER_MAX_CONCURRENCY)
+    host_limits = {}
+
+    async def probe(cache_key, url, link_function, *args):
+        if is_artifact_cached(cache_key):
+            return None, True
+        link = await run_limited(resolver_executor, global_limit, host_limits, url, link_function, *args)
+        if link:
+            # Scarica in anticipo i file di checksum usati per verificare il download
+            await run_limited(resolver_executor, global_limit, host_limits, link, get_expected_hashes, link)
+        return link, False
+
+    async def resolve_target(game_version, forge_version):
+        links = {}
+        if install_strategy(game_version) != STRATEGY_UNIVERSAL:
+            links["installer_link"], links["installer_cached"] = await probe(
+                artifact_cache_key("forge", game_version, forge_version, "installer"),
+                FORGE_MAVEN_URL, get_installer_link, game_version, forge_version)
+        else:
+            (links["universal_link"], links["universal_cached"]), (links["vanilla_link"], links["vanilla_cached"]) = await asyncio.gather(
+                probe(artifact_cache_key("forge", game_version, forge_version, "universal"),
+                      FORGE_MAVEN_URL, get_universal_link, game_version, forge_version),
+                probe(artifact_cache_key("minecraft", game_version, "server"),
+                      MULTICRAFT_VANILLA_URL, get_vanilla_link, game_version),
+            )
+        return links
+
+    return await asyncio.gather(*[resolve_target(*target) for target in targets])
+
+# Scarica e analizza in parallelo le pagine index_<mc>.html
+def fetch_all_version_data(version_links):
+    return run_resolver(fetch_version_data_async, version_links)
+
+# Verifica in parallelo i link di installazione di più versioni di Forge
+def resolve_install_targets(targets):
+    start_time = time.monotonic()
+    results = run_resolver(resolve_install_targets_async, targets)
+    logger.info(f"Link di {len(targets)} versioni verificati in {time.monotonic() - start_time:.2f} secondi")
+    return results
+
+# Ritorna tutte le coppie (versione di Minecraft, versione di Forge) disponibili
+def get_all_forge_versions(version_links):
+    """
+    Ritorna tutte le coppie (game_version, forge_version) usando il catalogo delle versioni,
+    oppure, se non è disponibile, scaricando contemporaneamente tutte le pagine index_<mc>.html.
+    """
+    catalogue = load_version_catalogue()
+    if catalogue:
+        return [(build.game_version, build.forge_version) for build in catalogue.builds]
+
+    all_versions = []
+    for link, forge_versions in fetch_all_version_data(version_links).items():
+        game_version = re.search(r"index_(.+)\.html$", link).group(1)
+        all_versions.extend((game_version, forge_version) for forge_version in forge_versions)
+    return all_versions
+
+# Installa una versione di Forge senza richiedere input all'utente
+@measured_stage("install")
+def install_forge_version(game_version, forge_version, install_directory, links=None, jvm_profile=JVM_PROFILE_AUTO):
+    """
+    Verifica i link, scarica gli artefatti ed esegue l'installazione di una versione di Forge.
+    Se links è indicato, usa i link già verificati da resolve_install_targets.
+    jvm_profile è il profilo della JVM usato nel comando di avvio ('auto' per la scelta automatica).
+    Ogni installazione usa una propria directory temporanea, quindi più installazioni
+    possono essere eseguite in parallelo.
+    Ritorna un dizionario con l'esito: status è 'installed', 'not-found' o 'failed'.
+    """
+    start_time = time.monotonic()
+    temp_dir_name = os.path.join(TEMP_DIR_NAME, f"forge-{game_version}-{forge_version}")
+    result = {"game_version": game_version, "forge_version": forge_version, "status": "failed", "error": None}
+
+    # Gli artefatti già nella cache non richiedono la verifica del link
+    if links is None:
+        links = resolve_install_targets([(game_version, forge_version)])[0]
+
+    if install_strategy(game_version) != STRATEGY_UNIVERSAL:
+        installer_key = artifact_cache_key("forge", game_version, forge_version, "installer")
+        installer_link, installer_cached = links["installer_link"], links["installer_cached"]
+        logger.info(f"Link Installer: {installer_link or 'cache locale'}")
+
+        if not (installer_link or installer_cached):
+            result["status"] = "not-found"
+            result["error"] = "Link Installer non trovato"
+        else:
+            filename = f"forge-{game_version}-{forge_version}-installer.jar"
+            downloaded_file_path = download_to_temp_folder(installer_link, filename, cache_key=installer_key, temp_dir_name=temp_dir_name,
+                                                           resolve_link=functools.partial(get_installer_link, game_version, forge_version))
+
+            if not downloaded_file_path:
+                result["error"] = "Non è stato possibile scaricare l'installer."
+            elif execute_java_installation(downloaded_file_path, game_version, forge_version, install_directory, temp_dir_name=temp_dir_name, jvm_profile=jvm_profile):
+                result["status"] = "installed"
+            else:
+                result["error"] = "Installazione con l'installer non riuscita."
+
+    else:
+        universal_key = artifact_cache_key("forge", game_version, forge_version, "universal")
+        vanilla_key = artifact_cache_key("minecraft", game_version, "server")
+        universal_link, universal_cached = links["universal_link"], links["universal_cached"]
+        vanilla_link, vanilla_cached = links["vanilla_link"], links["vanilla_cached"]
+        logger.info(f"Link Universal: {universal_link or 'cache locale'}, Link Vanilla: {vanilla_link or 'cache locale'}")
+
+        if not ((universal_link or universal_cached) and (vanilla_link or vanilla_cached)):
+            result["status"] = "not-found"
+            result["error"] = "Link Universal o Vanilla non trovato"
+        else:
+            # Il server vanilla viene preparato direttamente nella directory di staging dell'installazione
+            staging_directory = create_staging_directory(install_directory, f"forge-{game_version}-{forge_version}")
+            universal_filename = f"forge-{game_version}-{forge_version}-universal.zip"
+            downloaded_universal_path = download_to_temp_folder(universal_link, universal_filename, cache_key=universal_key, temp_dir_name=temp_dir_name,
+                                                                resolve_link=functools.partial(get_universal_link, game_version, forge_version))
+            vanilla_filename = "server.jar"
+            downloaded_vanilla_path = staging_directory and download_to_target_folder(
+                vanilla_link, vanilla_filename, install_directory, game_version, forge_version, cache_key=vanilla_key, target_directory=staging_directory,
+                resolve_link=functools.partial(get_vanilla_link, game_version))
+
+            if not (downloaded_universal_path and downloaded_vanilla_path):
+                result["error"] = "Non è stato possibile scaricare l'installer o il server vanilla."
+            elif not copy_contents_to_jar(downloaded_universal_path, downloaded_vanilla_path):
+                result["error"] = "Non è stato possibile unire universal e server vanilla."
+            elif execute_java_installation(downloaded_vanilla_path, game_version, forge_version, install_directory,
+                                           temp_dir_name=temp_dir_name, staging_directory=staging_directory, jvm_profile=jvm_profile):
+                result["status"] = "installed"
+            else:
+                result["error"] = "Installazione del server vanilla modificato non riuscita."
+            # execute_java_installation pubblica o elimina la directory di staging; qui resta solo se non è stata eseguita
+            remove_staging_directory(staging_directory)
+
+    # Gli hash pubblicati dell'artefatto di installazione vengono registrati nel catalogo
+    artifact_link = links.get("installer_link") or links.get("universal_link")
+    if result["status"] == "installed" and artifact_link:
+        md5, sha1 = get_expected_hashes(artifact_link) or (None, None)
+        annotate_version_catalogue(game_version, forge_version, md5=md5, sha1=sha1)
+
+    result["elapsed_seconds"] = round(time.monotonic() - start_time, 3)
+    count_metric("installs", status=result["status"])
+    logger.info(f"Esito installazione di Forge {game_version}-{forge_version}: {result['status']}")
+    return result
+
+# Installa più versioni di Forge in parallelo con un numero limitato di worker
+def batch_install(targets, install_directory, max_workers=BATCH_MAX_WORKERS, force=False, jvm_profile=JVM_PROFILE_AUTO, cds=False):
+    """
+    Installa in parallelo una lista di coppie (game_version, forge_version).
+    Download ed esecuzioni dell'installer Java di versioni diverse si sovrappongono,
+    entro il limite di max_workers installazioni contemporanee.
+    Le versioni già installate (secondo l'indice delle versioni installate) vengono saltate
+    con esito 'present', a meno che force sia True. Tutte le versioni usano il profilo
+    della JVM jvm_profile. Con cds, al termine delle installazioni viene creato l'archivio CDS
+    di ogni versione installata o già presente, con un avvio di prova alla volta.
+    Ritorna un riepilogo con l'esito di ogni versione, nello stesso ordine di targets.
+    """
+    start_time = time.monotonic()
+    logger.info(f"Installazione batch di {len(targets)} versioni con {max_workers} worker in {install_directory}")
+
+    # Risolve le versioni "latest" e "recommended" con il catalogo delle versioni;
+    # ogni esito occupa la posizione della sua versione nella lista dei target
+    results = [None] * len(targets)
+    pending = []
+    for position, (game_version, forge_version) in enumerate(targets):
+        if forge_version in ("latest", "recommended"):
+            catalogue = load_version_catalogue()
+            resolved_version = resolve_forge_version(catalogue, game_version, forge_version) if catalogue else None
+            if resolved_version is None:
+                results[position] = {"game_version": game_version, "forge_version": forge_version, "status": "not-found", "error": f"Versione '{forge_version}' non trovata"}
+                continue
+            forge_version = resolved_version
+        pending.append((position, (game_version, forge_version)))
+
+    # Le versioni già installate non vengono reinstallate
+    installed = set() if force else installed_forge_versions(install_directory)
+    for position, (game_version, forge_version) in pending:
+        if (game_version, forge_version) in installed:
+            logger.info(f"Forge {game_version}-{forge_version} è già installato, installazione saltata")
+            results[position] = {"game_version": game_version, "forge_version": forge_version, "status": "present", "error": None}
+    pending = [(position, target) for position, target in pending if results[position] is None]
+    resolved_targets = [target for _, target in pending]
+
+    # Verifica tutti i link contemporaneamente prima di avviare le installazioni
+    target_links = resolve_install_targets(resolved_targets)
+
+    def install_target(target, links):
+        game_version, forge_version = target
+        try:
+            return install_forge_version(game_version, forge_version, install_directory, links=links, jvm_profile=jvm_profile)
+        except Exception as e:
+            logger.error(f"Errore imprevisto durante l'installazione di Forge {game_version}-{forge_version}: {e}")
+            return {"game_version": game_version, "forge_version": forge_version, "status": "failed", "error": str(e)}
+
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for (position, _), result in zip(pending, executor.map(install_target, resolved_targets, target_links)):
+            results[position] = result
+
+    if cds:
+        installed_results = [result for result in results if result["status"] in ("installed", "present")]
+        cds_results = build_cds_archives([(result["game_version"], result["forge_version"]) for result in installed_results],
+                                         install_directory, None if jvm_profile == JVM_PROFILE_AUTO else jvm_profile)
+        for result, cds_result in zip(installed_results, cds_results):
+            result["cds"] = cds_result["cds"]
+
+    # Aggiunge le nuove installazioni all'indice delle versioni installate
+    if resolved_targets and os.path.isdir(install_directory):
+        try:
+            update_inventory(install_directory)
+        except OSError as e:
+            logger.warning(f"Impossibile aggiornare l'indice delle versioni installate: {e}")
+
+    summary = {
+        "install_directory": install_directory,
+        "installed": sum(1 for result in results if result["status"] == "installed"),
+        "present": sum(1 for result in results if result["status"] == "present"),
+        "failed": sum(1 for result in results if result["status"] not in ("installed", "present")),
+        "elapsed_seconds": round(time.monotonic() - start_time, 3),
+        "results": results,
+    }
+    logger.info(f"Installazione batch terminata: {summary['installed']} installate, {summary['present']} già presenti, {summary['failed']} non riuscite")
+    return summary
+
+# Legge l'elenco delle versioni da installare da un file manifest
+def load_install_manifest(manifest_path):
+    """
+    Legge un manifest con le versioni da installare. Sono supportati:
+    - JSON: una lista di oggetti {"game_version": ..., "forge_version": ...} o di stringhe "<mc>-<forge>";
+    - testo: una versione per riga nel formato "<mc> <forge>" o "<mc>-<forge>", con commenti '#'.
+    Ritorna una lista di coppie (game_version, forge_version).
+    """
+    with open(manifest_path, 'r') as file:
+        content = file.read()
+
+    if manifest_path.endswith(".json"):
+        entries = json.loads(content)
+    else:
+        entries = [line.split("#")[0].strip() for line in content.splitlines()]
+        entries = [entry for entry in entries if entry]
+
+    targets = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            targets.append((entry["game_version"], entry["forge_version"]))
+        else:
+            targets.append(parse_version_pair(entry))
+
+    logger.debug(f"Versioni lette dal manifest {manifest_path}: {targets}")
+    return targets
+
+# Converte una stringa "<mc>-<forge>", "<mc>:<forge>" o "<mc> <forge>" in una coppia di versioni
+def parse_version_pair(text):
+    for separator in (" ", ":", "-"):
+        if separator in text.strip():
+            game_version, forge_version = text.strip().split(separator, 1)
+            return game_version.strip(), forge_version.strip()
+    raise ValueError(f"Versione non valida: '{text}' (formato atteso: <mc>-<forge>)")
+
+# Riporta i percorsi delle librerie di unix_args.txt alla forma relativa scritta dall'installer di Forge
+def relative_unix_args(content, install_directory, install_name):
+    """
+    Sostituisce i percorsi assoluti della directory libraries dell'installazione e
+    dell'archivio condiviso con 'libraries', così il file non dipende dalla daemon jar
+    directory e modify_unix_args_file può riscriverlo sull'host in cui viene applicato.
+    """
+    target_libraries = os.path.join(install_directory, install_name, "libraries")
+    shared_directory = os.path.join(install_directory, SHARED_LIBRARIES_DIRNAME)
+    return content.replace(target_libraries, "libraries").replace(shared_directory, "libraries")
+
+# Aggiunge un file a un bundle calcolandone lo SHA1 durante la scrittura
+def add_file_to_bundle(bundle, source_path, name, data=None):
+    """
+    Copia source_path (o data, se indicato) nella voce name del bundle. I file già compressi
+    vengono salvati senza ricompressione. Ritorna (dimensione, SHA1).
+    """
+    info = zipfile.ZipInfo.from_file(source_path, name)
+    info.compress_type = zipfile.ZIP_STORED if name.endswith(BUNDLE_STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+    if data is not None:
+        bundle.writestr(info, data)
+        return len(data), hashlib.sha1(data).hexdigest()
+
+    sha1_obj = hashlib.sha1()
+    size = 0
+    with open(source_path, 'rb') as source, bundle.open(info, 'w') as target:
+        for chunk in iter(lambda: source.read(DOWNLOAD_CHUNK_SIZE), b""):
+            sha1_obj.update(chunk)
+            target.write(chunk)
+            size += len(chunk)
+    return size, sha1_obj.hexdigest()
+
+# Crea un bundle con un'installazione completa di Forge e il suo file .jar.conf
+@measured_stage("bundle")
+def build_forge_bundle(game_version, forge_version, output_path, install_directory=None):
+    """
+    Crea output_path, un archivio ZIP con la directory forge-<mc>-<forge>, il file
+    forge-<mc>-<forge>.jar.conf e un manifest.json con dimensione, SHA1 e permessi di ogni file.
+    I percorsi sono relativi alla daemon jar directory ({JAR_DIR}) e unix_args.txt viene salvato
+    con i percorsi relativi delle librerie. L'archivio CDS, legato alla JVM della macchina su cui
+    è stato creato, non viene incluso. Se la versione non è già installata in
+    install_directory, viene installata in una directory temporanea.
+    Accanto al bundle viene scritto <bundle>.sha1 con lo SHA1 dell'archivio.
+    Ritorna il manifest oppure None in caso di errore.
+    """
+    install_name = f"forge-{game_version}-{forge_version}"
+    config_name = f"{install_name}.jar.conf"
+    build_directory = None
+    if not (install_directory and os.path.isfile(os.path.join(install_directory, config_name))):
+        build_directory = tempfile.mkdtemp(prefix="multicraft-forge-bundle-")
+        logger.info(f"Installazione di Forge {game_version}-{forge_version} in {build_directory} per il bundle")
+        result = install_forge_version(game_version, forge_version, build_directory)
+        if result["status"] != "installed":
+            logger.error(f"Impossibile installare Forge {game_version}-{forge_version} per il bundle: {result['error']}")
+            shutil.rmtree(build_directory, ignore_errors=True)
+            return None
+        install_directory = build_directory
+
+    target_directory = os.path.join(install_directory, install_name)
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "game_version": game_version,
+        "forge_version": forge_version,
+        "install_name": install_name,
+        "config": config_name,
+        "created_at": time.time(),
+        "directories": [],
+        "files": [],
+    }
+
+    try:
+        index = scan_install_directory(target_directory)
+        manifest["directories"] = sorted(f"{install_name}/{path.replace(os.sep, '/')}" for path in index["dirs"])
+        with zipfile.ZipFile(temp_path, 'w') as bundle:
+            for relative_path in sorted(index["files"]):
+                entry = index["files"][relative_path]
+                if entry.is_symlink():
+                    logger.warning(f"Collegamento simbolico non incluso nel bundle: {entry.path}")
+                    continue
+                # L'archivio CDS dipende dalla JVM della macchina e viene ricreato con il comando 'cds'
+                if relative_path == CDS_ARCHIVE_FILENAME:
+                    continue
+                name = f"{install_name}/{relative_path.replace(os.sep, '/')}"
+                rewrite = relative_path == "unix_args.txt"
+                data = None
+                if rewrite:
+                    with open(entry.path, 'r') as file:
+                        data = relative_unix_args(file.read(), install_directory, install_name).encode()
+                size, sha1 = add_file_to_bundle(bundle, entry.path, name, data)
+                manifest["files"].append({"path": name, "size": size, "sha1": sha1,
+                                          "mode": entry.stat(follow_symlinks=False).st_mode & 0o7777, "rewrite": rewrite})
+
+            config_path = os.path.join(install_directory, config_name)
+            size, sha1 = add_file_to_bundle(bundle, config_path, config_name)
+            manifest["files"].append({"path": config_name, "size": size, "sha1": sha1, "mode": os.stat(config_path).st_mode & 0o7777, "rewrite": False})
+            bundle.writestr(BUNDLE_MANIFEST_NAME, json.dumps(manifest, indent=1))
+
+        bundle_sha1 = file_sha1(temp_path)
+        os.replace(temp_path, output_path)
+        write_file_atomically(f"{output_path}.sha1", f"{bundle_sha1}  {os.path.basename(output_path)}\n")
+    except (OSError, zipfile.BadZipFile) as e:
+        logger.error(f"Errore nella creazione del bundle {output_path}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return None
+    finally:
+        if build_directory:
+            shutil.rmtree(build_directory, ignore_errors=True)
+
+    logger.info(f"Bundle {output_path} creato: {len(manifest['files'])} file, SHA1 {bundle_sha1}")
+    return manifest
+
+# Ritorna il percorso di un file di un bundle all'interno di base_directory
+def bundle_member_path(base_directory, relative_path):
+    """
+    relative_path è un percorso del manifest (separatore '/'). Solleva ValueError se è assoluto,
+    contiene componenti vuoti, '.' o '..', oppure se, risolti i collegamenti simbolici,
+    non si trova all'interno di base_directory.
+    """
+    parts = relative_path.split("/")
+    if os.path.isabs(relative_path) or "\\" in relative_path or "\0" in relative_path or any(part in ("", ".", "..") for part in parts):
+        raise ValueError(f"Percorso non valido nel bundle: {relative_path!r}")
+    path = os.path.join(base_directory, *parts)
+    base = os.path.realpath(base_directory)
+    if os.path.commonpath([base, os.path.realpath(path)]) != base:
+        raise ValueError(f"Percorso esterno alla directory dell'installazione nel bundle: {relative_path!r}")
+    return path
+
+# Verifica la struttura del manifest di un bundle
+def validate_bundle_manifest(manifest):
+    """
+    Controlla chiavi e tipi del manifest, che install_name sia forge-<mc>-<forge>, che il file di
+    configurazione sia <install_name>.jar.conf e compaia una sola volta tra i file, e che tutti
+    gli altri percorsi siano relativi e all'interno di <install_name>/.
+    Solleva ValueError se il manifest non è valido.
+    """
+    if not isinstance(manifest, dict):
+        raise ValueError("il manifest non è un oggetto JSON")
+    for key in ("game_version", "forge_version", "install_name", "config"):
+        if not isinstance(manifest.get(key), str):
+            raise ValueError(f"chiave '{key}' mancante o non valida")
+    for key in ("game_version", "forge_version"):
+        if not re.fullmatch(r"[0-9A-Za-z][0-9A-Za-z._+-]*", manifest[key]):
+            raise ValueError(f"versione non valida: {manifest[key]!r}")
+    install_name = f"forge-{manifest['game_version']}-{manifest['forge_version']}"
+    if manifest["install_name"] != install_name:
+        raise ValueError(f"install_name {manifest['install_name']!r} diverso da {install_name!r}")
+    if manifest["config"] != f"{install_name}.jar.conf":
+        raise ValueError(f"file di configurazione non valido: {manifest['config']!r}")
+    if not isinstance(manifest.get("files"), list) or not isinstance(manifest.get("directories", []), list):
+        raise ValueError("elenco dei file o delle directory non valido")
+
+    prefix = f"{install_name}/"
+    config_entries = 0
+    for entry in manifest["files"]:
+        if not (isinstance(entry, dict) and isinstance(entry.get("path"), str) and isinstance(entry.get("size"), int)
+                and isinstance(entry.get("mode"), int) and isinstance(entry.get("rewrite"), bool)
+                and isinstance(entry.get("sha1"), str) and re.fullmatch(r"[0-9a-f]{40}", entry["sha1"])):
+            raise ValueError(f"voce del manifest non valida: {entry!r}")
+        if entry["path"] == manifest["config"]:
+            config_entries += 1
+        elif not entry["path"].startswith(prefix) or entry["path"] == prefix:
+            raise ValueError(f"percorso esterno all'installazione: {entry['path']!r}")
+        bundle_member_path(os.sep, entry["path"])
+    if config_entries != 1:
+        raise ValueError(f"il file di configurazione {manifest['config']!r} deve comparire una sola volta")
+    for directory in manifest.get("directories", []):
+        if not isinstance(directory, str) or not directory.startswith(prefix) or directory == prefix:
+            raise ValueError(f"directory esterna all'installazione: {directory!r}")
+        bundle_member_path(os.sep, directory)
+
+# Legge e verifica il manifest di un bundle
+def read_bundle_manifest(bundle_path):
+    """
+    Se accanto al bundle è presente <bundle>.sha1, verifica prima lo SHA1 dell'archivio,
+    poi la struttura del manifest e i suoi percorsi (validate_bundle_manifest).
+    Ritorna il manifest oppure None se il bundle non è valido.
+    """
+    sidecar_path = f"{bundle_path}.sha1"
+    try:
+        if os.path.isfile(sidecar_path):
+            with open(sidecar_path, 'r') as file:
+                expected_sha1 = file.read().split()[0].lower()
+            if file_sha1(bundle_path) != expected_sha1:
+                logger.error(f"Lo SHA1 del bundle {bundle_path} non corrisponde a quello di {sidecar_path}")
+                return None
+        with zipfile.ZipFile(bundle_path) as bundle:
+            manifest = json.loads(bundle.read(BUNDLE_MANIFEST_NAME))
+    except (OSError, IndexError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        logger.error(f"Bundle {bundle_path} non leggibile: {e}")
+        return None
+
+    if not isinstance(manifest, dict) or manifest.get("format") != BUNDLE_FORMAT:
+        logger.error(f"Formato del bundle {bundle_path} non supportato: {manifest.get('format') if isinstance(manifest, dict) else None}")
+        return None
+    try:
+        validate_bundle_manifest(manifest)
+    except ValueError as e:
+        logger.error(f"Manifest del bundle {bundle_path} non valido: {e}")
+        return None
+    return manifest
+
+# Controlla se un file corrisponde a una voce del manifest di un bundle
+def file_matches_bundle_entry(file_path, entry):
+    try:
+        return os.path.getsize(file_path) == entry["size"] and file_sha1(file_path) == entry["sha1"]
+    except OSError:
+        return False
+
+# Applica un bundle di installazione nella daemon jar directory
+@measured_stage("bundle")
+def apply_forge_bundle(bundle_path, install_directory, max_workers=BUNDLE_WORKERS):
+    """
+    Installa il contenuto di un bundle creato con build_forge_bundle, senza eseguire l'installer:
+    - i file dell'installazione esistente che corrispondono al manifest (dimensione e SHA1)
+      vengono collegati con un hardlink nella directory di staging, gli altri vengono estratti
+      in parallelo e verificati; proprietario e permessi vengono applicati a ogni file appena
+      scritto, senza un passaggio separato;
+    - le librerie vengono collegate all'archivio condiviso e unix_args.txt viene riscritto con
+      i percorsi della daemon jar directory, come in un'installazione normale;
+    - l'installazione viene pubblicata con una rinomina e il file .jar.conf scritto per ultimo,
+      rigenerandolo localmente con il profilo della JVM richiesto nel file del bundle, così il
+      comando di avvio corrisponde alla versione di Java di questa macchina.
+    Un eventuale archivio CDS presente nel bundle non viene installato.
+    Se l'installazione esistente corrisponde già al bundle non viene modificata.
+    Ritorna un riepilogo con status 'installed', 'unchanged' o 'failed'.
+    """
+    start_time = time.monotonic()
+    summary = {"bundle": bundle_path, "status": "failed", "error": None, "files": 0, "reused": 0, "extracted": 0, "extracted_bytes": 0}
+    manifest = read_bundle_manifest(bundle_path)
+    if manifest is None:
+        summary["error"] = "Bundle non valido"
+        return summary
+
+    game_version, forge_version, install_name = manifest["game_version"], manifest["forge_version"], manifest["install_name"]
+    summary.update(game_version=game_version, forge_version=forge_version)
+    target_directory = os.path.join(install_directory, install_name)
+    config_path = os.path.join(install_directory, manifest["config"])
+    prefix = f"{install_name}/"
+    # L'archivio CDS di un'altra macchina non viene installato (i bundle recenti non lo contengono)
+    tree_entries = [entry for entry in manifest["files"]
+                    if entry["path"].startswith(prefix) and entry["path"] != f"{prefix}{CDS_ARCHIVE_FILENAME}"]
+    config_entry = next(entry for entry in manifest["files"] if entry["path"] == manifest["config"])
+    summary["files"] = len(tree_entries)
+
+    try:
+        with zipfile.ZipFile(bundle_path) as bundle:
+            config_data = bundle.read(manifest["config"])
+        if hashlib.sha1(config_data).hexdigest() != config_entry["sha1"]:
+            raise ValueError(f"SHA1 non corrispondente per {manifest['config']}")
+        jvm_profile = read_jvm_profile_marker(config_data.decode("utf-8")) or JVM_PROFILE_AUTO
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        logger.error(f"Errore nella lettura della configurazione del bundle {bundle_path}: {e}")
+        summary["error"] = str(e)
+        return summary
+
+    # Se eseguito come root, i file vengono assegnati al proprietario della daemon jar directory mentre vengono scritti
+    owner = None
+    if os.geteuid() == 0:
+        stat_info = os.stat(install_directory)
+        owner = (stat_info.st_uid, stat_info.st_gid)
+
+    # File dell'installazione esistente già uguali a quelli del bundle (unix_args.txt viene sempre riscritto)
+    def existing_matches(entry):
+        try:
+            existing_path = bundle_member_path(install_directory, entry["path"])
+        except ValueError:
+            return False
+        return not entry["rewrite"] and file_matches_bundle_entry(existing_path, entry)
+
+    # Il file .jar.conf esistente è uguale a quello che verrebbe generato per questa macchina
+    def config_is_current():
+        try:
+            with open(config_path, 'r') as file:
+                current_content = file.read()
+        except OSError:
+            return False
+        return current_content == forge_config_content(game_version, forge_version, install_directory, jvm_profile=jvm_profile)
+
+    with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        reusable = dict(zip((entry["path"] for entry in tree_entries), executor.map(existing_matches, tree_entries)))
+    rewritten = [entry for entry in tree_entries if entry["rewrite"]]
+    if (all(reusable[entry["path"]] for entry in tree_entries if not entry["rewrite"])
+            and all(os.path.isfile(os.path.join(install_directory, entry["path"])) for entry in rewritten)
+            and config_is_current()):
+        logger.info(f"Forge {game_version}-{forge_version} in {install_directory} corrisponde già al bundle {bundle_path}")
+        summary.update(status="unchanged", reused=len(tree_entries), elapsed_seconds=round(time.monotonic() - start_time, 3))
+        count_metric("bundles_applied", status="unchanged")
+        return summary
+
+    staging_directory = create_staging_directory(install_directory, install_name)
+    if staging_directory is None:
+        summary["error"] = "Impossibile creare la directory di staging"
+        return summary
+
+    previous_shared_libraries = shared_library_paths(install_directory, install_name)
+    shared_libraries = set()
+    published = False
+    open_bundles = []
+    local = threading.local()
+
+    # Collega o estrae un file del bundle nella directory di staging
+    def place_entry(entry):
+        relative_path = entry["path"][len(prefix):]
+        target_path = bundle_member_path(staging_directory, relative_path)
+        if reusable[entry["path"]]:
+            link_or_copy_file(bundle_member_path(target_directory, relative_path), target_path, allow_link=True)
+            if owner:
+                os.chown(target_path, *owner)
+            return 0
+
+        # Ogni thread legge il bundle con un proprio handle, così le estrazioni procedono in parallelo
+        if not hasattr(local, "bundle"):
+            local.bundle = zipfile.ZipFile(bundle_path)
+            open_bundles.append(local.bundle)
+        sha1_obj = hashlib.sha1()
+        with local.bundle.open(entry["path"]) as source, open(target_path, 'wb') as target:
+            for chunk in iter(lambda: source.read(DOWNLOAD_CHUNK_SIZE), b""):
+                sha1_obj.update(chunk)
+                target.write(chunk)
+        if sha1_obj.hexdigest() != entry["sha1"]:
+            raise ValueError(f"SHA1 non corrispondente per {entry['path']}")
+        os.chmod(target_path, entry["mode"])
+        if owner:
+            os.chown(target_path, *owner)
+        return entry["size"]
+
+    try:
+        directories = {os.path.dirname(entry["path"][len(prefix):]) for entry in tree_entries}
+        directories.update(path[len(prefix):] for path in manifest["directories"])
+        for directory in sorted(directories - {""}):
+            path = bundle_member_path(staging_directory, directory)
+            os.makedirs(path, exist_ok=True)
+            if owner:
+                os.chown(path, *owner)
+
+        with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            extracted_sizes = list(executor.map(place_entry, tree_entries))
+        summary["reused"] = sum(1 for entry in tree_entries if reusable[entry["path"]])
+        summary["extracted"] = len(tree_entries) - summary["reused"]
+        summary["extracted_bytes"] = sum(extracted_sizes)
+
+        install_index = scan_install_directory(staging_directory)
+        shared_libraries = deduplicate_libraries(install_directory, game_version, forge_version, install_index, staging_directory)
+        if install_strategy(game_version) == STRATEGY_ARGS_FILE:
+            if not modify_unix_args_file(game_version, forge_version, install_directory, shared_libraries, staging_directory):
+                summary["error"] = "Impossibile riscrivere unix_args.txt"
+                return summary
+
+        previous_directory = publish_staged_install(staging_directory, target_directory)
+        install_index["root"] = target_directory
+        if not write_forge_config(game_version, forge_version, install_directory, install_index, owner=owner, jvm_profile=jvm_profile):
+            restore_previous_install(target_directory, previous_directory)
+            summary["error"] = "Impossibile generare il file di configurazione"
+            return summary
+
+        published = True
+        if previous_directory:
+            shutil.rmtree(previous_directory, ignore_errors=True)
+        release_shared_libraries(install_directory, install_name, keep=shared_libraries)
+        summary["status"] = "installed"
+        logger.info(f"Bundle {bundle_path} applicato in {install_directory}: {summary['extracted']} file estratti, {summary['reused']} riutilizzati")
+        return summary
+
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+        logger.error(f"Errore nell'applicazione del bundle {bundle_path}: {e}")
+        summary["error"] = str(e)
+        return summary
+    finally:
+        for bundle in open_bundles:
+            bundle.close()
+        if not published:
+            remove_staging_directory(staging_directory)
+            if shared_libraries - previous_shared_libraries:
+                release_shared_libraries(install_directory, install_name, keep=previous_shared_libraries)
+        summary["elapsed_seconds"] = round(time.monotonic() - start_time, 3)
+        count_metric("bundles_applied", status=summary["status"])
+
 # Stampa il sottomenu per la selezione della versione di Forge e poi procede con l'installazione
 def print_submenu(selected_version_links, game_version, install_directory):
     logger.debug("Inizio della funzione print_submenu")
     
     while True:
-        forge_versions = []
-        for version_url in selected_version_links:
-            logger.info(f"Recupero versioni di Forge da: {version_url}")
-            versions = get_version_data(version_url)
-            logger.debug(f"Versioni trovate: {versions}")
-            forge_versions.extend(versions)
+        # Con "ALL" vengono elencate le versioni di Forge di tutte le versioni di Minecraft
+        if game_version == "ALL":
+            version_pairs = get_all_forge_versions(selected_version_links)
+        else:
+            version_pairs = [(game_version, forge_version) for forge_version in get_forge_versions(game_version, selected_version_links)]
+        installed = installed_forge_versions(install_directory)
 
-        for i, forge_version in enumerate(forge_versions, start=1):
-            print(f"{i}. {forge_version}")
+        for i, (pair_game_version, forge_version) in enumerate(version_pairs, start=1):
+            label = f"{i}. {pair_game_version} - {forge_version}" if game_version == "ALL" else f"{i}. {forge_version}"
+            print(f"{label} (installata)" if (pair_game_version, forge_version) in installed else label)
 
         print("0. Torna al menu principale")
         choice = input("Inserisci il numero dell'opzione desiderata: ")
@@ -699,54 +4558,27 @@ def print_submenu(selected_version_links, game_version, install_directory):
             logger.debug("Uscita dalla funzione print_submenu - Torna al menu principale")
             return True
 
-        if choice.isdigit() and 1 <= int(choice) <= len(forge_versions):
-            selected_forge_version = forge_versions[int(choice) - 1]
-            logger.info(f"Versione di Forge selezionata: {selected_forge_version}")
+        if choice.isdigit() and 1 <= int(choice) <= len(version_pairs):
+            selected_game_version, selected_forge_version = version_pairs[int(choice) - 1]
+            logger.info(f"Versione di Forge selezionata: {selected_game_version}-{selected_forge_version}")
 
-            if version.parse(game_version) >= version.parse("1.5.2"):
-                installer_link = get_installer_link(game_version, selected_forge_version)
-                logger.debug(f"Link Installer: {installer_link}")
+            if (selected_game_version, selected_forge_version) in installed:
+                answer = input(f"Forge {selected_game_version}-{selected_forge_version} è già installato. Vuoi reinstallarlo? (s/N): ")
+                if answer.strip().lower() not in ("s", "si", "sì"):
+                    continue
 
-                if installer_link:
-                    print(f"\nHai scelto la versione di Forge: {selected_forge_version}")
-                    print(f"Link Installer: {installer_link}\n")
+            print(f"\nHai scelto la versione di Forge: {selected_forge_version}\n")
+            result = install_forge_version(selected_game_version, selected_forge_version, install_directory)
 
-                    filename = f"forge-{game_version}-{selected_forge_version}-installer.jar"
-                    downloaded_file_path = download_to_temp_folder(installer_link, filename)
+            if result["status"] == "not-found":
+                logger.error(f"{result['error']} per {selected_forge_version}")
+                continue
 
-                    if downloaded_file_path:
-                        print(f"Installer scaricato con successo in: {downloaded_file_path}")
-                        execute_java_installation(downloaded_file_path, game_version, selected_forge_version, install_directory)
-                    else:
-                        logger.error("Non è stato possibile scaricare l'installer.")
-                    return False
-                else:
-                    logger.error(f"Link Installer non trovato per {selected_forge_version}")
-
-            elif version.parse(game_version) < version.parse("1.5.2"):
-                universal_link = get_universal_link(game_version, selected_forge_version)
-                vanilla_link = get_vanilla_link(game_version)
-                logger.debug(f"Link Universal: {universal_link}, Link Vanilla: {vanilla_link}")
-
-                if universal_link and vanilla_link:
-                    print(f"\nHai scelto la versione di Forge: {selected_forge_version}")
-                    print(f"Link Universal: {universal_link}\n")
-
-                    universal_filename = f"forge-{game_version}-{selected_forge_version}-universal.zip"
-                    downloaded_universal_path = download_to_temp_folder(universal_link, universal_filename)
-                    vanilla_filename = "server.jar"
-                    downloaded_vanilla_path = download_to_target_folder(vanilla_link, vanilla_filename, install_directory, game_version, selected_forge_version)
-
-                    if downloaded_universal_path and downloaded_vanilla_path:
-                        print(f"Universal e server vanilla scaricati con successo.")
-                        copy_contents_to_jar(downloaded_universal_path, downloaded_vanilla_path)
-                        execute_java_installation(downloaded_vanilla_path, game_version, selected_forge_version, install_directory)
-                        logger.info("Installazione completata con successo.")
-                    else:
-                        logger.error("Non è stato possibile scaricare l'installer o il server vanilla.")
-                    return False
-                else:
-                    logger.error(f"Link Universal o Vanilla non trovato per {selected_forge_version}")
+            if result["status"] == "installed":
+                print(f"Installazione di Forge {selected_forge_version} completata con successo.")
+            else:
+                logger.error(result["error"])
+            return False
 
         else:
             logger.warning("Scelta non valida nella funzione print_submenu")
@@ -757,16 +4589,16 @@ def print_submenu(selected_version_links, game_version, install_directory):
 # Stampa il menu principale
 def print_menu(base_url):
     logger.debug(f"Caricamento del menu dalla URL: {base_url}")
-    html = get_html(base_url)
+    catalogue = load_version_catalogue()
+    html = None if catalogue else get_html(base_url)
 
-    if html:
-        soup = BeautifulSoup(html, 'html.parser')
-        version_elements_li = soup.select('.li-version-list li')
-        sub_versions = []
-        for element in version_elements_li:
-            version_text = element.a.text.strip() if element.a else element.text.strip()
-            sub_versions.append(version_text)
-            logger.debug(f"Trovata versione: {version_text}")
+    if catalogue or html:
+        if catalogue:
+            sub_versions = list(list_game_versions(catalogue))
+            logger.debug(f"Versioni lette dal catalogo: {len(sub_versions)}")
+        else:
+            sub_versions = list(parse_forge_page(html)["game_versions"])
+            logger.debug(f"Versioni trovate nella pagina: {len(sub_versions)}")
 
         sub_versions_links = [f"{base_url}index_{version}.html" for version in sub_versions]
         sub_versions.append("ALL")
@@ -785,10 +4617,13 @@ def print_menu(base_url):
             selected_version = sub_versions[int(choice) - 1]
             logger.info(f"Versione selezionata: {selected_version}")
 
-            if selected_version != "ALL":
-                selected_version_links = [link for link in sub_versions_links if f"index_{selected_version}" in link]
-                logger.debug(f"Link selezionati per la versione {selected_version}: {selected_version_links}")
-                return selected_version_links, selected_version
+            if selected_version == "ALL":
+                logger.debug(f"Selezionate tutte le versioni: {len(sub_versions_links)} link")
+                return sub_versions_links, selected_version
+
+            selected_version_links = [link for link in sub_versions_links if link.endswith(f"index_{selected_version}.html")]
+            logger.debug(f"Link selezionati per la versione {selected_version}: {selected_version_links}")
+            return selected_version_links, selected_version
         else:
             logger.warning("Scelta non valida nel menu")
             print("Scelta non valida. Riprova.")
@@ -798,8 +4633,278 @@ def print_menu(base_url):
         logger.error("Errore nel caricare la pagina principale.")
         return None
 
-# Funzione principale
-def main():
+# Esegue l'installazione non interattiva di più versioni di Forge
+def run_batch(args):
+    """
+    Esegue la modalità batch a partire dagli argomenti della riga di comando
+    e scrive il riepilogo in formato JSON. Ritorna il codice di uscita.
+    """
+    targets = [parse_version_pair(text) for text in args.version]
+    if args.manifest:
+        targets.extend(load_install_manifest(args.manifest))
+
+    if not targets:
+        logger.error("Nessuna versione da installare: usa --version o --manifest")
+        return 2
+
+    summary = batch_install(targets, args.install_dir, max_workers=args.workers, force=args.force, jvm_profile=args.jvm_profile, cds=args.cds)
+    summary_json = json.dumps(summary, indent=2)
+    if args.summary:
+        with open(args.summary, 'w') as file:
+            file.write(summary_json + "\n")
+        logger.info(f"Riepilogo salvato in {args.summary}")
+    else:
+        print(summary_json)
+
+    return 0 if summary["failed"] == 0 else 1
+
+# Crea un bundle di installazione da distribuire su altri host
+def run_bundle(args):
+    game_version, forge_version = parse_version_pair(args.version)
+    if forge_version in ("latest", "recommended"):
+        catalogue = load_version_catalogue()
+        resolved_version = resolve_forge_version(catalogue, game_version, forge_version) if catalogue else None
+        if resolved_version is None:
+            logger.error(f"Versione '{forge_version}' di Forge non trovata per Minecraft {game_version}")
+            return 1
+        forge_version = resolved_version
+
+    manifest = build_forge_bundle(game_version, forge_version, args.output, args.install_dir)
+    if manifest is None:
+        return 1
+    print(f"{args.output}: Forge {game_version}-{forge_version}, {len(manifest['files'])} file")
+    return 0
+
+# Applica uno o più bundle di installazione nella daemon jar directory
+def run_apply(args):
+    summaries = [apply_forge_bundle(bundle_path, args.install_dir, max_workers=args.workers) for bundle_path in args.bundles]
+    summary_json = json.dumps(summaries, indent=2)
+    if args.summary:
+        with open(args.summary, 'w') as file:
+            file.write(summary_json + "\n")
+        logger.info(f"Riepilogo salvato in {args.summary}")
+    else:
+        print(summary_json)
+    return 0 if all(summary["status"] != "failed" for summary in summaries) else 1
+
+# Stampa le versioni disponibili usando l'indice delle versioni
+def run_versions(args):
+    """
+    Stampa le versioni di Minecraft disponibili oppure, se indicata una versione di Minecraft,
+    le sue versioni di Forge (eventualmente solo latest/recommended o in un intervallo).
+    Ritorna il codice di uscita.
+    """
+    catalogue = load_version_catalogue()
+    if catalogue is None:
+        logger.error("Catalogo delle versioni non disponibile")
+        return 1
+
+    if not args.game_version:
+        for game_version in list_game_versions(catalogue):
+            print(game_version)
+        return 0
+
+    if args.latest or args.recommended:
+        forge_version = resolve_forge_version(catalogue, args.game_version, "latest" if args.latest else "recommended")
+        if forge_version is None:
+            return 1
+        print(forge_version)
+        return 0
+
+    forge_versions = query_forge_versions(catalogue, args.game_version, args.min, args.max)
+    for forge_version in forge_versions:
+        print(forge_version)
+    return 0 if forge_versions else 1
+
+# Elenca le versioni di Forge installate nella daemon jar directory
+def list_installed_versions(install_directory):
+    """
+    Ritorna le coppie (game_version, forge_version) installate, ricavate dai file
+    forge-<mc>-<forge>.jar.conf con una sola lettura della directory e senza accessi alla rete.
+    """
+    installed = []
+    with os.scandir(install_directory) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith("forge-") and name.endswith(".jar.conf") and entry.is_file():
+                game_version, _, forge_version = name[len("forge-"):-len(".jar.conf")].partition("-")
+                if forge_version:
+                    installed.append((game_version, forge_version))
+    installed.sort(key=lambda pair: (version_sort_key(pair[0]), version_sort_key(pair[1])), reverse=True)
+    return installed
+
+# Stampa le versioni di Forge installate
+def run_list(args):
+    try:
+        if args.details:
+            return print_inventory(update_inventory(args.install_dir), args.json)
+        installed = list_installed_versions(args.install_dir)
+    except OSError as e:
+        logger.error(f"Impossibile leggere la directory {args.install_dir}: {e}")
+        return 1
+
+    if args.json:
+        print(json.dumps([{"game_version": game_version, "forge_version": forge_version} for game_version, forge_version in installed]))
+    else:
+        for game_version, forge_version in installed:
+            print(f"{game_version}-{forge_version}")
+    return 0
+
+# Stampa l'indice delle versioni installate: stato, spazio occupato e librerie condivise
+def print_inventory(inventory, as_json=False):
+    names = sorted(inventory["installs"], key=lambda name: (version_sort_key(inventory["installs"][name]["game_version"]),
+                                                            version_sort_key(inventory["installs"][name]["forge_version"])), reverse=True)
+    if as_json:
+        print(json.dumps([dict(inventory["installs"][name], name=name) for name in names]))
+        return 0
+
+    for name in names:
+        record = inventory["installs"][name]
+        last_used = time.strftime("%Y-%m-%d %H:%M", time.localtime(record["last_used"]))
+        label = name if record.get("managed") else f"{name} (esterna)"
+        print(f"{label:<40} {record['state']:<16} {record['own_bytes'] / 1024 ** 2:>9.1f} MiB  "
+              f"{record['shared_libraries']:>4} librerie condivise  ultimo uso {last_used}")
+    print(f"Archivio condiviso delle librerie: {inventory['shared_bytes'] / 1024 ** 2:.1f} MiB")
+    return 0
+
+# Rimuove le versioni di Forge non usate e le librerie orfane
+def run_gc(args):
+    try:
+        max_bytes = parse_size(args.max_bytes) if args.max_bytes else None
+        summary = collect_garbage(args.install_dir, max_bytes=max_bytes, keep=args.keep, dry_run=args.dry_run, remove_orphans=args.remove_orphans,
+                                  protect=[name if name.startswith("forge-") else f"forge-{name}" for name in args.protect])
+    except ValueError as e:
+        logger.error(str(e))
+        return 2
+    except OSError as e:
+        logger.error(f"Impossibile pulire la directory {args.install_dir}: {e}")
+        return 1
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        for removed in summary["removed"]:
+            print(f"{removed['name']}: {removed['reason']}, {removed['bytes'] / 1024 ** 2:.1f} MiB")
+        action = "verrebbero liberati" if args.dry_run else "liberati"
+        print(f"{len(summary['removed'])} installazioni, {summary['orphaned_libraries']} librerie condivise orfane, "
+              f"{summary['freed_bytes'] / 1024 ** 2:.1f} MiB {action}")
+    return 0
+
+# Rigenera i file .jar.conf delle versioni installate
+def run_configs(args):
+    if args.refresh_template and not refresh_config_template():
+        return 1
+
+    targets = [parse_version_pair(text) for text in args.version] or None
+    try:
+        summary = regenerate_forge_configs(args.install_dir, targets, max_workers=args.workers, dry_run=args.dry_run, jvm_profile=args.jvm_profile)
+    except OSError as e:
+        logger.error(f"Impossibile leggere la directory {args.install_dir}: {e}")
+        return 1
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        for result in summary["results"]:
+            if result["status"] != "unchanged":
+                print(f"{result['game_version']}-{result['forge_version']}: {result['status']}")
+        print(f"{summary['updated']} aggiornati, {summary['unchanged']} invariati, {summary['failed']} non riusciti")
+    return 0 if summary["failed"] == 0 else 1
+
+# Crea gli archivi CDS delle versioni installate indicate
+def run_cds(args):
+    targets = [parse_version_pair(text) for text in args.version]
+    results = build_cds_archives(targets, args.install_dir, args.jvm_profile)
+    summary_json = json.dumps(results, indent=2)
+    if args.summary:
+        with open(args.summary, 'w') as file:
+            file.write(summary_json + "\n")
+        logger.info(f"Riepilogo salvato in {args.summary}")
+    else:
+        print(summary_json)
+    return 0 if all(result["status"] == "created" for result in results) else 1
+
+# Configura l'output dei log in base al livello di dettaglio richiesto
+def configure_logging(verbosity):
+    """
+    Senza opzioni vengono mostrati solo avvisi ed errori, con -v anche i messaggi informativi
+    e con -vv anche quelli di debug. I messaggi ripetuti per ogni file, libreria o risposta
+    in cache usano la formattazione differita di logging (%s), così sotto il livello scelto
+    vengono scartati senza essere formattati; gli altri, emessi poche volte per installazione,
+    usano f-string e vengono formattati comunque.
+    """
+    level = {0: logging.WARNING, 1: logging.INFO}.get(verbosity, logging.DEBUG)
+    logging.basicConfig(level=level)
+
+# Legge gli argomenti della riga di comando
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Installa Minecraft Forge nella daemon jar directory di Multicraft.")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="mostra i messaggi informativi (-vv anche quelli di debug)")
+    parser.add_argument("--metrics-json", metavar="FILE", help="salva il resoconto dell'esecuzione (durata delle fasi e contatori) in formato JSON")
+    parser.add_argument("--metrics-prometheus", metavar="FILE", help="salva le metriche per il textfile collector di Prometheus (es. /var/lib/node_exporter/multicraft_forge_installer.prom)")
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch_parser = subparsers.add_parser("batch", help="installa più versioni di Forge in parallelo senza interazione")
+    batch_parser.add_argument("--install-dir", default="/home/minecraft/multicraft/jar/", help="daemon jar directory di Multicraft")
+    batch_parser.add_argument("--version", action="append", default=[], metavar="MC-FORGE", help="versione da installare, es. 1.20.1-47.2.0 o 1.20.1-recommended (ripetibile)")
+    batch_parser.add_argument("--manifest", help="file JSON o di testo con l'elenco delle versioni da installare")
+    batch_parser.add_argument("--workers", type=int, default=BATCH_MAX_WORKERS, help="numero massimo di installazioni in parallelo")
+    batch_parser.add_argument("--summary", help="file in cui salvare il riepilogo JSON (predefinito: standard output)")
+    batch_parser.add_argument("--force", action="store_true", help="reinstalla anche le versioni già presenti")
+    batch_parser.add_argument("--cds", action="store_true", help="dopo l'installazione crea l'archivio CDS con un avvio di prova del server (Java 13 o superiore)")
+    batch_parser.add_argument("--jvm-profile", choices=[JVM_PROFILE_AUTO, *JVM_PROFILES], default=JVM_PROFILE_AUTO, help="profilo della JVM nel comando di avvio (predefinito: scelta automatica in base alla versione di Java e di Minecraft)")
+
+    list_parser = subparsers.add_parser("list", help="elenca le versioni di Forge installate (senza accessi alla rete)")
+    list_parser.add_argument("--install-dir", default="/home/minecraft/multicraft/jar/", help="daemon jar directory di Multicraft")
+    list_parser.add_argument("--json", action="store_true", help="stampa l'elenco in formato JSON")
+    list_parser.add_argument("--details", action="store_true", help="mostra stato, spazio occupato, librerie condivise e ultimo utilizzo di ogni installazione")
+
+    configs_parser = subparsers.add_parser("configs", help="rigenera dal template i file .jar.conf delle versioni installate (senza accessi alla rete)")
+    configs_parser.add_argument("--install-dir", default="/home/minecraft/multicraft/jar/", help="daemon jar directory di Multicraft")
+    configs_parser.add_argument("--version", action="append", default=[], metavar="MC-FORGE", help="versione di cui rigenerare il file (ripetibile, predefinito: tutte)")
+    configs_parser.add_argument("--refresh-template", action="store_true", help="scarica prima il template aggiornato da multicraft.org")
+    configs_parser.add_argument("--workers", type=int, default=CONFIG_WORKERS, help="numero di file generati in parallelo")
+    configs_parser.add_argument("--dry-run", action="store_true", help="mostra i file che cambierebbero senza scriverli")
+    configs_parser.add_argument("--jvm-profile", choices=[JVM_PROFILE_AUTO, *JVM_PROFILES], help="profilo della JVM da applicare (predefinito: quello con cui è stato generato ogni file)")
+    configs_parser.add_argument("--json", action="store_true", help="stampa il riepilogo in formato JSON")
+
+    cds_parser = subparsers.add_parser("cds", help="crea l'archivio CDS di versioni installate con un avvio di prova del server e lo usa nel file .jar.conf")
+    cds_parser.add_argument("--install-dir", default="/home/minecraft/multicraft/jar/", help="daemon jar directory di Multicraft")
+    cds_parser.add_argument("--version", action="append", required=True, metavar="MC-FORGE", help="versione installata, es. 1.20.1-47.2.0 (ripetibile)")
+    cds_parser.add_argument("--jvm-profile", choices=[JVM_PROFILE_AUTO, *JVM_PROFILES], help="profilo della JVM (predefinito: quello del file .jar.conf)")
+    cds_parser.add_argument("--summary", help="file in cui salvare il riepilogo JSON (predefinito: standard output)")
+
+    gc_parser = subparsers.add_parser("gc", help="rimuove installazioni incomplete, versioni di Forge non usate e librerie condivise orfane")
+    gc_parser.add_argument("--install-dir", default="/home/minecraft/multicraft/jar/", help="daemon jar directory di Multicraft")
+    gc_parser.add_argument("--max-bytes", metavar="SIZE", help="spazio massimo per installazioni e librerie condivise, es. 20G: oltre il limite vengono rimosse le build meno usate")
+    gc_parser.add_argument("--keep", type=int, default=GC_KEEP_BUILDS, help="build più recenti sempre mantenute per ogni versione di Minecraft")
+    gc_parser.add_argument("--protect", action="append", default=[], metavar="forge-MC-FORGE", help="installazione da non rimuovere mai (ripetibile)")
+    gc_parser.add_argument("--remove-orphans", action="store_true", help="rimuove anche le installazioni create dallo script rimaste incomplete o senza directory (.jar.conf orfani)")
+    gc_parser.add_argument("--dry-run", action="store_true", help="mostra cosa verrebbe rimosso senza modificare nulla")
+    gc_parser.add_argument("--json", action="store_true", help="stampa il riepilogo in formato JSON")
+
+    versions_parser = subparsers.add_parser("versions", help="elenca le versioni di Minecraft e di Forge disponibili")
+    versions_parser.add_argument("game_version", nargs="?", help="versione di Minecraft di cui elencare le versioni di Forge")
+    versions_parser.add_argument("--latest", action="store_true", help="mostra solo la versione di Forge più recente")
+    versions_parser.add_argument("--recommended", action="store_true", help="mostra solo la versione di Forge raccomandata")
+    versions_parser.add_argument("--min", help="versione minima di Forge (inclusa)")
+    versions_parser.add_argument("--max", help="versione massima di Forge (inclusa)")
+
+    bundle_parser = subparsers.add_parser("bundle", help="crea un bundle con un'installazione completa di Forge da distribuire su altri host")
+    bundle_parser.add_argument("--version", required=True, metavar="MC-FORGE", help="versione da includere, es. 1.20.1-47.2.0 o 1.20.1-recommended")
+    bundle_parser.add_argument("--output", required=True, help="file ZIP del bundle da creare (accanto viene scritto <file>.sha1)")
+    bundle_parser.add_argument("--install-dir", help="daemon jar directory da cui prendere l'installazione, se già presente (predefinito: installazione in una directory temporanea)")
+
+    apply_parser = subparsers.add_parser("apply", help="installa uno o più bundle nella daemon jar directory senza eseguire l'installer di Forge")
+    apply_parser.add_argument("bundles", nargs="+", metavar="BUNDLE", help="file del bundle creato con il comando 'bundle'")
+    apply_parser.add_argument("--install-dir", default="/home/minecraft/multicraft/jar/", help="daemon jar directory di Multicraft")
+    apply_parser.add_argument("--workers", type=int, default=BUNDLE_WORKERS, help="numero di file estratti in parallelo")
+    apply_parser.add_argument("--summary", help="file in cui salvare il riepilogo JSON (predefinito: standard output)")
+
+    return parser.parse_args(argv)
+
+# Menu interattivo
+def run_interactive():
     logger.debug("Inizio esecuzione del programma")
     base_url = "https://files.minecraftforge.net/net/minecraftforge/forge/"
     install_directory = ask_install_directory()
@@ -825,5 +4930,34 @@ def main():
 
     logger.debug("Programma terminato")
 
+# Funzione principale
+def main(argv=None):
+    args = parse_arguments(argv)
+    configure_logging(args.verbose)
+
+    try:
+        if args.command == "batch":
+            return run_batch(args)
+        if args.command == "list":
+            return run_list(args)
+        if args.command == "versions":
+            return run_versions(args)
+        if args.command == "gc":
+            return run_gc(args)
+        if args.command == "configs":
+            return run_configs(args)
+        if args.command == "cds":
+            return run_cds(args)
+        if args.command == "bundle":
+            return run_bundle(args)
+        if args.command == "apply":
+            return run_apply(args)
+
+        run_interactive()
+        return 0
+    finally:
+        flush_version_catalogue()
+        write_metrics_reports(args.metrics_json, args.metrics_prometheus)
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
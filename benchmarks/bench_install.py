@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# Benchmark delle fasi di installazione con server HTTP locale e java fittizio
+#
+# Esempi:
+#   python3 benchmarks/bench_install.py
+#   python3 benchmarks/bench_install.py --output risultati.json --compare benchmarks/baseline.json --check
+#   python3 benchmarks/bench_install.py --stage download --repeat 5
+
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import pwd
+import grp
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import harness
+
+
+# Fasi del benchmark: nome -> funzione che ritorna (setup, esecuzione)
+def build_stages(environment, installer):
+    base_url = environment.base_url
+    modern_page = f"{base_url}/forge/index_{harness.MODERN_GAME_VERSION}.html"
+    download_url = f"{installer.FORGE_MAVEN_URL}bench-download/forge-bench-download-installer.jar"
+    legacy = f"{harness.LEGACY_GAME_VERSION}-{harness.LEGACY_FORGE_VERSION}"
+    universal_fixture = os.path.join(environment.root, "maven/net/minecraftforge/forge", legacy, f"forge-{legacy}-universal.zip")
+    vanilla_fixture = os.path.join(environment.root, "vanilla", f"minecraft_server.{harness.LEGACY_GAME_VERSION}.jar")
+    stages = {}
+
+    # Analisi della pagina HTML delle versioni (pagina già in memoria: misura solo l'analisi)
+    def parse_setup():
+        environment.reset_installer_state(installer)
+        installer.get_html(modern_page)
+    stages["parse_version_page"] = (parse_setup, lambda: installer.get_version_data(modern_page))
+
+    # Estrazione degli hash dalla pagina (caso peggiore: ultimo link della pagina)
+    html = {}
+    def hashes_setup():
+        installer.forge_page_cache.clear()
+        html["content"] = open(os.path.join(environment.root, "forge", f"index_{harness.MODERN_GAME_VERSION}.html")).read()
+    last_installer = f"{installer.FORGE_MAVEN_URL}{harness.MODERN_GAME_VERSION}-47.0.1/forge-{harness.MODERN_GAME_VERSION}-47.0.1-installer.jar"
+    stages["extract_hashes"] = (hashes_setup, lambda: installer.extract_hashes(html["content"], last_installer) != (None, None))
+
+    # Caricamento del catalogo delle versioni dallo snapshot binario (lo snapshot viene creato alla prima esecuzione)
+    def catalogue_setup():
+        if not os.path.isfile(installer.VERSION_CATALOGUE_PATH):
+            installer.load_version_catalogue()
+        installer.version_catalogue = None
+    stages["load_catalogue"] = (catalogue_setup, lambda: installer.load_version_catalogue() is not None)
+
+    # Download in streaming con verifica dei checksum Maven, senza cache degli artefatti
+    def download_setup():
+        environment.reset_installer_state(installer)
+        installer.remove_temp_directory(installer.TEMP_DIR_NAME)
+    stages["download"] = (download_setup, lambda: installer.download_to_temp_folder(download_url, "bench-download.jar"))
+
+    # Unione di universal e server vanilla (installazioni legacy)
+    merge_paths = {}
+    def merge_setup():
+        directory = environment.fresh_directory("merge")
+        merge_paths["universal"] = universal_fixture
+        merge_paths["vanilla"] = os.path.join(directory, "server.jar")
+        with open(vanilla_fixture, "rb") as source, open(merge_paths["vanilla"], "wb") as target:
+            target.write(source.read())
+    stages["merge_jar"] = (merge_setup, lambda: installer.copy_contents_to_jar(merge_paths["universal"], merge_paths["vanilla"]))
+
+    # Cambio del proprietario di un albero di file (come root alterna tra nobody e l'utente corrente)
+    chown_state = {"directory": None, "owner": None}
+    def chown_setup():
+        if chown_state["directory"] is None:
+            chown_state["directory"] = environment.fresh_directory("chown")
+            for number in range(environment.workload["chown_files"]):
+                subdirectory = os.path.join(chown_state["directory"], f"d{number % 100}")
+                os.makedirs(subdirectory, exist_ok=True)
+                open(os.path.join(subdirectory, f"f{number}"), "w").close()
+        current = pwd.getpwuid(os.geteuid()).pw_name, grp.getgrgid(os.getegid()).gr_name
+        if os.geteuid() == 0:
+            chown_state["owner"] = ("nobody", grp.getgrgid(pwd.getpwnam("nobody").pw_gid).gr_name) if chown_state["owner"] in (None, current) else current
+        else:
+            chown_state["owner"] = current
+    stages["chown"] = (chown_setup, lambda: installer.change_owner_recursively(chown_state["directory"], *chown_state["owner"]) is not None)
+
+    # Installazione completa con installer (a freddo: nessuna cache)
+    install_directory = {}
+    def install_setup():
+        environment.reset_installer_state(installer)
+        install_directory["path"] = environment.fresh_directory("jar")
+    stages["install_modern"] = (install_setup, lambda: installer.install_forge_version(
+        harness.MODERN_GAME_VERSION, harness.MODERN_FORGE_VERSION, install_directory["path"])["status"] == "installed")
+
+    # Reinstallazione con cache degli artefatti e mirror delle librerie già popolati
+    def warm_setup():
+        install_directory["path"] = environment.fresh_directory("jar")
+    stages["install_modern_warm"] = (warm_setup, lambda: installer.install_forge_version(
+        harness.MODERN_GAME_VERSION, harness.MODERN_FORGE_VERSION, install_directory["path"])["status"] == "installed")
+
+    # Installazione legacy: universal + server vanilla
+    stages["install_legacy"] = (install_setup, lambda: installer.install_forge_version(
+        harness.LEGACY_GAME_VERSION, harness.LEGACY_FORGE_VERSION, install_directory["path"])["status"] == "installed")
+
+    # Flusso completo del sottomenu: elenco delle versioni, scelta e installazione
+    def submenu_run():
+        versions = installer.get_forge_versions(harness.MODERN_GAME_VERSION, [modern_page])
+        choice = str(versions.index(harness.MODERN_FORGE_VERSION) + 1)
+        original_input = builtins.input
+        builtins.input = lambda prompt="": choice
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                installer.print_submenu([modern_page], harness.MODERN_GAME_VERSION, install_directory["path"])
+        finally:
+            builtins.input = original_input
+        return os.path.isfile(os.path.join(install_directory["path"], f"forge-{harness.MODERN_GAME_VERSION}-{harness.MODERN_FORGE_VERSION}.jar.conf"))
+    stages["submenu_flow"] = (install_setup, submenu_run)
+
+    return stages
+
+
+# Legge gli argomenti della riga di comando
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark delle fasi di installazione di Forge con un server HTTP locale.")
+    parser.add_argument("--stage", action="append", help="fase da eseguire (ripetibile, predefinito: tutte)")
+    parser.add_argument("--repeat", type=int, default=3, help="esecuzioni per fase (viene riportato il tempo minimo e la mediana)")
+    parser.add_argument("--output", help="file JSON in cui salvare i risultati")
+    parser.add_argument("--compare", help="file JSON di baseline con cui confrontare i risultati")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="regressione di tempo tollerata rispetto alla baseline (0.25 = +25%%)")
+    parser.add_argument("--check", action="store_true", help="esce con codice 1 in caso di regressioni rispetto alla baseline")
+    parser.add_argument("--workload", help="file JSON con i parametri del carico di lavoro da modificare (predefinito: DEFAULT_WORKLOAD di harness.py)")
+    return parser.parse_args(argv)
+
+
+# Funzione principale
+def main(argv=None):
+    args = parse_arguments(argv)
+    workload = None
+    if args.workload:
+        with open(args.workload) as file:
+            workload = json.load(file)
+
+    with harness.BenchEnvironment(workload) as environment:
+        installer = environment.load_installer()
+        # I log non fanno parte delle misure
+        logging.getLogger().setLevel(logging.WARNING)
+        stages = build_stages(environment, installer)
+        selected = args.stage or list(stages)
+
+        results = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "workload": environment.workload,
+            "repeat": args.repeat,
+            "stages": [],
+        }
+        for name in selected:
+            setup, function = stages[name]
+            results["stages"].append(harness.measure_stage(environment, name, function, setup, args.repeat))
+
+    harness.print_table(results)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = harness.compare_with_baseline(results, json.load(file), args.tolerance)
+        results["regressions"] = regressions
+        for regression in regressions:
+            print(f"REGRESSIONE {regression}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+            file.write("\n")
+
+    failed = [stage["stage"] for stage in results["stages"] if not stage["ok"]]
+    if failed:
+        print(f"Fasi non riuscite: {', '.join(failed)}")
+        return 1
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
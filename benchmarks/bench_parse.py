@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# Benchmark dell'analisi delle pagine di Forge: estrattore in streaming contro BeautifulSoup (implementazione precedente)
+#
+# Esempi:
+#   python3 benchmarks/bench_parse.py
+#   python3 benchmarks/bench_parse.py --rows 100 --rows 1500 --artifacts 20 --output parse.json
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import harness
+
+sys.path.insert(0, harness.REPOSITORY_DIRECTORY)
+import MulticraftForgeInstaller as installer
+
+
+# Implementazione precedente di get_version_data (solo analisi), come riferimento
+def reference_versions(html):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    return [element.get_text(strip=True) for element in soup.find_all('td', class_='download-version')]
+
+
+# Implementazione precedente di extract_hashes, come riferimento (analizza la pagina a ogni chiamata)
+def reference_hashes(html, installer_url):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    for link in soup.find_all('a', href=True):
+        if installer_url in link['href']:
+            info_div = link.find_next_sibling("div", class_="info-tooltip")
+            if info_div:
+                md5 = sha1 = None
+                for line in info_div.get_text().split("\n"):
+                    if "MD5:" in line:
+                        md5 = line.split("MD5:")[1].strip()
+                    elif "SHA1:" in line:
+                        sha1 = line.split("SHA1:")[1].strip()
+                return md5, sha1
+    return None, None
+
+
+# Misura il tempo minimo e mediano di una funzione
+def time_function(function, repeat, setup=None):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return {"min_ms": round(min(timings) * 1000, 3), "median_ms": round(statistics.median(timings) * 1000, 3)}, result
+
+
+# Legge gli argomenti della riga di comando
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Confronta l'estrattore in streaming delle pagine di Forge con BeautifulSoup.")
+    parser.add_argument("--rows", type=int, action="append", help="numero di build nella pagina (ripetibile, predefinito: 100, 400, 1500)")
+    parser.add_argument("--artifacts", type=int, default=10, help="numero di artefatti di cui estrarre gli hash dalla stessa pagina")
+    parser.add_argument("--repeat", type=int, default=5, help="esecuzioni per misura")
+    parser.add_argument("--output", help="file JSON in cui salvare i risultati")
+    return parser.parse_args(argv)
+
+
+# Funzione principale
+def main(argv=None):
+    args = parse_arguments(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        import bs4  # noqa: F401
+        has_reference = True
+    except ImportError:
+        print("beautifulsoup4 non installato: viene misurato solo l'estrattore in streaming")
+        has_reference = False
+
+    results = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0], "pages": []}
+    base_url = "https://files.example.invalid"
+    with tempfile.TemporaryDirectory(prefix="mfi-parse-") as directory:
+        for rows in args.rows or [100, 400, 1500]:
+            harness.write_forge_pages(directory, base_url, [harness.MODERN_GAME_VERSION], rows)
+            with open(os.path.join(directory, f"index_{harness.MODERN_GAME_VERSION}.html")) as file:
+                html = file.read()
+            # Artefatti distribuiti lungo la pagina, dall'inizio alla fine
+            step = max(1, rows // max(1, args.artifacts))
+            urls = [f"{base_url}{harness.MAVEN_PATH}{harness.MODERN_GAME_VERSION}-47.0.{rows - row}/"
+                    f"forge-{harness.MODERN_GAME_VERSION}-47.0.{rows - row}-installer.jar" for row in range(0, rows, step)][:args.artifacts]
+
+            page = {"rows": rows, "bytes": len(html.encode())}
+            clear_cache = installer.forge_page_cache.clear
+            page["stream_versions"], versions = time_function(
+                lambda: [build["version"] for build in installer.parse_forge_page(html)["builds"]], args.repeat, clear_cache)
+            page["stream_versions_cached"], _ = time_function(
+                lambda: [build["version"] for build in installer.parse_forge_page(html)["builds"]], args.repeat)
+            page["stream_hashes"], hashes = time_function(
+                lambda: [installer.extract_hashes(html, url) for url in urls], args.repeat, clear_cache)
+
+            if has_reference:
+                page["reference_versions"], reference = time_function(lambda: reference_versions(html), args.repeat)
+                page["reference_hashes"], reference_result = time_function(
+                    lambda: [reference_hashes(html, url) for url in urls], max(1, args.repeat // 2))
+                page["same_results"] = reference == versions and reference_result == hashes
+                page["speedup_versions"] = round(page["reference_versions"]["min_ms"] / page["stream_versions"]["min_ms"], 1)
+                page["speedup_hashes"] = round(page["reference_hashes"]["min_ms"] / page["stream_hashes"]["min_ms"], 1)
+            results["pages"].append(page)
+
+    for page in results["pages"]:
+        line = f"{page['rows']:>6} build, {page['bytes'] // 1024:>6} KiB: estrattore {page['stream_versions']['min_ms']} ms"
+        line += f" (in cache {page['stream_versions_cached']['min_ms']} ms), hash di {args.artifacts} artefatti {page['stream_hashes']['min_ms']} ms"
+        if has_reference:
+            line += (f" | BeautifulSoup {page['reference_versions']['min_ms']} ms, hash {page['reference_hashes']['min_ms']} ms"
+                     f" | x{page['speedup_versions']} / x{page['speedup_hashes']}, risultati identici: {page['same_results']}")
+        print(line)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+            file.write("\n")
+
+    return 0 if all(page.get("same_results", True) for page in results["pages"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
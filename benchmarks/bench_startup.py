@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# Benchmark del tempo di avvio dei comandi più usati (a freddo, un processo per esecuzione)
+#
+# Esempi:
+#   python3 benchmarks/bench_startup.py
+#   python3 benchmarks/bench_startup.py --runs 30 --output avvio.json --check
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import harness
+
+# Moduli pesanti che i comandi veloci non devono importare
+HEAVY_MODULES = ("requests", "urllib3", "bs4", "packaging", "asyncio", "concurrent")
+
+# Comandi che devono restare veloci (nessun modulo pesante importato)
+FAST_COMMANDS = ("help", "list", "versions", "versions_game")
+
+# Programma eseguito in ogni processo: importa lo script, applica le impostazioni del benchmark ed esegue il comando
+BOOTSTRAP = """
+import sys
+sys.path.insert(0, {repository!r})
+import MulticraftForgeInstaller as installer
+for name, value in {overrides!r}.items():
+    setattr(installer, name, value)
+if {modules_path!r}:
+    import atexit
+    def report_modules():
+        with open({modules_path!r}, "w") as file:
+            file.write("\\n".join(sorted(name for name in sys.modules if name.split(".")[0] in {heavy!r})))
+    atexit.register(report_modules)
+try:
+    code = installer.main({argv!r})
+except SystemExit as exit:
+    code = exit.code
+sys.exit(code)
+"""
+
+
+# Esegue un comando in un nuovo processo Python e ritorna (secondi, codice di uscita)
+def run_command(overrides, argv, modules_path=""):
+    program = BOOTSTRAP.format(repository=harness.REPOSITORY_DIRECTORY, overrides=overrides, argv=argv,
+                               modules_path=modules_path, heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", program], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start, completed.returncode
+
+
+# Misura un comando: tempi di avvio a freddo e moduli pesanti importati
+def measure_command(name, overrides, argv, runs):
+    with tempfile.NamedTemporaryFile(suffix=".modules") as modules_file:
+        _, returncode = run_command(overrides, argv, modules_file.name)
+        heavy_modules = [line for line in open(modules_file.name).read().splitlines() if line]
+
+    timings = [run_command(overrides, argv)[0] for _ in range(runs)]
+    return {
+        "command": name,
+        "argv": argv,
+        "returncode": returncode,
+        "min_ms": round(min(timings) * 1000, 2),
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+        "max_ms": round(max(timings) * 1000, 2),
+        "heavy_modules": sorted({module.split(".")[0] for module in heavy_modules}),
+    }
+
+
+# Legge gli argomenti della riga di comando
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del tempo di avvio dei comandi di MulticraftForgeInstaller.")
+    parser.add_argument("--runs", type=int, default=15, help="esecuzioni per comando")
+    parser.add_argument("--output", help="file JSON in cui salvare i risultati")
+    parser.add_argument("--check", action="store_true", help="esce con codice 1 se un comando veloce importa moduli pesanti")
+    return parser.parse_args(argv)
+
+
+# Funzione principale
+def main(argv=None):
+    args = parse_arguments(argv)
+
+    with harness.BenchEnvironment(harness.QUICK_WORKLOAD) as environment:
+        overrides = harness.installer_overrides(environment)
+        install_directory = environment.fresh_directory("jar")
+        game_version, forge_version = harness.MODERN_GAME_VERSION, harness.MODERN_FORGE_VERSION
+
+        # Preparazione (non misurata): indice delle versioni su disco e artefatti nella cache
+        run_command(overrides, ["versions"])
+        run_command(overrides, ["batch", "--install-dir", install_directory, "--version", f"{game_version}-{forge_version}"])
+
+        commands = [
+            ("python", [sys.executable, "-c", "pass"]),
+            ("help", ["--help"]),
+            ("list", ["list", "--install-dir", install_directory]),
+            ("versions", ["versions"]),
+            ("versions_game", ["versions", game_version, "--recommended"]),
+            ("install_pinned_cached", ["batch", "--install-dir", install_directory, "--version", f"{game_version}-{forge_version}", "--force"]),
+        ]
+
+        results = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "runs": args.runs,
+            "commands": [],
+        }
+        for name, command_argv in commands:
+            if name == "python":
+                # Riferimento: avvio dell'interprete senza lo script
+                timings = []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    subprocess.run(command_argv)
+                    timings.append(time.perf_counter() - start)
+                results["commands"].append({"command": name, "argv": [], "returncode": 0,
+                                            "min_ms": round(min(timings) * 1000, 2),
+                                            "median_ms": round(statistics.median(timings) * 1000, 2),
+                                            "max_ms": round(max(timings) * 1000, 2), "heavy_modules": []})
+                continue
+            results["commands"].append(measure_command(name, overrides, command_argv, args.runs))
+
+    print(f"{'comando':>24}  {'min ms':>10}  {'mediana ms':>10}  moduli pesanti")
+    for command in results["commands"]:
+        print(f"{command['command']:>24}  {command['min_ms']:>10}  {command['median_ms']:>10}  {', '.join(command['heavy_modules']) or '-'}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+            file.write("\n")
+
+    failed = [command["command"] for command in results["commands"] if command["returncode"] != 0]
+    if failed:
+        print(f"Comandi non riusciti: {', '.join(failed)}")
+        return 1
+
+    slow = [command["command"] for command in results["commands"] if command["command"] in FAST_COMMANDS and command["heavy_modules"]]
+    if slow:
+        print(f"Comandi veloci che importano moduli pesanti: {', '.join(slow)}")
+    return 1 if args.check and slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,447 @@
+# Strumenti comuni ai benchmark: server HTTP locale, java fittizio, artefatti sintetici e misure per fase
+# Richiede Python 3.7 o superiore (ThreadingHTTPServer e l'opzione directory di SimpleHTTPRequestHandler)
+
+import hashlib
+import http.server
+import json
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import zipfile
+
+# Directory del repository, per importare lo script di installazione
+REPOSITORY_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Versioni usate dai benchmark
+MODERN_GAME_VERSION = "1.20.1"
+MODERN_FORGE_VERSION = "47.2.0"
+LEGACY_GAME_VERSION = "1.4.7"
+LEGACY_FORGE_VERSION = "6.6.2.534"
+
+# Percorso (sul server locale) del repository Maven di Forge
+MAVEN_PATH = "/maven/net/minecraftforge/forge/"
+
+# Carico di lavoro predefinito: tenerlo fisso per poter confrontare i risultati con la baseline
+DEFAULT_WORKLOAD = {
+    "index_rows": 400,
+    "download_mib": 64,
+    "installer_mib": 8,
+    "libraries": 40,
+    "library_kib": 256,
+    "legacy_entries": 1500,
+    "chown_files": 5000,
+}
+
+# Carico di lavoro ridotto, per i benchmark che misurano solo l'avvio dei comandi
+QUICK_WORKLOAD = dict(DEFAULT_WORKLOAD, index_rows=50, download_mib=1, installer_mib=1, libraries=4, legacy_entries=50, chown_files=10)
+
+# Java fittizio: simula l'installer di Forge senza avviare una JVM
+STUB_JAVA = r'''#!{python}
+import hashlib, json, os, re, sys, time, urllib.request, zipfile
+args = sys.argv[1:]
+if args and args[0] in ("-version", "--version"):
+    sys.stderr.write('openjdk version "17.0.8" 2023-07-18\n')
+    sys.exit(0)
+jar = args[args.index("-jar") + 1]
+install = [a.split("=", 1)[1] for a in args if a.startswith("--installServer=")]
+time.sleep(float(os.environ.get("BENCH_JAVA_SLEEP", "0")))
+if install:
+    target = install[0]
+    mc, forge = re.search(r"forge-([^-]+)-(.+)-installer\.jar", os.path.basename(jar)).groups()
+    with zipfile.ZipFile(jar) as installer:
+        documents = [json.loads(installer.read(n)) for n in ("install_profile.json", "version.json")]
+    # Come l'installer reale: le librerie con checksum corretto non vengono scaricate di nuovo
+    for library in documents[0]["libraries"] + documents[1]["libraries"]:
+        artifact = library["downloads"]["artifact"]
+        path = os.path.join(target, "libraries", artifact["path"])
+        if os.path.isfile(path):
+            with open(path, "rb") as existing:
+                if hashlib.sha1(existing.read()).hexdigest() == artifact["sha1"]:
+                    continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with urllib.request.urlopen(artifact["url"]) as response, open(path, "wb") as output:
+            output.write(response.read())
+    forge_directory = os.path.join(target, "libraries", "net", "minecraftforge", "forge", f"{mc}-{forge}")
+    os.makedirs(forge_directory, exist_ok=True)
+    classpath = ":".join("libraries/" + l["downloads"]["artifact"]["path"] for l in documents[1]["libraries"])
+    with open(os.path.join(forge_directory, "unix_args.txt"), "w") as args_file:
+        args_file.write(f"-DlibraryDirectory=libraries\n-p {classpath}\n"
+                        f"libraries/net/minecraftforge/forge/{mc}-{forge}/forge-{mc}-{forge}-server.jar\n")
+    with open(os.path.join(forge_directory, f"forge-{mc}-{forge}-server.jar"), "wb") as server_jar:
+        server_jar.write(os.urandom(4096))
+    for name in ("README.txt", "run.sh", "run.bat", "user_jvm_args.txt"):
+        open(os.path.join(target, name), "w").write("stub")
+    open("installer.log", "w").write("stub")
+else:
+    for name in ("eula.txt", "server.properties"):
+        open(name, "w").write("stub")
+    os.makedirs("logs", exist_ok=True)
+'''
+
+
+# Genera byte pseudo-casuali deterministici (non comprimibili)
+def deterministic_bytes(seed, size):
+    # Equivale a Random.randbytes, disponibile solo da Python 3.9
+    if size == 0:
+        return b""
+    return random.Random(seed).getrandbits(size * 8).to_bytes(size, "little")
+
+
+# Scrive un file e i file .md5/.sha1 pubblicati accanto ad esso, come sul repository Maven
+def write_maven_artifact(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(data)
+    with open(f"{path}.md5", "w") as file:
+        file.write(hashlib.md5(data).hexdigest())
+    with open(f"{path}.sha1", "w") as file:
+        file.write(hashlib.sha1(data).hexdigest())
+    return hashlib.sha1(data).hexdigest()
+
+
+# Scrive un file zip con voci sintetiche comprimibili
+def write_synthetic_jar(path, prefix, count, extra_entries=None):
+    generator = random.Random(prefix)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as jar:
+        for name, data in (extra_entries or {}).items():
+            jar.writestr(name, data)
+        for number in range(count):
+            words = " ".join(generator.choice(("class", "field", "method", "invoke", "return", "load")) for _ in range(300))
+            jar.writestr(f"{prefix}/C{number}.class", words.encode())
+
+
+# Crea le pagine HTML di files.minecraftforge.net con la stessa struttura di quelle reali
+def write_forge_pages(directory, base_url, game_versions, rows):
+    os.makedirs(directory, exist_ok=True)
+    items = "".join(f'<li><a href="index_{v}.html">{v}</a></li>' for v in game_versions)
+    with open(os.path.join(directory, "index.html"), "w") as file:
+        file.write(f'<html><body><ul class="section-version-list"><li class="li-version-list">'
+                   f'<ul>{items}</ul></li></ul></body></html>')
+
+    for game_version in game_versions:
+        body = []
+        for row in range(rows):
+            forge_version = f"47.0.{rows - row}" if game_version == MODERN_GAME_VERSION else f"9.{row}"
+            url = f"{base_url}{MAVEN_PATH}{game_version}-{forge_version}/forge-{game_version}-{forge_version}-installer.jar"
+            digest = hashlib.sha1(url.encode()).hexdigest()
+            body.append(
+                f'<tr><td class="download-version">{forge_version}<i class="promo-latest"></i></td>'
+                f'<td class="download-time" title="2023-01-01">01/01/23</td>'
+                f'<td class="download-files"><ul><li><a href="{url}" title="Installer">'
+                f'<i class="fa classifier-installer"></i><span class="download-classifier">Installer</span></a>'
+                f'<div class="info-tooltip"><strong>MD5:</strong> {digest[:32]}<br>\n'
+                f'<strong>SHA1:</strong> {digest}<br>\n'
+                f'<a href="{url}">(Direct Download)</a></div></li></ul></td></tr>')
+        with open(os.path.join(directory, f"index_{game_version}.html"), "w") as file:
+            file.write(f'<html><body><table class="download-list"><tbody>{"".join(body)}</tbody></table></body></html>')
+
+
+# Crea tutti gli artefatti serviti dal server HTTP locale
+def build_fixtures(root, base_url, workload):
+    """
+    Crea sotto root: pagine HTML di Forge, maven-metadata.xml, promozioni, installer moderno
+    con librerie, universal e server vanilla legacy, un artefatto grande per il download e
+    il template di configurazione di Multicraft.
+    """
+    maven = root + MAVEN_PATH
+    os.makedirs(maven, exist_ok=True)
+
+    game_versions = [MODERN_GAME_VERSION, "1.19.2", "1.12.2", LEGACY_GAME_VERSION]
+    write_forge_pages(os.path.join(root, "forge"), base_url, game_versions, workload["index_rows"])
+
+    versions = [f"{MODERN_GAME_VERSION}-{MODERN_FORGE_VERSION}", f"{LEGACY_GAME_VERSION}-{LEGACY_FORGE_VERSION}"]
+    versions += [f"1.19.2-43.3.{n}" for n in range(50)] + [f"1.12.2-14.23.5.{n}" for n in range(2800, 2860)]
+    with open(os.path.join(maven, "maven-metadata.xml"), "w") as file:
+        file.write("<metadata><versioning><versions>" + "".join(f"<version>{v}</version>" for v in versions)
+                   + "</versions></versioning></metadata>")
+    with open(os.path.join(root, "forge", "promotions_slim.json"), "w") as file:
+        json.dump({"promos": {f"{MODERN_GAME_VERSION}-recommended": MODERN_FORGE_VERSION}}, file)
+
+    # Librerie Maven richieste dall'installer
+    libraries = []
+    for number in range(workload["libraries"]):
+        path = f"bench/lib{number}/1.0/lib{number}-1.0.jar"
+        sha1 = write_maven_artifact(os.path.join(root, "libraries", path),
+                                    deterministic_bytes(f"lib{number}", workload["library_kib"] * 1024))
+        libraries.append({"name": f"bench:lib{number}:1.0", "downloads": {"artifact": {
+            "path": path, "url": f"{base_url}/libraries/{path}", "sha1": sha1, "size": workload["library_kib"] * 1024}}})
+    half = len(libraries) // 2
+
+    modern = f"{MODERN_GAME_VERSION}-{MODERN_FORGE_VERSION}"
+    installer_path = os.path.join(maven, modern, f"forge-{modern}-installer.jar")
+    os.makedirs(os.path.dirname(installer_path), exist_ok=True)
+    with zipfile.ZipFile(installer_path, "w", zipfile.ZIP_STORED) as installer:
+        installer.writestr("install_profile.json", json.dumps({"data": {}, "libraries": libraries[:half]}))
+        installer.writestr("version.json", json.dumps({"libraries": libraries[half:]}))
+        installer.writestr(f"maven/net/minecraftforge/forge/{modern}/forge-{modern}-universal.jar",
+                           deterministic_bytes("installer", workload["installer_mib"] * 1024 * 1024))
+    with open(installer_path, "rb") as file:
+        write_maven_artifact(installer_path, file.read())
+
+    legacy = f"{LEGACY_GAME_VERSION}-{LEGACY_FORGE_VERSION}"
+    universal_path = os.path.join(maven, legacy, f"forge-{legacy}-universal.zip")
+    os.makedirs(os.path.dirname(universal_path), exist_ok=True)
+    write_synthetic_jar(universal_path, "net/minecraftforge", workload["legacy_entries"])
+    with open(universal_path, "rb") as file:
+        write_maven_artifact(universal_path, file.read())
+
+    vanilla_path = os.path.join(root, "vanilla", f"minecraft_server.{LEGACY_GAME_VERSION}.jar")
+    os.makedirs(os.path.dirname(vanilla_path), exist_ok=True)
+    write_synthetic_jar(vanilla_path, "net/minecraft/server", workload["legacy_entries"], {
+        "META-INF/MANIFEST.MF": b"Manifest-Version: 1.0\r\nMain-Class: net.minecraft.server.MinecraftServer\r\n\r\n",
+        "META-INF/MOJANG_C.SF": b"Signature-Version: 1.0\r\n\r\n",
+        "META-INF/MOJANG_C.DSA": deterministic_bytes("dsa", 2048),
+    })
+
+    write_maven_artifact(os.path.join(maven, "bench-download", "forge-bench-download-installer.jar"),
+                         deterministic_bytes("download", workload["download_mib"] * 1024 * 1024))
+
+    with open(os.path.join(root, "conf.txt"), "w") as file:
+        file.write("[config]\nname = Craftbukkit\nsource = http://example.invalid/jar\n"
+                   "configSource = http://example.invalid/conf\ncategory = Mods\n\n"
+                   "[start]\ncommand = \"{JAVA}\" -jar \"{JAR}\" nogui\n")
+
+
+# Gestore HTTP del server locale: file statici, HEAD e contatore dei byte inviati
+class FixtureRequestHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    bytes_sent = None
+
+    def translate_path(self, path):
+        return super().translate_path(path.split("?", 1)[0])
+
+    def do_GET(self):
+        if self.path == "/__stats":
+            body = json.dumps({"bytes_sent": self.bytes_sent.value}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+
+    def copyfile(self, source, outputfile):
+        while True:
+            chunk = source.read(1024 * 1024)
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            with self.bytes_sent.get_lock():
+                self.bytes_sent.value += len(chunk)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Avvia il server HTTP (eseguito in un processo separato, per non alterare le misure)
+def serve_fixtures(root, port, bytes_sent, ready):
+    FixtureRequestHandler.bytes_sent = bytes_sent
+    handler = lambda *args, **kwargs: FixtureRequestHandler(*args, directory=root, **kwargs)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    ready.set()
+    server.serve_forever()
+
+
+# Ambiente di benchmark: server locale, java fittizio e directory temporanee
+class BenchEnvironment:
+    def __init__(self, workload=None, port=0):
+        self.workload = dict(DEFAULT_WORKLOAD, **(workload or {}))
+        self.directory = tempfile.mkdtemp(prefix="mfi-bench-")
+        self.root = os.path.join(self.directory, "www")
+        self.port = port or _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.process = None
+
+    def __enter__(self):
+        build_fixtures(self.root, self.base_url, self.workload)
+
+        bin_directory = os.path.join(self.directory, "bin")
+        os.makedirs(bin_directory)
+        java_path = os.path.join(bin_directory, "java")
+        with open(java_path, "w") as file:
+            file.write(STUB_JAVA.replace("{python}", sys.executable))
+        os.chmod(java_path, 0o755)
+        os.environ["PATH"] = bin_directory + os.pathsep + os.environ["PATH"]
+
+        context = multiprocessing.get_context("spawn")
+        self.bytes_sent = context.Value("q", 0)
+        ready = context.Event()
+        self.process = context.Process(target=serve_fixtures, args=(self.root, self.port, self.bytes_sent, ready), daemon=True)
+        self.process.start()
+        ready.wait(10)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.process:
+            self.process.terminate()
+            self.process.join()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    # Byte inviati finora dal server locale
+    def transferred_bytes(self):
+        return self.bytes_sent.value
+
+    # Crea una directory vuota nell'area di lavoro del benchmark
+    def fresh_directory(self, name):
+        path = os.path.join(self.directory, name)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        return path
+
+    # Importa lo script e lo configura per usare solo il server locale e directory temporanee
+    def load_installer(self):
+        if REPOSITORY_DIRECTORY not in sys.path:
+            sys.path.insert(0, REPOSITORY_DIRECTORY)
+        import MulticraftForgeInstaller as installer
+
+        for name, value in installer_overrides(self).items():
+            setattr(installer, name, value)
+        return installer
+
+    # Riporta lo script allo stato "a freddo": nessuna cache su disco o in memoria
+    def reset_installer_state(self, installer):
+        shutil.rmtree(installer.CACHE_DIRECTORY, ignore_errors=True)
+        installer.html_cache.clear()
+        installer.expected_hashes_cache.clear()
+        installer.forge_page_cache.clear()
+        installer.downloaded_hashes.clear()
+        installer.version_index = None
+        installer.version_catalogue = None
+        installer.config_template = None
+
+
+# Impostazioni dello script che puntano al server locale e alle directory temporanee del benchmark
+def installer_overrides(environment):
+    cache_directory = os.path.join(environment.directory, "cache")
+    maven_url = environment.base_url + MAVEN_PATH
+    return {
+        "CACHE_DIRECTORY": cache_directory,
+        "ARTIFACT_CACHE_DIRECTORY": os.path.join(cache_directory, "artifacts"),
+        "HTTP_CACHE_DIRECTORY": os.path.join(cache_directory, "http"),
+        "MAVEN_MIRROR_DIRECTORY": os.path.join(cache_directory, "maven"),
+        "VERSION_INDEX_PATH": os.path.join(cache_directory, "version_index.json"),
+        "VERSION_CATALOGUE_PATH": os.path.join(cache_directory, "version_catalogue.bin"),
+        "CONFIG_TEMPLATE_PATH": os.path.join(cache_directory, "craftbukkit.jar.conf"),
+        "FORGE_MAVEN_URL": maven_url,
+        "FORGE_MAVEN_METADATA_URL": f"{maven_url}maven-metadata.xml",
+        "FORGE_PROMOTIONS_URL": f"{environment.base_url}/forge/promotions_slim.json",
+        "MULTICRAFT_CONFIG_URL": f"{environment.base_url}/conf.txt",
+        "MULTICRAFT_VANILLA_URL": environment.base_url + "/vanilla/minecraft_server.{game_version}.jar",
+    }
+
+
+# Trova una porta TCP libera sull'interfaccia locale
+def _free_port():
+    import socket
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+# Legge i contatori di I/O del processo da /proc/self/io
+def read_process_io():
+    try:
+        with open("/proc/self/io") as file:
+            return {key: int(value) for key, value in (line.split(":") for line in file)}
+    except OSError:
+        return {}
+
+
+# Azzera il picco di memoria residente del processo (Linux), così ogni fase misura il proprio picco
+def reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+# Legge il picco di memoria residente del processo in KiB
+def read_peak_rss_kib():
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+# Esegue una fase e ne misura tempo, memoria, byte trasferiti e system call
+def measure_stage(environment, name, function, setup=None, repeat=1):
+    """
+    Esegue function repeat volte (dopo setup, non misurato) e ritorna le misure della fase:
+    tempo reale (minimo e mediana), picco di RSS, byte inviati dal server locale, system call
+    di lettura/scrittura e byte letti/scritti da /proc/self/io, tempo CPU dei processi figli.
+    Le misure diverse dal tempo si riferiscono all'ultima esecuzione.
+    """
+    wall_times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        reset_peak_rss()
+        io_before = read_process_io()
+        children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        bytes_before = environment.transferred_bytes()
+        start = time.perf_counter()
+        result = function()
+        wall_times.append(time.perf_counter() - start)
+        io_after = read_process_io()
+        children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        peak_rss = read_peak_rss_kib()
+        bytes_transferred = environment.transferred_bytes() - bytes_before
+
+    return {
+        "stage": name,
+        "wall_seconds": round(min(wall_times), 4),
+        "wall_seconds_median": round(statistics.median(wall_times), 4),
+        "peak_rss_kib": peak_rss,
+        "bytes_transferred": bytes_transferred,
+        "syscr": io_after.get("syscr", 0) - io_before.get("syscr", 0),
+        "syscw": io_after.get("syscw", 0) - io_before.get("syscw", 0),
+        "rchar": io_after.get("rchar", 0) - io_before.get("rchar", 0),
+        "wchar": io_after.get("wchar", 0) - io_before.get("wchar", 0),
+        "children_cpu_seconds": round((children_after.ru_utime + children_after.ru_stime)
+                                      - (children_before.ru_utime + children_before.ru_stime), 4),
+        "ok": bool(result) if result is not None else True,
+    }
+
+
+# Confronta i risultati con una baseline e ritorna l'elenco delle regressioni
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    Una fase è in regressione se il tempo reale supera quello della baseline di oltre
+    tolerance (es. 0.25 = +25%) o se trasferisce più byte della baseline.
+    """
+    regressions = []
+    if baseline.get("workload") != results["workload"]:
+        print("Attenzione: il carico di lavoro è diverso da quello della baseline, il confronto non è significativo")
+    baseline_stages = {stage["stage"]: stage for stage in baseline.get("stages", [])}
+    for stage in results["stages"]:
+        reference = baseline_stages.get(stage["stage"])
+        if not reference:
+            continue
+        stage["baseline_wall_seconds"] = reference["wall_seconds"]
+        stage["wall_ratio"] = round(stage["wall_seconds"] / reference["wall_seconds"], 3) if reference["wall_seconds"] else None
+        if stage["wall_ratio"] and stage["wall_ratio"] > 1 + tolerance:
+            regressions.append(f"{stage['stage']}: tempo {stage['wall_seconds']} s (baseline {reference['wall_seconds']} s)")
+        if stage["bytes_transferred"] > reference.get("bytes_transferred", 0) * (1 + tolerance) + 4096:
+            regressions.append(f"{stage['stage']}: {stage['bytes_transferred']} byte trasferiti (baseline {reference['bytes_transferred']})")
+    return regressions
+
+
+# Stampa una tabella riassuntiva delle fasi
+def print_table(results):
+    columns = ("stage", "wall_seconds", "peak_rss_kib", "bytes_transferred", "syscr", "syscw", "children_cpu_seconds")
+    print("  ".join(f"{column:>20}" for column in columns))
+    for stage in results["stages"]:
+        print("  ".join(f"{str(stage.get(column)):>20}" for column in columns))